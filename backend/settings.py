@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     "rest_framework_simplejwt",
     'core',
@@ -74,6 +75,31 @@ REST_FRAMEWORK = {
     )
 }
 
+# Cache (respuestas publicas del catalogo). Local-memory by default; set CACHE_URL=redis://... so
+# every gunicorn worker shares entries and invalidations.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+# Respuestas del catalogo (inventario.cache). Sin valor: 300 s con una caché compartida, desactivado
+# con la caché local de cada proceso (no vería los cambios hechos por otros workers); 0 la desactiva
+CATALOGO_CACHE_TIMEOUT = env.int("CATALOGO_CACHE_TIMEOUT", default=None)
+# Segundos que /api/inventario/producto/stock/ reutiliza un stock leido (inventario.disponibilidad)
+STOCK_CACHE_TIMEOUT = env.int("STOCK_CACHE_TIMEOUT", default=5)
+# Snapshot del carrito por usuario (ventas.cache) y cada cuántos segundos un GET del carrito
+# vuelve a escribir ultima_actividad. Sin valor: 300 s con una caché compartida (CACHE_URL=redis://...),
+# desactivado con la caché local de cada proceso; 0 lo desactiva siempre
+CARRITO_CACHE_TIMEOUT = env.int("CARRITO_CACHE_TIMEOUT", default=None)
+CARRITO_TOUCH_INTERVAL = env.int("CARRITO_TOUCH_INTERVAL", default=60)
+# Cada cuántos segundos cada proceso escribe las visitas al carrito acumuladas (ventas.actividad)
+ACTIVIDAD_FLUSH_INTERVAL = env.int("ACTIVIDAD_FLUSH_INTERVAL", default=10)
+
+# manage.py run_scheduler: intervalos (segundos) de los barridos de carritos y reservas pendientes
+SCHEDULER_EXPIRE_CARTS_INTERVAL = env.int("SCHEDULER_EXPIRE_CARTS_INTERVAL", default=60)
+SCHEDULER_CANCEL_PENDING_INTERVAL = env.int("SCHEDULER_CANCEL_PENDING_INTERVAL", default=300)
+
+# Tamaño de pagina por defecto del listado de productos (?cursor= / ?page_size=)
+PRODUCTO_PAGE_SIZE = env.int("PRODUCTO_PAGE_SIZE", default=24)
+
 # CORS (ajusta dominios en produccion)
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -137,6 +163,32 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+
+# Media (imagenes de productos)
+# Product images are stored once per content hash in the "productos" storage; swap its BACKEND
+# (e.g. an S3 storage) without touching the app code. With the local default, MEDIA_ROOT must be
+# a persistent disk in production (Render: a Disk mounted there); the app serves the files itself.
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env("MEDIA_ROOT", default=str(BASE_DIR / "media"))
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    "productos": {
+        "BACKEND": env("PRODUCT_IMAGE_STORAGE", default="django.core.files.storage.FileSystemStorage"),
+    },
+}
+
+# Resized variants (thumb/card/detail) are cached on local disk and evicted past this byte budget
+IMAGE_DERIVATIVES_ROOT = env("IMAGE_DERIVATIVES_ROOT", default=os.path.join(MEDIA_ROOT, "derivados"))
+IMAGE_DERIVATIVES_MAX_BYTES = env.int("IMAGE_DERIVATIVES_MAX_BYTES", default=512 * 1024 * 1024)
+IMAGE_DERIVATIVES_WORKERS = env.int("IMAGE_DERIVATIVES_WORKERS", default=2)
+# Seconds between eviction passes (each walks the whole derivative cache, off the request thread)
+IMAGE_DERIVATIVES_EVICT_INTERVAL = env.float("IMAGE_DERIVATIVES_EVICT_INTERVAL", default=60)
 # Email (SMTP)
 # Defaults target SMTP; configure host/user/pass via env. For local dev without SMTP, set EMAIL_BACKEND
 # to django.core.mail.backends.console.EmailBackend in your .env.
@@ -147,6 +199,23 @@ EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=True)
 EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
 DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default="No Reply <no-reply@tsi-ecommerce.local>")
+# Used by django.core.mail.backends.filebased.EmailBackend (one file per sent message)
+EMAIL_FILE_PATH = env("EMAIL_FILE_PATH", default=str(BASE_DIR / "tmp" / "correos"))
+
+# Cola de correos (core.outbox). The views only queue; `manage.py send_outbox` delivers through
+# OUTBOX_EMAIL_BACKEND, which can point at the console/filebased backends in tests and local dev.
+OUTBOX_EMAIL_BACKEND = env("OUTBOX_EMAIL_BACKEND", default=EMAIL_BACKEND)
+OUTBOX_BATCH_SIZE = env.int("OUTBOX_BATCH_SIZE", default=100)
+OUTBOX_WORKERS = env.int("OUTBOX_WORKERS", default=4)
+OUTBOX_POLL_INTERVAL = env.int("OUTBOX_POLL_INTERVAL", default=5)
+OUTBOX_MAX_ATTEMPTS = env.int("OUTBOX_MAX_ATTEMPTS", default=6)
+OUTBOX_RETRY_BASE = env.int("OUTBOX_RETRY_BASE", default=60)
+OUTBOX_RETRY_MAX = env.int("OUTBOX_RETRY_MAX", default=3600)
+# Dias que se guardan los correos enviados o fallidos antes de que send_outbox los borre
+OUTBOX_RETENTION_DAYS = env.int("OUTBOX_RETENTION_DAYS", default=30)
+
+# Filas que /api/ventas/reservas-admin/export/ pide al cursor del servidor en cada vuelta
+EXPORT_CHUNK_SIZE = env.int("EXPORT_CHUNK_SIZE", default=2000)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
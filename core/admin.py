@@ -1,3 +1,13 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import CorreoSaliente
+
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'asunto', 'estado', 'intentos', 'proximo_intento', 'creado', 'enviado')
+    list_filter = ('estado',)
+    search_fields = ('asunto',)
+    # bodies may carry password reset links; the admin only shows the envelope
+    exclude = ('cuerpo', 'cuerpo_html')
@@ -0,0 +1,109 @@
+import logging
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import outbox
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos en cola (CORREO_SALIENTE). Sin --once queda en ejecución y revisa la cola "
+        "cada --interval segundos; pueden correr varias instancias a la vez"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=getattr(settings, "OUTBOX_BATCH_SIZE", 100),
+            help="Correos reclamados por lote",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "OUTBOX_WORKERS", 4),
+            help="Hilos de envío; cada uno reutiliza una sola conexión SMTP por lote",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=getattr(settings, "OUTBOX_POLL_INTERVAL", 5),
+            help="Segundos de espera cuando la cola está vacía",
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=300,
+            help="Segundos que un lote queda reservado para este proceso antes de poder reintentarse",
+        )
+        parser.add_argument(
+            "--retencion-dias",
+            type=int,
+            default=getattr(settings, "OUTBOX_RETENTION_DAYS", 30),
+            help="Días que se guardan los correos enviados o fallidos antes de borrarlos",
+        )
+        parser.add_argument(
+            "--purga-interval",
+            type=float,
+            default=3600,
+            help="Segundos entre purgas de correos antiguos",
+        )
+        parser.add_argument("--once", action="store_true", help="Vacía la cola una vez y termina")
+
+    def handle(self, *args, **options):
+        detener = threading.Event()
+        if not options["once"]:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: detener.set())
+
+        batch_size = max(1, options["batch_size"])
+        totales = [0, 0, 0]
+        proxima_purga = 0.0
+
+        while not detener.is_set():
+            if time.monotonic() >= proxima_purga:
+                proxima_purga = time.monotonic() + options["purga_interval"]
+                self._purgar(options)
+            try:
+                resultado = outbox.procesar_lote(
+                    limite=batch_size, workers=options["workers"], lease=options["lease"]
+                )
+            except Exception:
+                logger.exception("Fallo al procesar la cola de correos")
+                connection.close()
+                resultado = (0, 0, 0)
+                if options["once"]:
+                    raise
+
+            totales = [t + r for t, r in zip(totales, resultado)]
+            if any(resultado) and options["verbosity"] >= 2:
+                self.stdout.write("Lote: %s enviados, %s reintentos, %s fallidos" % resultado)
+
+            if sum(resultado) < batch_size:
+                # queue drained (or only failures left); wait before polling again
+                if options["once"]:
+                    break
+                detener.wait(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS("Correos enviados: %s, reprogramados: %s, fallidos: %s" % tuple(totales))
+        )
+
+    def _purgar(self, options):
+        try:
+            borrados = outbox.purgar(options["retencion_dias"])
+        except Exception:
+            logger.exception("Fallo al purgar la cola de correos")
+            connection.close()
+            if options["once"]:
+                raise
+            return
+        if borrados and options["verbosity"] >= 2:
+            self.stdout.write("Purgados %s correos antiguos" % borrados)
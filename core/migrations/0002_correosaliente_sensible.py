@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='correosaliente',
+            name='sensible',
+            field=models.BooleanField(default=False, help_text='El cuerpo lleva un secreto (p. ej. enlace de recuperación): se borra al enviarlo o al fallar'),
+        ),
+    ]
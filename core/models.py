@@ -1,3 +1,45 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class CorreoSaliente(models.Model):
+    """Correo en cola (outbox). Se escribe en la misma transacción que el cambio que lo origina
+    y lo envía el comando `send_outbox`."""
+
+    ESTADO_OPCIONES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('ENVIADO', 'Enviado'),
+        ('FALLIDO', 'Fallido'),
+    ]
+
+    asunto = models.CharField(max_length=255)
+    cuerpo = models.TextField()
+    cuerpo_html = models.TextField(blank=True, default='')
+    remitente = models.CharField(max_length=255)
+    destinatarios = models.JSONField(default=list)
+    estado = models.CharField(max_length=20, choices=ESTADO_OPCIONES, default='PENDIENTE')
+    intentos = models.PositiveIntegerField(default=0)
+    proximo_intento = models.DateTimeField(
+        default=timezone.now,
+        help_text="No se intenta enviar antes de este momento (reintentos con backoff)"
+    )
+    ultimo_error = models.TextField(blank=True, default='')
+    sensible = models.BooleanField(
+        default=False,
+        help_text="El cuerpo lleva un secreto (p. ej. enlace de recuperación): se borra al enviarlo o al fallar"
+    )
+    creado = models.DateTimeField(auto_now_add=True)
+    enviado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'CORREO_SALIENTE'
+        indexes = [ #Indice parcial para que el worker tome los pendientes mas antiguos sin ordenar
+            models.Index(
+                fields=['proximo_intento', 'id'],
+                name='correo_pendiente_idx',
+                condition=models.Q(estado='PENDIENTE'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.asunto} -> {', '.join(self.destinatarios)} ({self.estado})"
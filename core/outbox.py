@@ -0,0 +1,223 @@
+"""Persistent outbound email queue (transactional outbox).
+
+Views call `encolar()` instead of `send_mail()`: the message is a
+`CorreoSaliente` row written in the caller's transaction, so it only exists
+if the checkout / status change / password reset committed, and the request
+never waits for the SMTP server. The `send_outbox` command drains the table:
+
+* `reclamar()` takes a batch of due rows with `FOR UPDATE SKIP LOCKED` and
+  pushes their `proximo_intento` forward by a lease, so several workers can
+  run at once and a worker that dies mid-batch only delays its rows.
+* `enviar()` sends the batch from a thread pool; each thread opens one
+  connection to the backend and reuses it for its whole share of the batch.
+* `registrar()` marks sent rows and reschedules failures with exponential
+  backoff, giving up (FALLIDO) after `OUTBOX_MAX_ATTEMPTS`.
+
+Delivery is at-least-once: a worker killed between sending and `registrar()`
+leaves rows that are sent again once their lease expires.
+
+Emails queued with `sensible=True` (password reset links) have their body
+blanked as soon as they are sent or given up on, and `purgar()` deletes sent
+and failed rows past `OUTBOX_RETENTION_DAYS`; `send_outbox` runs it
+periodically.
+
+The backend is `OUTBOX_EMAIL_BACKEND` (defaults to `EMAIL_BACKEND`); use
+`django.core.mail.backends.filebased.EmailBackend` (with `EMAIL_FILE_PATH`)
+or the console/locmem backends to run without an SMTP server.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+logger = logging.getLogger(__name__)
+
+
+def _remitente_por_defecto():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@tsi-ecommerce.local')
+
+
+def _correo(asunto, cuerpo, destinatarios, remitente=None, html='', sensible=False):
+    if isinstance(destinatarios, str):
+        destinatarios = [destinatarios]
+    destinatarios = [d for d in destinatarios if d]
+    if not destinatarios:
+        return None
+    return CorreoSaliente(
+        asunto=asunto[:255],
+        cuerpo=cuerpo,
+        cuerpo_html=html or '',
+        remitente=remitente or _remitente_por_defecto(),
+        destinatarios=destinatarios,
+        sensible=sensible,
+    )
+
+
+def encolar(asunto, cuerpo, destinatarios, remitente=None, html='', sensible=False):
+    """Queue an email; returns the `CorreoSaliente` or None when there is no recipient.
+
+    Call it inside the transaction of the change that triggers the email.
+    `sensible` marks a body carrying a secret, which is blanked once sent.
+    """
+    correo = _correo(asunto, cuerpo, destinatarios, remitente, html, sensible)
+    if correo:
+        correo.save()
+    return correo
+
+
+def encolar_varios(mensajes):
+    """Queue many emails with a single INSERT.
+
+    `mensajes` are dicts with the keyword arguments of `encolar()`; returns how many were queued.
+    """
+    correos = [c for c in (_correo(**m) for m in mensajes) if c]
+    CorreoSaliente.objects.bulk_create(correos, batch_size=500)
+    return len(correos)
+
+
+def pendientes(ahora=None):
+    return CorreoSaliente.objects.filter(estado='PENDIENTE', proximo_intento__lte=ahora or timezone.now())
+
+
+@transaction.atomic
+def reclamar(limite, lease=300):
+    """Claim up to `limite` due emails for `lease` seconds; returns the rows."""
+    ahora = timezone.now()
+    correos = list(
+        pendientes(ahora)
+        .select_for_update(skip_locked=True)
+        .order_by('proximo_intento', 'id')[:limite]
+    )
+    if correos:
+        CorreoSaliente.objects.filter(pk__in=[c.pk for c in correos]).update(
+            proximo_intento=ahora + timedelta(seconds=lease)
+        )
+    return correos
+
+
+def _mensaje(correo, connection):
+    mensaje = EmailMultiAlternatives(
+        correo.asunto,
+        correo.cuerpo,
+        correo.remitente,
+        correo.destinatarios,
+        connection=connection,
+    )
+    if correo.cuerpo_html:
+        mensaje.attach_alternative(correo.cuerpo_html, 'text/html')
+    return mensaje
+
+
+def _enviar_grupo(correos, backend):
+    """Send `correos` over a single connection; returns `{pk: error or None}`."""
+    resultados = {}
+    connection = get_connection(backend, fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        logger.warning("No se pudo abrir la conexión de correo: %s", exc)
+        return {c.pk: str(exc) or exc.__class__.__name__ for c in correos}
+    try:
+        for correo in correos:
+            try:
+                _mensaje(correo, connection).send()
+            except Exception as exc:
+                resultados[correo.pk] = str(exc) or exc.__class__.__name__
+            else:
+                resultados[correo.pk] = None
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return resultados
+
+
+def enviar(correos, workers=1, backend=None):
+    """Send `correos` from `workers` threads, one connection each; returns `{pk: error or None}`."""
+    if not correos:
+        return {}
+    backend = backend or getattr(settings, 'OUTBOX_EMAIL_BACKEND', None) or settings.EMAIL_BACKEND
+    workers = max(1, min(workers, len(correos)))
+    grupos = [correos[i::workers] for i in range(workers)]
+    if workers == 1:
+        return _enviar_grupo(grupos[0], backend)
+
+    resultados = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='outbox') as pool:
+        for parcial in pool.map(lambda grupo: _enviar_grupo(grupo, backend), grupos):
+            resultados.update(parcial)
+    return resultados
+
+
+def espera_reintento(intentos):
+    """Backoff (seconds) before attempt number `intentos + 1`."""
+    base = getattr(settings, 'OUTBOX_RETRY_BASE', 60)
+    maximo = getattr(settings, 'OUTBOX_RETRY_MAX', 3600)
+    return min(base * (2 ** max(0, intentos - 1)), maximo)
+
+
+def registrar(correos, resultados):
+    """Persist the outcome of `enviar()`; returns `(enviados, reintentos, fallidos)`."""
+    ahora = timezone.now()
+    max_intentos = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 6)
+    enviados = [c.pk for c in correos if c.pk in resultados and resultados[c.pk] is None]
+    con_error = []
+    fallidos = 0
+    for correo in correos:
+        error = resultados.get(correo.pk)
+        if error is None:
+            continue
+        correo.intentos += 1
+        correo.ultimo_error = error[:2000]
+        if correo.intentos >= max_intentos:
+            correo.estado = 'FALLIDO'
+            fallidos += 1
+        else:
+            correo.proximo_intento = ahora + timedelta(seconds=espera_reintento(correo.intentos))
+        con_error.append(correo)
+
+    terminados = enviados + [c.pk for c in con_error if c.estado == 'FALLIDO']
+    with transaction.atomic():
+        if enviados:
+            CorreoSaliente.objects.filter(pk__in=enviados).update(
+                estado='ENVIADO', enviado=ahora, ultimo_error=''
+            )
+        if con_error:
+            CorreoSaliente.objects.bulk_update(
+                con_error, ['intentos', 'ultimo_error', 'estado', 'proximo_intento']
+            )
+        if terminados:
+            # nothing will read these bodies again: do not keep reset links around
+            CorreoSaliente.objects.filter(pk__in=terminados, sensible=True).update(cuerpo='', cuerpo_html='')
+    return len(enviados), len(con_error) - fallidos, fallidos
+
+
+def procesar_lote(limite=100, workers=1, lease=300, backend=None):
+    """Claim, send and record one batch; returns `(enviados, reintentos, fallidos)`."""
+    correos = reclamar(limite, lease)
+    if not correos:
+        return 0, 0, 0
+    return registrar(correos, enviar(correos, workers, backend))
+
+
+def purgar(dias=None, limite=1000):
+    """Delete sent and failed emails older than `dias` (OUTBOX_RETENTION_DAYS); returns how many.
+
+    Deletes in chunks of `limite` rows so a large backlog never holds one long transaction.
+    """
+    dias = getattr(settings, 'OUTBOX_RETENTION_DAYS', 30) if dias is None else dias
+    limite_fecha = timezone.now() - timedelta(days=dias)
+    viejos = CorreoSaliente.objects.filter(estado__in=['ENVIADO', 'FALLIDO'], creado__lt=limite_fecha)
+    borrados = 0
+    while True:
+        ids = list(viejos.order_by('id').values_list('id', flat=True)[:limite])
+        if not ids:
+            return borrados
+        borrados += CorreoSaliente.objects.filter(pk__in=ids).delete()[0]
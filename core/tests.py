@@ -1,3 +1,84 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from inventario.tests import SIN_CACHE
+from ventas.tests import HASHER_RAPIDO, crear_usuario
+
+from . import outbox
+from .models import CorreoSaliente
+
+LOCMEM_MAIL = "django.core.mail.backends.locmem.EmailBackend"
+
+
+@override_settings(OUTBOX_EMAIL_BACKEND=LOCMEM_MAIL, CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class CorreoSensibleTests(TestCase):
+    """Password reset links must not outlive their delivery in CORREO_SALIENTE."""
+
+    def test_reset_se_borra_al_enviar(self):
+        crear_usuario("cliente@example.com")
+        respuesta = APIClient().post("/api/auth/password-reset/", {"correo": "cliente@example.com"}, format="json")
+        self.assertEqual(respuesta.status_code, 200)
+        correo = CorreoSaliente.objects.get()
+        self.assertTrue(correo.sensible)
+        self.assertIn("token=", correo.cuerpo)
+
+        outbox.procesar_lote()
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, "ENVIADO")
+        self.assertEqual(correo.cuerpo, "")
+        self.assertIn("token=", mail.outbox[0].body)
+
+    def test_fallido_tambien_se_borra(self):
+        correo = outbox.encolar("Asunto", "enlace secreto", ["a@example.com"], sensible=True)
+        correo.intentos = 99
+        correo.save()
+        outbox.registrar([correo], {correo.pk: "smtp caído"})
+        correo.refresh_from_db()
+        self.assertEqual(correo.estado, "FALLIDO")
+        self.assertEqual(correo.cuerpo, "")
+
+    def test_no_sensible_conserva_cuerpo(self):
+        correo = outbox.encolar("Asunto", "tu pedido", ["a@example.com"])
+        outbox.procesar_lote()
+        correo.refresh_from_db()
+        self.assertEqual(correo.cuerpo, "tu pedido")
+
+    def test_admin_no_muestra_cuerpo(self):
+        admin = site._registry[CorreoSaliente]
+        campos = admin.get_fields(None)
+        self.assertNotIn("cuerpo", campos)
+        self.assertNotIn("cuerpo_html", campos)
+
+
+class PurgaTests(TestCase):
+    def _correo(self, estado, dias):
+        correo = outbox.encolar("Asunto", "cuerpo", ["a@example.com"])
+        CorreoSaliente.objects.filter(pk=correo.pk).update(
+            estado=estado, creado=timezone.now() - timedelta(days=dias)
+        )
+        return correo.pk
+
+    def test_borra_solo_terminados_antiguos(self):
+        viejo_enviado = self._correo("ENVIADO", 40)
+        viejo_fallido = self._correo("FALLIDO", 40)
+        viejo_pendiente = self._correo("PENDIENTE", 40)
+        reciente = self._correo("ENVIADO", 1)
+
+        self.assertEqual(outbox.purgar(dias=30, limite=1), 2)
+        restantes = set(CorreoSaliente.objects.values_list("pk", flat=True))
+        self.assertEqual(restantes, {viejo_pendiente, reciente})
+        self.assertNotIn(viejo_enviado, restantes)
+        self.assertNotIn(viejo_fallido, restantes)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND=LOCMEM_MAIL)
+    def test_send_outbox_purga(self):
+        viejo = self._correo("ENVIADO", 40)
+        call_command("send_outbox", "--once", "--retencion-dias", "30", stdout=io.StringIO())
+        self.assertFalse(CorreoSaliente.objects.filter(pk=viejo).exists())
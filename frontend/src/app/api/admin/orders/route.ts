@@ -18,7 +18,16 @@ export async function GET(request: NextRequest) {
     headers.Authorization = `Bearer ${accessToken}`;
   }
 
-  const backendResponse = await fetch(`${BACKEND}/api/ventas/reservas-admin/`, {
+  // ?id_reserva= fetches one order with its detalles; anything else is forwarded to the paginated list
+  const { searchParams } = new URL(request.url);
+  const id = searchParams.get("id_reserva");
+  searchParams.delete("id_reserva");
+  const query = searchParams.toString();
+  const target = id
+    ? `${BACKEND}/api/ventas/reservas-admin/${encodeURIComponent(id)}/`
+    : `${BACKEND}/api/ventas/reservas-admin/${query ? `?${query}` : ""}`;
+
+  const backendResponse = await fetch(target, {
     method: "GET",
     headers,
     cache: "no-store",
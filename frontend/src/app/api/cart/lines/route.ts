@@ -0,0 +1,33 @@
+import { NextRequest, NextResponse } from "next/server";
+import { backendUrl } from "@/lib/auth/serverTokens";
+import { getUserFromHeaders } from "@/lib/auth/verifyToken";
+
+const BACKEND = backendUrl();
+
+// Batch cart edit: body is [{ producto_id, cantidad }] (final quantities, 0 removes the line)
+export async function PATCH(request: NextRequest) {
+  const user = await getUserFromHeaders(request.headers);
+  if (!user) {
+    return NextResponse.json({ detail: "Unauthorized" }, { status: 401 });
+  }
+
+  const accessToken = (user as any).access as string | undefined;
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  if (accessToken) {
+    headers.Authorization = `Bearer ${accessToken}`;
+  }
+
+  const body = await request.json().catch(() => null);
+  if (!body || typeof body !== 'object') {
+    return NextResponse.json({ detail: 'Invalid JSON body' }, { status: 400 });
+  }
+
+  const backendResponse = await fetch(`${BACKEND}/api/ventas/carrito/lines/`, {
+    method: "PATCH",
+    headers,
+    body: JSON.stringify(body),
+  });
+
+  const data = await backendResponse.json().catch(() => null);
+  return NextResponse.json(data, { status: backendResponse.status });
+}
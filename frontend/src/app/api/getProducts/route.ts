@@ -1,11 +1,16 @@
-import { NextResponse } from "next/server";
+import { NextRequest, NextResponse } from "next/server";
 import { backendUrl } from "@/lib/auth/serverTokens";
 
 const BACKEND = backendUrl();
 
-export async function GET() {
+export async function GET(request: NextRequest) {
   try {
-    const response = await fetch(`${BACKEND}/api/inventario/producto/`, { cache: "no-store" });
+    // forward ?page_size=, ?cursor=, ?ordering= and the catalog filters
+    const params = new URLSearchParams(request.nextUrl.search);
+    if (!params.has("page_size") && !params.has("cursor")) {
+      params.set("page_size", "24");
+    }
+    const response = await fetch(`${BACKEND}/api/inventario/producto/?${params.toString()}`, { cache: "no-store" });
     const data = await response.json().catch(() => null);
     return NextResponse.json(data, { status: response.status });
   } catch (error) {
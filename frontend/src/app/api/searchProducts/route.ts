@@ -0,0 +1,18 @@
+import { NextRequest, NextResponse } from "next/server";
+import { backendUrl } from "@/lib/auth/serverTokens";
+
+const BACKEND = backendUrl();
+
+export async function GET(request: NextRequest) {
+  const q = request.nextUrl.searchParams.get("q") ?? "";
+  try {
+    const response = await fetch(
+      `${BACKEND}/api/inventario/producto/search/?q=${encodeURIComponent(q)}&page_size=8`,
+      { cache: "no-store" }
+    );
+    const data = await response.json().catch(() => null);
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    return NextResponse.json({ detail: "Backend unreachable" }, { status: 502 });
+  }
+}
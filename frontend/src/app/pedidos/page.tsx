@@ -16,6 +16,8 @@ type Pedido = {
 	fecha_creacion: string;
 	fecha_reserva: string;
 	estado: string;
+	total?: number;
+	items_count?: number;
 	correo_usuario?: string | null;
 	detalles: Detalle[];
 };
@@ -132,10 +134,9 @@ export default function PedidosPage() {
 			<>
 				<div className="space-y-4">
 					{visiblePedidos.map((pedido) => {
-						const total = pedido.detalles.reduce(
-							(sum, det) => sum + det.precio_unitario * det.cantidad,
-							0
-						);
+						const total =
+							pedido.total ??
+							pedido.detalles.reduce((sum, det) => sum + det.precio_unitario * det.cantidad, 0);
 						const isCanceled = pedido.estado === "CANCELADA";
 						const statusIdx = ORDER_STATUSES.findIndex((s) => s === pedido.estado);
 						const currentStatusIndex = statusIdx >= 0 ? statusIdx : 0;
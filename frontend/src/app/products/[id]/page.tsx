@@ -92,7 +92,7 @@ export default function ProductDetailPage() {
         
         if (data.imagenes && data.imagenes.length > 0) {
           processedImages = data.imagenes.map((img: any) => {
-             const ruta = img.image || "";
+             const ruta = img.variantes?.detail || img.image || "";
             
              if (ruta.startsWith('http') || ruta.startsWith('data:')) {
                return ruta;
@@ -136,6 +136,28 @@ export default function ProductDetailPage() {
     fetchProduct();
   }, [id]);
 
+  // Refrescar solo el stock (endpoint liviano con caché corta en Django)
+  useEffect(() => {
+    if (!id) return;
+
+    const refreshStock = async () => {
+      try {
+        const res = await fetch(`http://127.0.0.1:8000/api/inventario/producto/stock/?ids=${id}`);
+        if (!res.ok) return;
+        const data = await res.json();
+        const item = Array.isArray(data) ? data[0] : null;
+        if (item) {
+          setProduct((prev) => (prev ? { ...prev, stock: item.stock_disponible } : prev));
+        }
+      } catch (error) {
+        // keep the last known stock
+      }
+    };
+
+    const timer = setInterval(refreshStock, 15000);
+    return () => clearInterval(timer);
+  }, [id]);
+
   if (loading) {
     return <div className="text-center py-20">Cargando producto...</div>;
   }
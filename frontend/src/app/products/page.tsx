@@ -3,7 +3,15 @@
 import { useState, useEffect, Suspense } from "react";
 import { useSearchParams } from "next/navigation"; // <--- Importar esto
 import ProductList, { ProductFrontend } from "@/components/products/productList";
-import FilterSidebar from "@/components/products/sideBar";
+import FilterSidebar, { CategoryFacet } from "@/components/products/sideBar";
+
+const PAGE_SIZE = 24;
+
+// Opciones del selector -> ?ordering= del backend (por defecto, nombre)
+const ORDERING: Record<string, string> = {
+  "price-asc": "precio",
+  "price-desc": "-precio",
+};
 
 // Componente interno que maneja la lógica de búsqueda
 function ProductContent() {
@@ -11,8 +19,10 @@ function ProductContent() {
   
   // ESTADOS
   const [products, setProducts] = useState<ProductFrontend[]>([]);
-  const [categories, setCategories] = useState<string[]>([]);
+  const [categories, setCategories] = useState<CategoryFacet[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
 
   const [selectedCategories, setSelectedCategories] = useState<string[]>([]);
   const [sortOption, setSortOption] = useState<string>("default");
@@ -26,46 +36,65 @@ function ProductContent() {
     }
   }, [searchParams]);
 
-  // 2. CARGAR DATOS DE DJANGO
+  // ids de las categorías seleccionadas (el backend filtra por id)
+  const selectedIds = categories
+    .filter((c) => c.id_categoria !== null && selectedCategories.includes(c.nombre))
+    .map((c) => c.id_categoria)
+    .join(",");
+
+  // Mapeo de Django a React
+  const formatProducts = (items: any[]): ProductFrontend[] =>
+    items.map((item: any) => {
+      let imagenUrl = "https://via.placeholder.com/300";
+
+      if (item.imagenes && item.imagenes.length > 0) {
+        const ruta = item.imagenes[0].variantes?.card || item.imagenes[0].image || "";
+        if (ruta.startsWith('http') || ruta.startsWith('data:')) {
+          imagenUrl = ruta;
+        } else if (ruta.length > 300) {
+          imagenUrl = `data:image/jpeg;base64,${ruta}`;
+        } else {
+          imagenUrl = `http://127.0.0.1:8000${ruta.startsWith('/') ? '' : '/'}${ruta}`;
+        }
+      }
+
+      return {
+        id: item.id_producto,
+        title: item.nombre,
+        price: item.precio,
+        imageSrc: imagenUrl,
+        imageAlt: item.nombre,
+        category: item.categoria_nombre || "Sin Categoría",
+      };
+    });
+
+  // 2. CARGAR DATOS DE DJANGO: primera página (filtrada y ordenada en el servidor) + conteos por categoría
   useEffect(() => {
     const fetchData = async () => {
       try {
-        // 1. Categorías
-        const resCat = await fetch("http://127.0.0.1:8000/api/inventario/categoria/");
-        const dataCat = await resCat.json();
-        const catNames = dataCat.map((c: any) => c.nombre);
-        setCategories(catNames);
-
-        // 2. Productos
-        const resProd = await fetch("http://127.0.0.1:8000/api/inventario/producto/");
+        const params = new URLSearchParams({ page_size: String(PAGE_SIZE) });
+        if (selectedIds) params.set("categoria", selectedIds);
+        const ordering = ORDERING[sortOption];
+        if (ordering) params.set("ordering", ordering);
+        const facetsQuery = selectedIds ? `?categoria=${selectedIds}` : "";
+
+        const [resProd, resFacets] = await Promise.all([
+          fetch(`http://127.0.0.1:8000/api/inventario/producto/?${params.toString()}`),
+          fetch(`http://127.0.0.1:8000/api/inventario/producto/facets/${facetsQuery}`),
+        ]);
         const dataProd = await resProd.json();
-        
-        // Procesar datos (Mapeo de Django a React)
-        const formattedProducts = dataProd.map((item: any) => {
-           let imagenUrl = "https://via.placeholder.com/300";
-           
-           if (item.imagenes && item.imagenes.length > 0) {
-             const ruta = item.imagenes[0].image || "";
-             if (ruta.startsWith('http') || ruta.startsWith('data:')) {
-               imagenUrl = ruta;
-             } else if (ruta.length > 300) {
-               imagenUrl = `data:image/jpeg;base64,${ruta}`;
-             } else {
-               imagenUrl = `http://127.0.0.1:8000${ruta.startsWith('/') ? '' : '/'}${ruta}`;
-             }
-           }
-
-           return {
-             id: item.id_producto,
-             title: item.nombre,
-             price: item.precio, 
-             imageSrc: imagenUrl,
-             imageAlt: item.nombre,
-             category: item.categoria_nombre || "Sin Categoría", 
-           };
-        });
-
-        setProducts(formattedProducts);
+        const dataFacets = await resFacets.json();
+
+        setCategories(
+          (dataFacets.categorias || []).map((c: any) => ({
+            id_categoria: c.id_categoria,
+            nombre: c.nombre || "Sin Categoría",
+            count: c.count,
+          }))
+        );
+
+        setProducts(formatProducts(dataProd.results || []));
+        setNextUrl(dataProd.next || null);
         setLoading(false);
 
       } catch (error) {
@@ -75,21 +104,29 @@ function ProductContent() {
     };
 
     fetchData();
-  }, []);
-
-  // LÓGICA DE FILTRADO Y ORDEN 
-  const processedProducts = products
-    .filter(product => {
-      if (selectedCategories.length === 0) return true;
-      return selectedCategories.includes(product.category);
-    })
-    .sort((a, b) => {
-      switch (sortOption) {
-        case 'price-asc': return a.price - b.price; 
-        case 'price-desc': return b.price - a.price;
-        default: return 0;
-      }
-    });
+  }, [selectedIds, sortOption]);
+
+  // 3. SIGUIENTE PÁGINA (cursor entregado por el backend)
+  const loadMore = async () => {
+    if (!nextUrl || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetch(nextUrl);
+      const data = await res.json();
+      setProducts((prev) => [...prev, ...formatProducts(data.results || [])]);
+      setNextUrl(data.next || null);
+    } catch (error) {
+      console.error("Error conectando con Django:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Las categorías se filtran en el servidor; esto solo evita mostrar filas de una selección anterior
+  const processedProducts = products.filter(product => {
+    if (selectedCategories.length === 0) return true;
+    return selectedCategories.includes(product.category);
+  });
 
   const handleFilterChange = (category: string | null) => {
     if (category === null) {
@@ -128,6 +165,17 @@ function ProductContent() {
         />
         <div className="w-full lg:w-3/4">
           <ProductList products={processedProducts} />
+          {nextUrl && (
+            <div className="flex justify-center mt-8">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="border border-gray-300 rounded-md px-4 py-2 text-sm hover:bg-gray-100 disabled:opacity-50"
+              >
+                {loadingMore ? "Cargando..." : "Cargar más"}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -5,6 +5,14 @@ import { useEffect, useState } from "react";
 const ESTADOS = ["PENDIENTE", "CONFIRMADA", "COMPLETADA", "CANCELADA"];
 const PAGE_SIZE = 10;
 
+// Valores de ?ordering= aceptados por /api/ventas/reservas-admin/
+const ORDENES = [
+  { value: "-fecha_reserva", label: "Más recientes" },
+  { value: "fecha_reserva", label: "Más antiguas" },
+  { value: "-total", label: "Mayor total" },
+  { value: "total", label: "Menor total" },
+];
+
 type Detalle = {
   id: number;
   producto: number;
@@ -30,27 +38,69 @@ type Direccion = {
   depto_oficina?: string | null;
 } | null;
 
+type ResultadoMasivo = {
+  id_reserva: number;
+  estado: string | null;
+  ok: boolean;
+  detail?: string;
+};
+
+// Fila del listado: sin detalles, que se cargan al expandir la reserva
 type Reserva = {
   id_reserva: number;
   fecha_creacion: string;
   fecha_reserva?: string | null;
   estado: string;
+  total: number;
+  items_count: number;
   correo_usuario?: string | null;
   cliente: Cliente;
   direccion: Direccion;
-  detalles: Detalle[];
 };
 
+function cursorFrom(next: string | null | undefined): string | null {
+  if (!next) return null;
+  try {
+    return new URL(next).searchParams.get("cursor");
+  } catch {
+    return null;
+  }
+}
+
 export default function AdminOrdersTable() {
   const [orders, setOrders] = useState<Reserva[]>([]);
   const [filterEstado, setFilterEstado] = useState<string>("TODOS");
-  const [filterRegion, setFilterRegion] = useState<string>("TODAS");
-  const [filterComuna, setFilterComuna] = useState<string>("TODAS");
+  const [filterRegion, setFilterRegion] = useState<string>("");
+  const [filterComuna, setFilterComuna] = useState<string>("");
+  const [fechaDesde, setFechaDesde] = useState<string>("");
+  const [fechaHasta, setFechaHasta] = useState<string>("");
+  const [filterProducto, setFilterProducto] = useState<string>("");
+  const [ordering, setOrdering] = useState<string>(ORDENES[0].value);
   const [search, setSearch] = useState<string>("");
+  const [debouncedSearch, setDebouncedSearch] = useState<string>("");
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [expanded, setExpanded] = useState<Record<number, boolean>>({});
+  const [detalles, setDetalles] = useState<Record<number, Detalle[] | undefined>>({});
+  // cursors[i] is the cursor of page i + 1 (null for the first page)
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
   const [page, setPage] = useState(1);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [reloadKey, setReloadKey] = useState(0);
+  const [selected, setSelected] = useState<Record<number, boolean>>({});
+  const [bulkEstado, setBulkEstado] = useState<string>("CONFIRMADA");
+  const [bulkLoading, setBulkLoading] = useState(false);
+
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  // Reset to the first page when filters, sort or search change
+  useEffect(() => {
+    setCursors([null]);
+    setPage(1);
+  }, [filterEstado, filterRegion, filterComuna, fechaDesde, fechaHasta, filterProducto, ordering, debouncedSearch]);
 
   useEffect(() => {
     let cancelled = false;
@@ -58,16 +108,34 @@ export default function AdminOrdersTable() {
     async function loadOrders() {
       setLoading(true);
       setError(null);
+      const params = new URLSearchParams({ page_size: String(PAGE_SIZE), ordering });
+      if (filterEstado !== "TODOS") params.set("estado", filterEstado);
+      if (filterRegion) params.set("region", filterRegion);
+      if (filterComuna) params.set("comuna", filterComuna);
+      if (fechaDesde) params.set("fecha_desde", fechaDesde);
+      if (fechaHasta) params.set("fecha_hasta", fechaHasta);
+      if (filterProducto.trim()) params.set("producto", filterProducto.trim());
+      if (debouncedSearch) params.set("q", debouncedSearch);
+      const cursor = cursors[page - 1];
+      if (cursor) params.set("cursor", cursor);
+
       try {
-        const res = await fetch("/api/admin/orders", { credentials: "include" });
+        const res = await fetch(`/api/admin/orders?${params.toString()}`, { credentials: "include" });
         if (!res.ok) {
-          const msg = res.status === 401 ? "No autorizado" : "Error cargando reservas";
+          const data = await res.json().catch(() => null);
+          const msg =
+            res.status === 401
+              ? "No autorizado"
+              : data && typeof data === "object" && !Array.isArray(data)
+              ? Object.values(data).flat().join(" ") || "Error cargando reservas"
+              : "Error cargando reservas";
           if (!cancelled) setError(msg);
           return;
         }
         const data = await res.json();
-        if (!cancelled && Array.isArray(data)) {
-          setOrders(data);
+        if (!cancelled) {
+          setOrders(Array.isArray(data?.results) ? data.results : []);
+          setNextCursor(cursorFrom(data?.next));
         }
       } catch (err) {
         if (!cancelled) setError("Error de conexión");
@@ -80,7 +148,32 @@ export default function AdminOrdersTable() {
     return () => {
       cancelled = true;
     };
-  }, []);
+  }, [cursors, page, filterEstado, filterRegion, filterComuna, fechaDesde, fechaHasta, filterProducto, ordering, debouncedSearch, reloadKey]);
+
+  async function toggleExpanded(id_reserva: number) {
+    const open = !expanded[id_reserva];
+    setExpanded((prev) => ({ ...prev, [id_reserva]: open }));
+    if (!open || detalles[id_reserva]) return;
+    try {
+      const res = await fetch(`/api/admin/orders?id_reserva=${id_reserva}`, { credentials: "include" });
+      const data = await res.json().catch(() => null);
+      if (res.ok && Array.isArray(data?.detalles)) {
+        setDetalles((prev) => ({ ...prev, [id_reserva]: data.detalles }));
+      }
+    } catch (err) {
+      // the lines stay unavailable; the rest of the order is still shown
+    }
+  }
+
+  function goNext() {
+    if (!nextCursor) return;
+    setCursors((prev) => [...prev.slice(0, page), nextCursor]);
+    setPage((p) => p + 1);
+  }
+
+  function goPrevious() {
+    setPage((p) => Math.max(1, p - 1));
+  }
 
   async function updateEstado(id_reserva: number, estado: string) {
     try {
@@ -92,7 +185,7 @@ export default function AdminOrdersTable() {
       });
       if (!res.ok) {
         const data = await res.json().catch(() => null);
-        alert(data?.detail || "No se pudo actualizar el estado");
+        alert(data?.detail || data?.estado || "No se pudo actualizar el estado");
         return;
       }
       const updated = await res.json().catch(() => null);
@@ -104,6 +197,46 @@ export default function AdminOrdersTable() {
     }
   }
 
+  async function updateEstadoMasivo() {
+    const ids = Object.keys(selected)
+      .filter((id) => selected[Number(id)])
+      .map(Number);
+    if (!ids.length) return;
+    const ok = confirm(`¿Cambiar ${ids.length} reserva(s) a ${bulkEstado}?`);
+    if (!ok) return;
+
+    setBulkLoading(true);
+    try {
+      const res = await fetch("/api/admin/orders/bulk-status", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        credentials: "include",
+        body: JSON.stringify({ ids, estado: bulkEstado }),
+      });
+      const data = await res.json().catch(() => null);
+      if (!res.ok) {
+        alert(data?.detail || "No se pudo actualizar el estado");
+        return;
+      }
+      const resultados: ResultadoMasivo[] = Array.isArray(data?.resultados) ? data.resultados : [];
+      const nuevos = new Map(resultados.filter((r) => r.ok).map((r) => [r.id_reserva, r.estado as string]));
+      setOrders((prev) => prev.map((o) => (nuevos.has(o.id_reserva) ? { ...o, estado: nuevos.get(o.id_reserva)! } : o)));
+      setSelected({});
+
+      const fallidos = resultados.filter((r) => !r.ok);
+      if (fallidos.length) {
+        alert(
+          `${nuevos.size} actualizada(s). No se pudieron cambiar:\n` +
+            fallidos.map((r) => `#${r.id_reserva}: ${r.detail ?? "error"}`).join("\n")
+        );
+      }
+    } catch (err) {
+      alert("Error de conexión al actualizar estado");
+    } finally {
+      setBulkLoading(false);
+    }
+  }
+
   async function deleteReserva(id_reserva: number) {
     const ok = confirm(`¿Eliminar la reserva #${id_reserva}? Esta acción no se puede deshacer.`);
     if (!ok) return;
@@ -117,68 +250,24 @@ export default function AdminOrdersTable() {
         alert(data?.detail || "No se pudo eliminar la reserva");
         return;
       }
-      window.location.reload();
+      setReloadKey((k) => k + 1);
     } catch (err) {
       alert("Error de conexión al eliminar");
     }
   }
 
-  // Reset page when filters or search change so we don't land on an empty page
-  useEffect(() => {
-    setPage(1);
-  }, [filterEstado, filterRegion, filterComuna, search]);
-
-  if (loading) {
-    return <div className="p-6">Cargando reservas...</div>;
-  }
-
-  if (error) {
-    return <div className="p-6 text-red-600">{error}</div>;
-  }
-
-  if (!orders.length) {
-    return <div className="p-6">No hay reservas registradas.</div>;
-  }
+  const selectedCount = Object.values(selected).filter(Boolean).length;
+  const pageAllSelected = orders.length > 0 && orders.every((o) => selected[o.id_reserva]);
 
-  const regionOptions = Array.from(
-    new Set(orders.map((o) => o.direccion?.region).filter((r): r is string => Boolean(r)))
-  );
-
-  const comunaSource =
-    filterRegion === "TODAS" ? orders : orders.filter((o) => o.direccion?.region === filterRegion);
-
-  const comunaOptions = Array.from(
-    new Set(comunaSource.map((o) => o.direccion?.comuna).filter((c): c is string => Boolean(c)))
-  );
-
-  const filteredByEstado =
-    filterEstado === "TODOS" ? orders : orders.filter((o) => o.estado === filterEstado);
-
-  const filteredByRegion =
-    filterRegion === "TODAS" ? filteredByEstado : filteredByEstado.filter((o) => o.direccion?.region === filterRegion);
-
-  const filteredOrders =
-    filterComuna === "TODAS" ? filteredByRegion : filteredByRegion.filter((o) => o.direccion?.comuna === filterComuna);
-
-  const searchTerm = search.trim().toLowerCase();
-  const visibleOrders = !searchTerm
-    ? filteredOrders
-    : filteredOrders.filter((o) => {
-        const idMatch = o.id_reserva.toString() === searchTerm; // exact id match
-        const cliente = o.cliente;
-        const nombreCompleto = cliente
-          ? `${cliente.nombre} ${cliente.apellido_paterno} ${cliente.apellido_materno || ""}`.toLowerCase()
-          : "";
-        const correo = cliente?.correo?.toLowerCase() || "";
-        const nameMatch = nombreCompleto.includes(searchTerm);
-        const mailMatch = correo.includes(searchTerm);
-        return idMatch || nameMatch || mailMatch;
+  function togglePage() {
+    setSelected((prev) => {
+      const next = { ...prev };
+      orders.forEach((o) => {
+        next[o.id_reserva] = !pageAllSelected;
       });
-
-  const totalPages = Math.max(1, Math.ceil(visibleOrders.length / PAGE_SIZE));
-  const currentPage = Math.min(page, totalPages);
-  const start = (currentPage - 1) * PAGE_SIZE;
-  const paginatedOrders = visibleOrders.slice(start, start + PAGE_SIZE);
+      return next;
+    });
+  }
 
   return (
     <div className="space-y-4">
@@ -210,170 +299,248 @@ export default function AdminOrdersTable() {
 
         <div className="flex items-center gap-2">
           <span className="text-sm text-gray-600">Región:</span>
-          <select
+          <input
             value={filterRegion}
             onChange={(e) => {
               setFilterRegion(e.target.value);
-              setFilterComuna("TODAS");
+              setFilterComuna("");
             }}
+            placeholder="Todas"
             className="border rounded px-2 py-1 text-sm bg-white w-full"
-          >
-            <option value="TODAS">Todas</option>
-            {regionOptions.map((region) => (
-              <option key={region} value={region}>
-                {region}
-              </option>
-            ))}
-          </select>
+          />
         </div>
 
         <div className="flex items-center gap-2">
           <span className="text-sm text-gray-600">Comuna:</span>
-          <select
+          <input
             value={filterComuna}
             onChange={(e) => setFilterComuna(e.target.value)}
+            placeholder="Todas"
+            className="border rounded px-2 py-1 text-sm bg-white w-full"
+          />
+        </div>
+
+        <div className="flex items-center gap-2">
+          <span className="text-sm text-gray-600">Orden:</span>
+          <select
+            value={ordering}
+            onChange={(e) => setOrdering(e.target.value)}
             className="border rounded px-2 py-1 text-sm bg-white w-full"
           >
-            <option value="TODAS">Todas</option>
-            {comunaOptions.map((comuna) => (
-              <option key={comuna} value={comuna}>
-                {comuna}
+            {ORDENES.map((orden) => (
+              <option key={orden.value} value={orden.value}>
+                {orden.label}
               </option>
             ))}
           </select>
         </div>
+
+        <div className="flex items-center gap-2">
+          <span className="text-sm text-gray-600">Desde:</span>
+          <input
+            type="date"
+            value={fechaDesde}
+            onChange={(e) => setFechaDesde(e.target.value)}
+            className="border rounded px-2 py-1 text-sm bg-white w-full"
+          />
+        </div>
+
+        <div className="flex items-center gap-2">
+          <span className="text-sm text-gray-600">Hasta:</span>
+          <input
+            type="date"
+            value={fechaHasta}
+            onChange={(e) => setFechaHasta(e.target.value)}
+            className="border rounded px-2 py-1 text-sm bg-white w-full"
+          />
+        </div>
+
+        <div className="flex items-center gap-2">
+          <span className="text-sm text-gray-600 whitespace-nowrap">ID producto:</span>
+          <input
+            inputMode="numeric"
+            value={filterProducto}
+            onChange={(e) => setFilterProducto(e.target.value.replace(/\D/g, ""))}
+            placeholder="Todos"
+            className="border rounded px-2 py-1 text-sm bg-white w-full"
+          />
+        </div>
       </div>
 
-      {paginatedOrders.map((reserva) => (
-        <div key={reserva.id_reserva} className="border rounded p-4 bg-white">
-          <div className="flex items-center justify-between mb-3">
-            <div>
-              <div className="font-semibold">Reserva #{reserva.id_reserva}</div>
-              <div className="text-sm text-gray-500">Fecha: {reserva.fecha_creacion}</div>
-            </div>
-            <div className="flex items-center gap-2">
-              <button
-                onClick={() =>
-                  setExpanded((prev) => ({ ...prev, [reserva.id_reserva]: !prev[reserva.id_reserva] }))
-                }
-                className="text-sm border rounded px-2 py-1 bg-gray-100 hover:bg-gray-200"
-              >
-                {expanded[reserva.id_reserva] ? "Ocultar cliente" : "Ver cliente"}
-              </button>
-              <button
-                onClick={() => deleteReserva(reserva.id_reserva)}
-                className="text-sm border rounded px-2 py-1 bg-red-50 text-red-700 hover:bg-red-100"
-              >
-                Eliminar
-              </button>
-              <span className="text-sm text-gray-600">Estado:</span>
-              <select
-                value={reserva.estado}
-                onChange={(e) => updateEstado(reserva.id_reserva, e.target.value)}
-                className="border rounded px-2 py-1 text-sm bg-white"
-              >
-                {ESTADOS.map((estado) => (
-                  <option key={estado} value={estado}>
-                    {estado}
-                  </option>
-                ))}
-              </select>
-            </div>
-          </div>
+      <div className="flex flex-wrap items-center gap-3 border rounded px-3 py-2 bg-gray-50 text-sm">
+        <label className="flex items-center gap-2">
+          <input type="checkbox" checked={pageAllSelected} onChange={togglePage} />
+          Seleccionar página
+        </label>
+        <span className="text-gray-600">{selectedCount} seleccionada(s)</span>
+        <select
+          value={bulkEstado}
+          onChange={(e) => setBulkEstado(e.target.value)}
+          className="border rounded px-2 py-1 bg-white"
+        >
+          {ESTADOS.map((estado) => (
+            <option key={estado} value={estado}>
+              {estado}
+            </option>
+          ))}
+        </select>
+        <button
+          onClick={updateEstadoMasivo}
+          disabled={!selectedCount || bulkLoading}
+          className="border rounded px-3 py-1 bg-white hover:bg-gray-100 disabled:opacity-50"
+        >
+          {bulkLoading ? "Aplicando..." : "Cambiar estado"}
+        </button>
+      </div>
 
-          {expanded[reserva.id_reserva] && (
-            <div className="mb-3 rounded border bg-gray-50 p-3 text-sm">
-              <div className="font-semibold mb-1">Cliente</div>
-              {reserva.cliente ? (
-                <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
-                  <div>
-                    <span className="text-gray-600">Nombre: </span>
-                    {`${reserva.cliente.nombre} ${reserva.cliente.apellido_paterno}${
-                      reserva.cliente.apellido_materno ? ` ${reserva.cliente.apellido_materno}` : ""
-                    }`}
-                  </div>
-                  <div>
-                    <span className="text-gray-600">Correo: </span>
-                    {reserva.cliente.correo}
-                  </div>
-                  <div>
-                    <span className="text-gray-600">Teléfono: </span>
-                    {reserva.cliente.telefono}
+      {loading ? (
+        <div className="p-6">Cargando reservas...</div>
+      ) : error ? (
+        <div className="p-6 text-red-600">{error}</div>
+      ) : !orders.length ? (
+        <div className="p-6">No hay reservas registradas.</div>
+      ) : (
+        orders.map((reserva) => (
+          <div key={reserva.id_reserva} className="border rounded p-4 bg-white">
+            <div className="flex items-center justify-between mb-3">
+              <div className="flex items-start gap-3">
+                <input
+                  type="checkbox"
+                  className="mt-1"
+                  checked={Boolean(selected[reserva.id_reserva])}
+                  onChange={(e) => setSelected((prev) => ({ ...prev, [reserva.id_reserva]: e.target.checked }))}
+                />
+                <div>
+                  <div className="font-semibold">Reserva #{reserva.id_reserva}</div>
+                  <div className="text-sm text-gray-500">Fecha: {reserva.fecha_creacion}</div>
+                  <div className="text-sm text-gray-500">
+                    {reserva.items_count} producto(s) · Total ${reserva.total.toLocaleString("es-CL")}
                   </div>
                 </div>
-              ) : (
-                <div className="text-gray-500">Sin datos de cliente.</div>
-              )}
-
-              <div className="font-semibold mt-3 mb-1">Dirección</div>
-              {reserva.direccion ? (
-                <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
-                  <div>
-                    <span className="text-gray-600">Calle: </span>
-                    {reserva.direccion.calle} {reserva.direccion.numero}
-                  </div>
-                  <div>
-                    <span className="text-gray-600">Comuna: </span>
-                    {reserva.direccion.comuna}
-                  </div>
-                  <div>
-                    <span className="text-gray-600">Región: </span>
-                    {reserva.direccion.region}
-                  </div>
-                  {reserva.direccion.depto_oficina ? (
-                    <div>
-                      <span className="text-gray-600">Depto/Oficina: </span>
-                      {reserva.direccion.depto_oficina}
+              </div>
+              <div className="flex items-center gap-2">
+                <button
+                  onClick={() => toggleExpanded(reserva.id_reserva)}
+                  className="text-sm border rounded px-2 py-1 bg-gray-100 hover:bg-gray-200"
+                >
+                  {expanded[reserva.id_reserva] ? "Ocultar detalle" : "Ver detalle"}
+                </button>
+                <button
+                  onClick={() => deleteReserva(reserva.id_reserva)}
+                  className="text-sm border rounded px-2 py-1 bg-red-50 text-red-700 hover:bg-red-100"
+                >
+                  Eliminar
+                </button>
+                <span className="text-sm text-gray-600">Estado:</span>
+                <select
+                  value={reserva.estado}
+                  onChange={(e) => updateEstado(reserva.id_reserva, e.target.value)}
+                  className="border rounded px-2 py-1 text-sm bg-white"
+                >
+                  {ESTADOS.map((estado) => (
+                    <option key={estado} value={estado}>
+                      {estado}
+                    </option>
+                  ))}
+                </select>
+              </div>
+            </div>
+
+            {expanded[reserva.id_reserva] && (
+              <>
+                <div className="mb-3 rounded border bg-gray-50 p-3 text-sm">
+                  <div className="font-semibold mb-1">Cliente</div>
+                  {reserva.cliente ? (
+                    <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
+                      <div>
+                        <span className="text-gray-600">Nombre: </span>
+                        {`${reserva.cliente.nombre} ${reserva.cliente.apellido_paterno}${
+                          reserva.cliente.apellido_materno ? ` ${reserva.cliente.apellido_materno}` : ""
+                        }`}
+                      </div>
+                      <div>
+                        <span className="text-gray-600">Correo: </span>
+                        {reserva.cliente.correo}
+                      </div>
+                      <div>
+                        <span className="text-gray-600">Teléfono: </span>
+                        {reserva.cliente.telefono}
+                      </div>
+                    </div>
+                  ) : (
+                    <div className="text-gray-500">Sin datos de cliente.</div>
+                  )}
+
+                  <div className="font-semibold mt-3 mb-1">Dirección</div>
+                  {reserva.direccion ? (
+                    <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
+                      <div>
+                        <span className="text-gray-600">Calle: </span>
+                        {reserva.direccion.calle} {reserva.direccion.numero}
+                      </div>
+                      <div>
+                        <span className="text-gray-600">Comuna: </span>
+                        {reserva.direccion.comuna}
+                      </div>
+                      <div>
+                        <span className="text-gray-600">Región: </span>
+                        {reserva.direccion.region}
+                      </div>
+                      {reserva.direccion.depto_oficina ? (
+                        <div>
+                          <span className="text-gray-600">Depto/Oficina: </span>
+                          {reserva.direccion.depto_oficina}
+                        </div>
+                      ) : null}
                     </div>
-                  ) : null}
+                  ) : (
+                    <div className="text-gray-500">Sin dirección registrada.</div>
+                  )}
                 </div>
-              ) : (
-                <div className="text-gray-500">Sin dirección registrada.</div>
-              )}
-            </div>
-          )}
-
-          <table className="w-full text-sm border-t">
-            <thead className="bg-gray-50">
-              <tr>
-                <th className="p-2 text-left">Producto</th>
-                <th className="p-2 text-left">Cantidad</th>
-                <th className="p-2 text-left">Precio unitario</th>
-                <th className="p-2 text-left">Subtotal</th>
-              </tr>
-            </thead>
-            <tbody>
-              {reserva.detalles.map((det) => (
-                <tr key={det.id} className="border-t">
-                  <td className="p-2">{det.nombre_producto}</td>
-                  <td className="p-2">{det.cantidad}</td>
-                  <td className="p-2">${det.precio_unitario.toLocaleString("es-CL")}</td>
-                  <td className="p-2">${(det.precio_unitario * det.cantidad).toLocaleString("es-CL")}</td>
-                </tr>
-              ))}
-            </tbody>
-          </table>
-        </div>
-      ))}
+
+                {detalles[reserva.id_reserva] ? (
+                  <table className="w-full text-sm border-t">
+                    <thead className="bg-gray-50">
+                      <tr>
+                        <th className="p-2 text-left">Producto</th>
+                        <th className="p-2 text-left">Cantidad</th>
+                        <th className="p-2 text-left">Precio unitario</th>
+                        <th className="p-2 text-left">Subtotal</th>
+                      </tr>
+                    </thead>
+                    <tbody>
+                      {detalles[reserva.id_reserva]!.map((det) => (
+                        <tr key={det.id} className="border-t">
+                          <td className="p-2">{det.nombre_producto}</td>
+                          <td className="p-2">{det.cantidad}</td>
+                          <td className="p-2">${det.precio_unitario.toLocaleString("es-CL")}</td>
+                          <td className="p-2">${(det.precio_unitario * det.cantidad).toLocaleString("es-CL")}</td>
+                        </tr>
+                      ))}
+                    </tbody>
+                  </table>
+                ) : (
+                  <div className="text-sm text-gray-500">Cargando detalle...</div>
+                )}
+              </>
+            )}
+          </div>
+        ))
+      )}
 
       <div className="flex items-center justify-between text-sm text-gray-700 pt-2">
-        <div>
-          Mostrando {visibleOrders.length ? start + 1 : 0}-{Math.min(start + PAGE_SIZE, visibleOrders.length)} de {visibleOrders.length}
-        </div>
+        <div>Página {page}</div>
         <div className="flex items-center gap-2">
           <button
-            onClick={() => setPage((p) => Math.max(1, p - 1))}
-            disabled={currentPage === 1}
+            onClick={goPrevious}
+            disabled={page === 1 || loading}
             className="px-3 py-1 border rounded disabled:opacity-50"
           >
             Anterior
           </button>
-          <span>
-            Página {currentPage} / {totalPages}
-          </span>
           <button
-            onClick={() => setPage((p) => Math.min(totalPages, p + 1))}
-            disabled={currentPage === totalPages}
+            onClick={goNext}
+            disabled={!nextCursor || loading}
             className="px-3 py-1 border rounded disabled:opacity-50"
           >
             Siguiente
@@ -16,6 +16,7 @@ import {
 type ProductoImagen = {
   image: string;
   orden: number;
+  variantes?: { thumb: string; card: string; detail: string };
 };
 
 type ProductoBackend = {
@@ -26,6 +27,8 @@ type ProductoBackend = {
   destacado: boolean;
 };
 
+const FEATURED_COUNT = 12;
+
 export default function FeaturedProducts() {
   const [products, setProducts] = React.useState<ProductoBackend[]>([]);
 
@@ -37,10 +40,11 @@ export default function FeaturedProducts() {
   React.useEffect(() => {
     async function fetchFeatured() {
       try {
-        const res = await fetch("http://127.0.0.1:8000/api/inventario/producto/?destacado=true");
+        // solo la primera página: el carrusel no necesita el catálogo completo
+        const res = await fetch(`http://127.0.0.1:8000/api/inventario/producto/?destacado=true&page_size=${FEATURED_COUNT}`);
         if (res.ok) {
           const data = await res.json();
-          setProducts(data);
+          setProducts(data.results || []);
         }
       } catch (error) {
         console.error("Error fetching featured products:", error);
@@ -70,7 +74,7 @@ export default function FeaturedProducts() {
           <CarouselContent className="-ml-4">
             {products.map((product) => {
               const imageSrc = product.imagenes && product.imagenes.length > 0 
-                ? product.imagenes[0].image 
+                ? (product.imagenes[0].variantes?.card || product.imagenes[0].image) 
                 : "/placeholder.png"; 
 
               return (
@@ -1,6 +1,6 @@
 "use client";
 
-import { useCallback, useEffect, useMemo, useRef, useState } from "react";
+import { useCallback, useEffect, useRef, useState } from "react";
 import type { MutableRefObject } from "react";
 import Image from "next/image";
 import { useRouter } from "next/navigation";
@@ -28,21 +28,9 @@ export default function HeaderSearchOverlay({ open, onClose, toggleRef }: Header
   const inputRef = useRef<HTMLInputElement>(null);
 
   const [searchTerm, setSearchTerm] = useState("");
-  const [allProducts, setAllProducts] = useState<SearchProduct[]>([]);
+  const [results, setResults] = useState<SearchProduct[]>([]);
   const [loadingSearch, setLoadingSearch] = useState(false);
 
-  const filteredResults = useMemo(() => {
-    if (searchTerm.trim() === "") return [];
-    const lower = searchTerm.toLowerCase();
-    return allProducts
-      .filter((product) => {
-        const inTitle = product.title.toLowerCase().includes(lower);
-        const inCategory = product.category?.toLowerCase().includes(lower) ?? false;
-        return inTitle || inCategory;
-      })
-      .slice(0, 8);
-  }, [searchTerm, allProducts]);
-
   const handleClose = useCallback(() => {
     onClose();
     setSearchTerm("");
@@ -64,51 +52,54 @@ export default function HeaderSearchOverlay({ open, onClose, toggleRef }: Header
   }, [open, toggleRef, handleClose]);
 
   useEffect(() => {
-    if (!open || allProducts.length > 0) return;
+    const term = searchTerm.trim();
+    if (!open || term.length < 2) {
+      setResults([]);
+      return;
+    }
 
     let ignore = false;
 
-    const loadProducts = async () => {
+    // debounce keystrokes; ranking and typo tolerance happen on the backend
+    const timer = setTimeout(async () => {
       try {
         setLoadingSearch(true);
-        const response = await fetch("/api/getProducts");
+        const response = await fetch(`/api/searchProducts?q=${encodeURIComponent(term)}`);
         if (!response.ok) return;
         const data = await response.json();
-        if (ignore || !Array.isArray(data)) return;
+        if (ignore || !Array.isArray(data?.results)) return;
 
-        const formatted: SearchProduct[] = data.map((item: any) => {
+        const formatted: SearchProduct[] = data.results.map((item: any) => {
           let imageSrc = "https://via.placeholder.com/150";
-          if (Array.isArray(item.imagenes) && item.imagenes.length > 0) {
-            const resource = item.imagenes[0].image;
-            if (typeof resource === "string" && resource) {
-              imageSrc = resource.startsWith("http")
-                ? resource
-                : `${buildBackendUrl("/")}${resource.startsWith("/") ? resource.slice(1) : resource}`;
-            }
+          const resource = item.imagen;
+          if (typeof resource === "string" && resource) {
+            imageSrc = resource.startsWith("http")
+              ? resource
+              : `${buildBackendUrl("/")}${resource.startsWith("/") ? resource.slice(1) : resource}`;
           }
 
           return {
-            id: item.id_producto ?? item.id ?? 0,
+            id: item.id_producto ?? 0,
             title: item.nombre ?? "Producto",
             price: Number(item.precio ?? 0),
             imageSrc,
-            category: item.categoria_nombre ?? item.categoria?.nombre ?? null,
+            category: item.categoria_nombre ?? null,
           };
         });
 
-        setAllProducts(formatted);
+        setResults(formatted);
       } catch (error) {
-        console.error("Error fetching products", error);
+        console.error("Error searching products", error);
       } finally {
         if (!ignore) setLoadingSearch(false);
       }
-    };
+    }, 250);
 
-    loadProducts();
     return () => {
       ignore = true;
+      clearTimeout(timer);
     };
-  }, [open, allProducts.length]);
+  }, [open, searchTerm]);
 
   useEffect(() => {
     if (open && inputRef.current) {
@@ -166,11 +157,11 @@ export default function HeaderSearchOverlay({ open, onClose, toggleRef }: Header
 
         {open && (
           <div className="w-full max-w-5xl mt-8">
-            {loadingSearch && !allProducts.length ? (
+            {loadingSearch && !results.length ? (
               <div className="text-center text-gray-400 py-8 text-sm">Cargando productos...</div>
-            ) : filteredResults.length > 0 ? (
+            ) : results.length > 0 ? (
               <div className="grid grid-cols-2 md:grid-cols-5 gap-6 animate-in fade-in slide-in-from-top-4">
-                {filteredResults.map((product) => (
+                {results.map((product) => (
                   <button
                     key={product.id}
                     onClick={() => handleProductNavigate(product.id)}
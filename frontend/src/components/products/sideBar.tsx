@@ -1,8 +1,14 @@
 // src/components/products/sideBar.tsx
 "use client";
 
+export type CategoryFacet = {
+  id_categoria: number | null;
+  nombre: string;
+  count: number;
+};
+
 type SideBarProps = {
-  categories: string[];
+  categories: CategoryFacet[];
   selectedCategories: string[];
   onFilterChange: (category: string | null) => void;
 };
@@ -37,7 +43,7 @@ export default function SideBar({
         </li>
 
         {/* Resto de Categorías */}
-        {categories.map((category) => (
+        {categories.map(({ nombre: category, count }) => (
           <li key={category} className="flex items-center group">
             <input
               type="checkbox"
@@ -53,6 +59,7 @@ export default function SideBar({
               className="ml-3 text-sm text-gray-700 cursor-pointer select-none group-hover:text-black"
             >
               {category}
+              <span className="ml-1 text-gray-400">({count})</span>
             </label>
           </li>
         ))}
@@ -0,0 +1,160 @@
+"""Response cache for the public (AllowAny) catalog reads.
+
+Rendered JSON responses are stored in the Django cache under a key made of the
+catalog version, the host and the full query string. Any write to
+`Producto`, `ProductoImagen` or `Categoria` bumps the version (see
+`signals.py`), which orphans every cached entry at once instead of having to
+enumerate keys. Cached responses carry an ETag and Last-Modified so browsers
+and the Next.js proxy can revalidate with a 304.
+
+Each product also has its own version (`versiones_productos`), bumped by its
+writes and stock deltas, so caches that only show a few products (the cart
+snapshot in `ventas.cache`) are not invalidated by every write to the catalog.
+
+Invalidations only reach other processes (gunicorn workers, the scheduler and
+outbox loops) through a shared backend (CACHE_URL=redis://...). With a
+per-process backend, such as the local-memory default, a worker would serve
+stock and prices changed elsewhere for the whole TTL, so the response cache is
+off unless CATALOGO_CACHE_TIMEOUT is set explicitly.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+VERSION_KEY = "inventario:version"
+
+
+def get_cache():
+    return caches[getattr(settings, "CATALOGO_CACHE_ALIAS", "default")]
+
+
+# backends that keep their entries per process
+BACKENDS_LOCALES = ("LocMemCache", "DummyCache")
+
+
+def compartida():
+    """True when the cache backend is shared by every process (Redis, Memcached, database, ...)."""
+    return type(get_cache()).__name__ not in BACKENDS_LOCALES
+
+
+def timeout():
+    """TTL of the cached responses in seconds; 0 disables the response cache."""
+    valor = getattr(settings, "CATALOGO_CACHE_TIMEOUT", None)
+    if valor is None:
+        return 300 if compartida() else 0
+    return valor
+
+
+def current_version():
+    """Catalog version; doubles as the Last-Modified timestamp (ms since epoch)."""
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = int(time.time() * 1000)
+        # add() so concurrent first readers agree on a single value
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate():
+    """Drop every cached catalog response."""
+    cache = get_cache()
+    # strictly newer even when two writes land in the same millisecond
+    version = max(int(time.time() * 1000), (cache.get(VERSION_KEY) or 0) + 1)
+    cache.set(VERSION_KEY, version, None)
+
+
+def _producto_key(producto_id):
+    return f"inventario:producto:{producto_id}:version"
+
+
+def versiones_productos(producto_ids):
+    """`{producto_id: version}` for the products of `producto_ids` that have one.
+
+    A version is the `time.time_ns()` of the product's last committed write.
+    """
+    keys = {_producto_key(pk): pk for pk in producto_ids}
+    return {keys[key]: valor for key, valor in get_cache().get_many(list(keys)).items()}
+
+
+def iniciar_versiones(producto_ids, valor):
+    """Give `valor` as version to the products of `producto_ids` that have none yet."""
+    cache = get_cache()
+    existentes = versiones_productos(producto_ids)
+    for pk in producto_ids:
+        if pk not in existentes:
+            # add() never overwrites a version bumped meanwhile
+            cache.add(_producto_key(pk), valor, None)
+
+
+def invalidar_productos(producto_ids):
+    """Bump the versions of `producto_ids` once the current transaction commits."""
+    keys = [_producto_key(pk) for pk in producto_ids]
+    if keys:
+        transaction.on_commit(lambda: get_cache().set_many(dict.fromkeys(keys, time.time_ns()), None))
+
+
+def build_key(request, version, scope):
+    query = request.GET.urlencode()
+    digest = hashlib.sha1(f"{request.get_host()}|{request.path}|{query}".encode()).hexdigest()
+    return f"inventario:{version}:{scope}:{digest}"
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since") or "")
+    return since is not None and int(last_modified // 1000) <= since
+
+
+def cached_response(view_method):
+    """Cache the rendered JSON of a successful read action and answer conditional requests.
+
+    Wraps viewset actions (`list`, `retrieve`, `@action` reads). Only GET
+    responses with status 200 are stored; hits are served as JSON without
+    touching the database or the serializers.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method != "GET" or not timeout():
+            return view_method(self, request, *args, **kwargs)
+
+        version = current_version()
+        cache = get_cache()
+        key = build_key(request, version, f"{self.basename}.{view_method.__name__}")
+        entry = cache.get(key)
+
+        if entry is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            body = JSONRenderer().render(response.data)
+            entry = {
+                "body": body,
+                "etag": quote_etag(hashlib.md5(body).hexdigest()),
+                "last_modified": version,
+            }
+            cache.set(key, entry, timeout())
+
+        if _not_modified(request, entry["etag"], entry["last_modified"]):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(entry["body"], content_type="application/json")
+        response["ETag"] = entry["etag"]
+        response["Last-Modified"] = http_date(entry["last_modified"] // 1000)
+        response["Cache-Control"] = "public, max-age=0, must-revalidate"
+        return response
+
+    return wrapper
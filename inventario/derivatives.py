@@ -0,0 +1,208 @@
+"""Fixed-size derivatives (thumb, card, detail) of stored product images.
+
+Derivatives are generated by a small background thread pool when a
+`ProductoImagen` is saved and cached on local disk under
+IMAGE_DERIVATIVES_ROOT. The cache is bounded by IMAGE_DERIVATIVES_MAX_BYTES:
+when it grows past the budget the least recently served files are evicted.
+Eviction walks the whole cache, so it only runs on the worker pool and at
+most once per IMAGE_DERIVATIVES_EVICT_INTERVAL seconds per process; the
+budget is therefore a soft limit.
+Evicted or never-generated derivatives are rebuilt on demand by
+`ImagenVarianteView`, so the URLs handed out by the serializers are always
+valid.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+SIZES = {
+    "thumb": (160, 160),
+    "card": (480, 480),
+    "detail": (1200, 1200),
+}
+
+FORMAT = "WEBP"
+EXTENSION = "webp"
+CONTENT_TYPE = "image/webp"
+NON_RASTER_EXTENSIONS = (".svg", ".bin")
+
+_executor = None
+_executor_lock = threading.Lock()
+_evict_lock = threading.Lock()
+_last_evict = float("-inf")
+_last_evict_lock = threading.Lock()
+
+
+def cache_root() -> Path:
+    return Path(getattr(settings, "IMAGE_DERIVATIVES_ROOT", Path(settings.MEDIA_ROOT) / "derivados"))
+
+
+def max_bytes() -> int:
+    return int(getattr(settings, "IMAGE_DERIVATIVES_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def evict_interval() -> float:
+    return float(getattr(settings, "IMAGE_DERIVATIVES_EVICT_INTERVAL", 60))
+
+
+def derivative_path(key: str, size: str) -> Path:
+    digest = storage.digest_from_key(key)
+    return cache_root() / size / digest[:2] / f"{digest}.{EXTENSION}"
+
+
+def is_resizable(key) -> bool:
+    return bool(key) and not key.endswith(NON_RASTER_EXTENSIONS)
+
+
+def variant_urls(imagen, request=None):
+    """Per-size URLs for a `ProductoImagen`; external or vector images fall back to their own URL."""
+    if imagen is None:
+        return None
+    return variant_urls_for(imagen.archivo, imagen.image, request)
+
+
+def variant_urls_for(archivo, image, request=None):
+    """Same as `variant_urls` but from raw column values (e.g. a `values()` row)."""
+    if not is_resizable(archivo):
+        original = storage.url_for_key(archivo, request) if archivo else image
+        return {size: original for size in SIZES}
+    urls = {}
+    for size in SIZES:
+        url = reverse("producto-imagen-variante", kwargs={"size": size, "key": archivo})
+        urls[size] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def render(key: str, size: str) -> Path:
+    """Build (or return the cached) derivative of `key` at `size`."""
+    from PIL import Image, ImageOps
+
+    path = derivative_path(key, size)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with storage.get_storage().open(key, "rb") as source:
+        with Image.open(source) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+            img.thumbnail(SIZES[size], Image.Resampling.LANCZOS)
+            # write to a temp file first so readers never see a half-written derivative
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    img.save(out, FORMAT, quality=82, method=4)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+    return path
+
+
+def render_all(key: str):
+    for size in SIZES:
+        try:
+            render(key, size)
+        except Exception:
+            logger.exception("No se pudo generar la variante %s de %s", size, key)
+    if _evict_due():
+        evict()
+
+
+def _evict_due() -> bool:
+    """True at most once per `evict_interval()`; throttles the full-cache walk."""
+    global _last_evict
+    with _last_evict_lock:
+        ahora = time.monotonic()
+        if ahora - _last_evict < evict_interval():
+            return False
+        _last_evict = ahora
+        return True
+
+
+def schedule_evict():
+    """Queue an eviction pass on the worker pool (never in the request thread), if one is due."""
+    if not _evict_due():
+        return
+    if getattr(settings, "IMAGE_DERIVATIVES_SYNC", False):
+        evict()
+        return
+    _get_executor().submit(evict)
+
+
+def evict():
+    """Delete least recently used derivatives until the cache fits the byte budget."""
+    if not _evict_lock.acquire(blocking=False):
+        return
+    try:
+        root = cache_root()
+        if not root.exists():
+            return
+        entries = []
+        total = 0
+        for path in root.rglob(f"*.{EXTENSION}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        budget = max_bytes()
+        if total <= budget:
+            return
+        # evict down to 90% so a full cache does not evict on every new image
+        target = budget * 0.9
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except FileNotFoundError:
+                continue
+    finally:
+        _evict_lock.release()
+
+
+def touch(path: Path):
+    """Mark a derivative as recently used for eviction purposes."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(getattr(settings, "IMAGE_DERIVATIVES_WORKERS", 2)),
+                thread_name_prefix="derivados",
+            )
+        return _executor
+
+
+def schedule(key: str):
+    """Queue generation of all sizes of `key` in the background worker pool."""
+    if not is_resizable(key):
+        return
+    if getattr(settings, "IMAGE_DERIVATIVES_SYNC", False):
+        render_all(key)
+        return
+    _get_executor().submit(render_all, key)
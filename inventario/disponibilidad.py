@@ -0,0 +1,51 @@
+"""Short-lived cache of `Producto.stock_disponible` for availability polling.
+
+`GET /api/inventario/producto/stock/?ids=1,2,3` answers from one
+`cache.get_many()`; only the ids that miss are read from PRODUCTO, with a
+single query, and kept for `STOCK_CACHE_TIMEOUT` seconds. Every stock delta
+(`stock.aplicar` / `stock.devolver`) and every product save drops the
+affected keys once the write commits, so readers polling the same hot SKUs
+during a drop hit the cache instead of the rows the buyers are updating. The
+TTL only bounds the window in which a read that raced a commit can serve
+the previous value.
+
+Per process with the local-memory default; shared with CACHE_URL=redis://...
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .cache import get_cache
+from .models import Producto
+
+# maximo de ids por consulta
+MAX_IDS = 100
+
+
+def _key(producto_id):
+    return f"inventario:stock:{producto_id}"
+
+
+def timeout():
+    return getattr(settings, "STOCK_CACHE_TIMEOUT", 5)
+
+
+def leer(producto_ids):
+    """`{producto_id: stock_disponible}` for the ids that exist."""
+    cache = get_cache()
+    keys = {_key(pk): pk for pk in producto_ids}
+    stock = {keys[key]: valor for key, valor in cache.get_many(list(keys)).items()}
+    faltantes = [pk for pk in producto_ids if pk not in stock]
+    if faltantes:
+        leidos = dict(Producto.objects.filter(pk__in=faltantes).values_list("pk", "stock_disponible"))
+        # unknown ids are cached as None too, so polling a deleted product does not reach the table
+        leidos = {pk: leidos.get(pk) for pk in faltantes}
+        cache.set_many({_key(pk): valor for pk, valor in leidos.items()}, timeout())
+        stock.update(leidos)
+    return {pk: valor for pk, valor in stock.items() if valor is not None}
+
+
+def invalidar(producto_ids):
+    """Drop the cached stock of `producto_ids` once the current transaction commits."""
+    keys = [_key(pk) for pk in producto_ids]
+    if keys:
+        transaction.on_commit(lambda: get_cache().delete_many(keys))
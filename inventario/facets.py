@@ -0,0 +1,146 @@
+"""Catalog filters and facet counts for `ProductoViewSet`.
+
+Facet counts are disjunctive: each facet is counted with every filter applied
+except its own, so selecting a category still shows how many products the
+other categories have. All of them come from a single GROUP BY query over
+(categoria, price bucket, in stock, inside price range, inside selected
+categories); the handful of resulting rows is folded in Python.
+"""
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Value, When
+from rest_framework.exceptions import ValidationError
+
+# Limites inferiores de los rangos de precio (CLP); el ultimo rango queda abierto
+PRICE_BUCKETS = (0, 10000, 25000, 50000, 100000)
+
+_TRUE = {"1", "true", "si", "sí", "yes"}
+_FALSE = {"0", "false", "no"}
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Debe ser un número entero."})
+
+
+def _bool_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    value = value.lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValidationError({name: "Debe ser true o false."})
+
+
+def parse_filtros(params):
+    """Read `categoria`, `precio_min`, `precio_max`, `en_stock` and `destacado` from query params."""
+    categorias = []
+    for raw in params.getlist("categoria"):
+        for part in raw.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if not part.isdigit():
+                raise ValidationError({"categoria": "Debe ser una lista de ids."})
+            categorias.append(int(part))
+
+    return {
+        "categorias": categorias,
+        "precio_min": _int_param(params, "precio_min"),
+        "precio_max": _int_param(params, "precio_max"),
+        "en_stock": _bool_param(params, "en_stock"),
+        "destacado": _bool_param(params, "destacado"),
+    }
+
+
+def _q_categoria(filtros):
+    return Q(categoria_id__in=filtros["categorias"]) if filtros["categorias"] else Q()
+
+
+def _q_precio(filtros):
+    q = Q()
+    if filtros["precio_min"] is not None:
+        q &= Q(precio__gte=filtros["precio_min"])
+    if filtros["precio_max"] is not None:
+        q &= Q(precio__lte=filtros["precio_max"])
+    return q
+
+
+def _q_stock(filtros):
+    if filtros["en_stock"] is None:
+        return Q()
+    return Q(stock_disponible__gt=0) if filtros["en_stock"] else Q(stock_disponible__lte=0)
+
+
+def aplicar_filtros(queryset, filtros):
+    queryset = queryset.filter(_q_categoria(filtros), _q_precio(filtros), _q_stock(filtros))
+    if filtros["destacado"]:
+        queryset = queryset.filter(destacado=True)
+    return queryset
+
+
+def _flag(q):
+    if not q:
+        return Value(True)
+    return Case(When(q, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def _bucket():
+    whens = [When(precio__gte=low, then=Value(i)) for i, low in reversed(list(enumerate(PRICE_BUCKETS)))]
+    return Case(*whens, default=Value(0), output_field=IntegerField())
+
+
+def calcular_facetas(queryset, filtros):
+    """Return category, price bucket and stock counts for `queryset` under `filtros`."""
+    if filtros["destacado"]:
+        queryset = queryset.filter(destacado=True)
+
+    rows = (
+        queryset.order_by()
+        .values("categoria_id", "categoria__nombre")
+        .annotate(
+            bucket=_bucket(),
+            hay_stock=_flag(Q(stock_disponible__gt=0)),
+            en_precio=_flag(_q_precio(filtros)),
+            en_categoria=_flag(_q_categoria(filtros)),
+            n=Count("pk"),
+        )
+        .values_list("categoria_id", "categoria__nombre", "bucket", "hay_stock", "en_precio", "en_categoria", "n")
+    )
+
+    def stock_ok(hay_stock):
+        return filtros["en_stock"] is None or hay_stock == filtros["en_stock"]
+
+    categorias = {}
+    buckets = [0] * len(PRICE_BUCKETS)
+    en_stock = 0
+    total = 0
+    for cat_id, cat_nombre, bucket, hay_stock, en_precio, en_categoria, n in rows:
+        if en_precio and stock_ok(hay_stock):
+            entry = categorias.setdefault(cat_id, {"id_categoria": cat_id, "nombre": cat_nombre, "count": 0})
+            entry["count"] += n
+        if en_categoria and stock_ok(hay_stock):
+            buckets[bucket] += n
+        if en_categoria and en_precio:
+            if hay_stock:
+                en_stock += n
+            if stock_ok(hay_stock):
+                total += n
+
+    precios = []
+    for i, low in enumerate(PRICE_BUCKETS):
+        high = PRICE_BUCKETS[i + 1] - 1 if i + 1 < len(PRICE_BUCKETS) else None
+        precios.append({"min": low, "max": high, "count": buckets[i]})
+
+    return {
+        "total": total,
+        "categorias": sorted(categorias.values(), key=lambda c: (c["nombre"] is None, c["nombre"] or "")),
+        "precios": precios,
+        "en_stock": en_stock,
+    }
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from inventario import cache, derivatives, storage
+from inventario.models import ProductoImagen
+
+
+def _generar_variantes(claves):
+    for key in claves:
+        derivatives.schedule(key)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve las imágenes base64 de PRODUCTO_IMAGEN al almacenamiento de imágenes, por lotes. "
+        "El data URL original se conserva salvo con --borrar-original"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--borrar-original",
+            action="store_true",
+            help=(
+                "Vacía la columna image una vez comprobado que el archivo guardado se puede leer. "
+                "Úsalo solo con un almacenamiento persistente: si se pierde el archivo, el original ya no existe"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        borrar = options["borrar_original"]
+        converted = 0
+        failed = 0
+        last_pk = 0
+
+        while True:
+            # Only fetch the pks first: the TEXT column is what we are trying to avoid reading in bulk
+            pendientes = ProductoImagen.objects.filter(id_imagen__gt=last_pk, image__startswith="data:")
+            if not borrar:
+                # already externalized rows only need another pass to drop their original
+                pendientes = pendientes.filter(Q(archivo__isnull=True) | Q(archivo=""))
+            pks = list(
+                pendientes.order_by("id_imagen")
+                .values_list("id_imagen", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+
+            updated = []
+            imagenes = ProductoImagen.objects.filter(id_imagen__in=pks).only("id_imagen", "producto_id", "image")
+            for imagen in imagenes:
+                try:
+                    imagen.archivo = storage.store_data_url(imagen.image)
+                except storage.InvalidImageData as exc:
+                    failed += 1
+                    self.stderr.write(f"Imagen {imagen.id_imagen}: {exc}")
+                    continue
+                if not storage.is_readable(imagen.archivo):
+                    failed += 1
+                    self.stderr.write(f"Imagen {imagen.id_imagen}: el archivo guardado no se pudo leer")
+                    continue
+                if borrar:
+                    imagen.image = None
+                updated.append(imagen)
+
+            with transaction.atomic():
+                ProductoImagen.objects.bulk_update(updated, ["image", "archivo"])
+                # bulk_update sends no post_save: invalidate and queue the variants like the signals do
+                transaction.on_commit(cache.invalidate)
+                cache.invalidar_productos({imagen.producto_id for imagen in updated})
+                claves = {imagen.archivo for imagen in updated}
+                transaction.on_commit(lambda: _generar_variantes(claves))
+            converted += len(updated)
+            self.stdout.write(f"Convertidas {converted} (hasta id {last_pk})")
+
+        self.stdout.write(self.style.SUCCESS(f"Imágenes convertidas: {converted}, con error: {failed}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_producto_destacado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productoimagen',
+            name='archivo',
+            field=models.CharField(blank=True, help_text='Clave del archivo en el almacenamiento de imágenes (sha256)', max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_productoimagen_archivo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['nombre', 'id_producto'], name='producto_nombre_id_idx'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:38
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+
+# Spanish stemming with accents stripped, so "camion" matches "camión"
+CREATE_CONFIG = """
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish);
+        ALTER TEXT SEARCH CONFIGURATION es_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+    END IF;
+END
+$$;
+"""
+
+DROP_CONFIG = "DROP TEXT SEARCH CONFIGURATION IF EXISTS es_unaccent;"
+
+# search_vector only depends on nombre, descripcion and the category name, so the
+# trigger is limited to those columns and stock updates never recompute it.
+CREATE_TRIGGERS = """
+CREATE OR REPLACE FUNCTION producto_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('es_unaccent', coalesce(NEW.nombre, '')), 'A') ||
+        setweight(to_tsvector('es_unaccent', coalesce(
+            (SELECT c.nombre FROM "CATEGORIA" c WHERE c.id_categoria = NEW.id_categoria), ''
+        )), 'B') ||
+        setweight(to_tsvector('es_unaccent', coalesce(NEW.descripcion, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER producto_search_vector_trg
+    BEFORE INSERT OR UPDATE OF nombre, descripcion, id_categoria ON "PRODUCTO"
+    FOR EACH ROW EXECUTE FUNCTION producto_search_vector_update();
+
+CREATE OR REPLACE FUNCTION categoria_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF NEW.nombre IS DISTINCT FROM OLD.nombre THEN
+        UPDATE "PRODUCTO" SET nombre = nombre WHERE id_categoria = NEW.id_categoria;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER categoria_search_vector_trg
+    AFTER UPDATE OF nombre ON "CATEGORIA"
+    FOR EACH ROW EXECUTE FUNCTION categoria_search_vector_update();
+
+UPDATE "PRODUCTO" SET nombre = nombre;
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS categoria_search_vector_trg ON "CATEGORIA";
+DROP FUNCTION IF EXISTS categoria_search_vector_update();
+DROP TRIGGER IF EXISTS producto_search_vector_trg ON "PRODUCTO";
+DROP FUNCTION IF EXISTS producto_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_producto_nombre_id_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_CONFIG, DROP_CONFIG),
+        migrations.AddField(
+            model_name='producto',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='producto_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nombre'], name='producto_nombre_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_producto_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['precio', 'id_producto'], name='producto_precio_id_idx'),
+        ),
+    ]
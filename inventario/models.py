@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.db.models import CheckConstraint, Q
 from django.conf import settings 
@@ -19,6 +21,21 @@ class Categoria(models.Model):
     def __str__(self):
         return self.nombre
         
+class ProductoQuerySet(models.QuerySet):
+    def resumen(self, con_imagen=True):
+        """Light `values()` projection used by public listings and search."""
+        campos = ['id_producto', 'nombre', 'precio', 'stock_disponible', 'categoria_nombre']
+        queryset = self.annotate(categoria_nombre=models.F('categoria__nombre'))
+        if con_imagen:
+            primera_imagen = ProductoImagen.objects.filter(producto=models.OuterRef('pk')).order_by('orden', 'id_imagen')
+            queryset = queryset.annotate(
+                imagen_archivo=models.Subquery(primera_imagen.values('archivo')[:1]),
+                imagen_url=models.Subquery(primera_imagen.values('image')[:1]),
+            )
+            campos += ['imagen_archivo', 'imagen_url']
+        return queryset.values(*campos)
+
+
 class Producto(models.Model):
     id_producto = models.AutoField(primary_key=True)
     
@@ -38,6 +55,10 @@ class Producto(models.Model):
         default=0,
         help_text="Stock actual disponible en inventario"
     )
+    # Mantenido por trigger en la BD (nombre, descripcion y nombre de la categoria, config es_unaccent)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductoQuerySet.as_manager()
     
 
     class Meta:
@@ -48,6 +69,12 @@ class Producto(models.Model):
         constraints = [ #Restrccion el stock no puede ser negativo
             CheckConstraint(check=Q(stock_disponible__gte=0), name='stock_no_negativo')
         ]
+        indexes = [ #Paginacion por cursor sobre (nombre, id_producto) y (precio, id_producto)
+            models.Index(fields=['nombre', 'id_producto'], name='producto_nombre_id_idx'),
+            models.Index(fields=['precio', 'id_producto'], name='producto_precio_id_idx'),
+            GinIndex(fields=['search_vector'], name='producto_search_idx'),
+            GinIndex(fields=['nombre'], name='producto_nombre_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
         
     def __str__(self):
         return self.nombre
@@ -58,7 +85,9 @@ class ProductoImagen(models.Model):
 
     - `id_imagen`: PK (AutoField)
     - `producto`: FK a `Producto` (db_column `id_producto`)
-    - `image`: campo de texto que puede contener la URL, ruta o el contenido en texto/base64
+    - `image`: URL externa de la imagen (un data URL base64 antiguo solo queda hasta
+      `externalize_product_images --borrar-original`)
+    - `archivo`: clave del binario en el almacenamiento "productos" (direccionado por hash)
     - `orden`: entero opcional para ordenar imágenes del mismo producto
     """
 
@@ -70,6 +99,12 @@ class ProductoImagen(models.Model):
         related_name='imagenes',
     )
     image = models.TextField(blank=True, null=True, help_text='Ruta/URL o contenido de la imagen en formato texto')
+    archivo = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        help_text='Clave del archivo en el almacenamiento de imágenes (sha256)'
+    )
     orden = models.IntegerField(default=0)
 
     class Meta:
@@ -0,0 +1,156 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only keyset pagination over a composite, unique ordering.
+
+    Each page is fetched with `WHERE (a, b) > (last_a, last_b) ORDER BY a, b LIMIT n`
+    (expanded to OR/AND so it works on every backend), which an index on the
+    ordering columns answers without scanning the rows of earlier pages. Fields
+    prefixed with "-" sort descending and compare with `<`. The cursor is an
+    opaque base64 token holding the ordering values of the last row.
+
+    Pagination is opt-in: it only applies when the request carries `cursor` or
+    `page_size`, so clients that expect the plain list keep working.
+    """
+
+    ordering = ()
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size_setting = None
+    default_page_size = 24
+    max_page_size = 100
+    invalid_cursor_message = "Cursor inválido."
+
+    def get_page_size(self, request):
+        default = self.default_page_size
+        if self.page_size_setting:
+            default = getattr(settings, self.page_size_setting, default)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, queryset, view):
+        """Ordering of this request; must end in a unique field."""
+        return self.ordering
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.current_ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def parse_cursor(self, values, model):
+        """Convert the decoded cursor values with their ordering fields, rejecting tampered ones."""
+        parsed = []
+        for field, value in zip(self.current_ordering, values):
+            try:
+                value = model._meta.get_field(field.lstrip("-")).to_python(value)
+            except (DjangoValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            parsed.append(value)
+        return parsed
+
+    def after(self, values):
+        """Q for rows strictly after `values` in the current ordering."""
+        names = [field.lstrip("-") for field in self.current_ordering]
+        condition = Q()
+        for i, field in enumerate(self.current_ordering):
+            equal = dict(zip(names[:i], values[:i]))
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{names[i]}__{lookup}": values[i]})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.current_ordering = tuple(self.get_ordering(request, queryset, view))
+        queryset = queryset.order_by(*self.current_ordering)
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            values = self.parse_cursor(self.decode_cursor(token), queryset.model)
+            queryset = queryset.filter(self.after(values))
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        page = rows[: self.page_size]
+        self.last_values = [self._value(page[-1], f.lstrip("-")) for f in self.current_ordering] if page else None
+        return page
+
+    def _value(self, row, field):
+        return row[field] if isinstance(row, dict) else getattr(row, field)
+
+    def get_next_link(self):
+        if not self.has_next or self.last_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_values))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class ProductoPagination(KeysetPagination):
+    ordering = ("nombre", "id_producto")
+    page_size_setting = "PRODUCTO_PAGE_SIZE"
+    # ?ordering= del catálogo; cada orden tiene su índice (producto_nombre_id_idx / producto_precio_id_idx)
+    ordenes = {
+        "nombre": ("nombre", "id_producto"),
+        "precio": ("precio", "id_producto"),
+        "-precio": ("-precio", "-id_producto"),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        orden = (request.query_params.get("ordering") or "").strip()
+        if not orden:
+            return self.ordering
+        if orden not in self.ordenes:
+            raise ValidationError({"ordering": f"Debe ser uno de: {', '.join(self.ordenes)}."})
+        return self.ordenes[orden]
+
+
+class BusquedaPagination(PageNumberPagination):
+    """Ranked search results cannot be keyset-paginated, so search pages by number."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 50
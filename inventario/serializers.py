@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Producto, ProductoImagen, Categoria
+from . import derivatives, storage
 
 class CategoriaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,9 +8,36 @@ class CategoriaSerializer(serializers.ModelSerializer):
         fields = ["id_categoria", "nombre", "descripcion"]
 
 class ProductoImagenSerializer(serializers.ModelSerializer):
+    """Accepts a data URL, an external URL or a URL we already serve; always returns a URL."""
+
+    variantes = serializers.SerializerMethodField()
+
     class Meta:
         model = ProductoImagen
-        fields = ["id_imagen", "image", "orden"]
+        fields = ["id_imagen", "image", "orden", "variantes"]
+
+    def get_variantes(self, obj):
+        return derivatives.variant_urls(obj, self.context.get("request"))
+
+    def validate(self, attrs):
+        value = attrs.get("image")
+        if storage.is_data_url(value):
+            try:
+                attrs["archivo"] = storage.store_data_url(value)
+            except storage.InvalidImageData as exc:
+                raise serializers.ValidationError({"image": str(exc)})
+            attrs["image"] = None
+        else:
+            key = storage.key_from_value(value)
+            if key:
+                attrs["archivo"] = key
+                attrs["image"] = None
+        return attrs
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["image"] = storage.image_url(instance, self.context.get("request"))
+        return data
 
 
 class ProductoSerializer(serializers.ModelSerializer):
@@ -49,4 +77,32 @@ class ProductoSerializer(serializers.ModelSerializer):
             instance.imagenes.all().delete()
             for img in imagenes_data:
                 ProductoImagen.objects.create(producto=instance, **img)
-        return instance
\ No newline at end of file
+        return instance
+
+class ProductoResumenSerializer(serializers.Serializer):
+    """Read-only projection of a product for listings, built from `values()` rows.
+
+    Expects the keys produced by `Producto.objects.resumen()`. Pass `fields=[...]`
+    to emit only a subset of the projection.
+    """
+
+    id_producto = serializers.IntegerField()
+    nombre = serializers.CharField()
+    precio = serializers.IntegerField()
+    en_stock = serializers.SerializerMethodField()
+    categoria_nombre = serializers.CharField(allow_null=True)
+    imagen = serializers.SerializerMethodField()
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_en_stock(self, row):
+        return row["stock_disponible"] > 0
+
+    def get_imagen(self, row):
+        if not (row["imagen_archivo"] or row["imagen_url"]):
+            return None
+        return derivatives.variant_urls_for(row["imagen_archivo"], row["imagen_url"], self.context.get("request"))["thumb"]
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, derivatives, disponibilidad
+from .models import Categoria, Producto, ProductoImagen
+
+
+@receiver(post_save, sender=ProductoImagen)
+def generar_variantes(sender, instance, **kwargs):
+    """Build the thumb/card/detail variants once the image row is committed."""
+    if instance.archivo:
+        key = instance.archivo
+        transaction.on_commit(lambda: derivatives.schedule(key))
+
+
+@receiver([post_save, post_delete], sender=Producto)
+@receiver([post_save, post_delete], sender=ProductoImagen)
+@receiver([post_save, post_delete], sender=Categoria)
+def invalidar_catalogo(sender, **kwargs):
+    """Bump the catalog cache version after the write commits."""
+    transaction.on_commit(cache.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Producto)
+def invalidar_stock(sender, instance, **kwargs):
+    """Stock edited from the admin/API goes straight to the row, so drop its cached value too."""
+    disponibilidad.invalidar([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Producto)
+@receiver([post_save, post_delete], sender=ProductoImagen)
+def invalidar_producto(sender, instance, **kwargs):
+    """Name, stock or images changed: bump the version of that one product."""
+    cache.invalidar_productos([instance.pk if sender is Producto else instance.producto_id])
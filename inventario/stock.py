@@ -0,0 +1,92 @@
+"""Atomic stock movements for `Producto.stock_disponible`.
+
+Every change is a single conditional UPDATE (`SET stock = stock - n WHERE
+stock >= n`), so concurrent buyers can never oversell or lose updates and the
+`stock_no_negativo` constraint is never hit. Callers run the deltas inside
+their own `transaction.atomic()` together with the rest of the mutation
+(cart lines, reservas); a conflict raises `StockInsuficiente`, which rolls
+that transaction back.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import cache, disponibilidad
+from .models import Producto
+
+
+class StockInsuficiente(Exception):
+    """Raised when one or more deltas cannot be applied.
+
+    `conflictos` is a list of `{"producto_id", "solicitado", "disponible"}`
+    dicts (`disponible` is None when the product does not exist).
+    """
+
+    def __init__(self, conflictos):
+        super().__init__("Stock insuficiente")
+        self.conflictos = conflictos
+
+
+def _on_change(producto_ids):
+    # queryset.update() skips model signals, so invalidate the catalog and stock caches here
+    transaction.on_commit(cache.invalidate)
+    cache.invalidar_productos(producto_ids)
+    disponibilidad.invalidar(producto_ids)
+
+
+def aplicar(deltas):
+    """Apply `{producto_id: delta}` (negative takes stock, positive returns it).
+
+    Rows are updated in producto_id order so two transactions touching the
+    same products always lock them in the same order and cannot deadlock.
+    Must be called inside `transaction.atomic()`.
+    """
+    conflictos = []
+    cambiados = []
+    for producto_id in sorted(deltas):
+        delta = deltas[producto_id]
+        if not delta:
+            continue
+        filas = Producto.objects.filter(pk=producto_id)
+        if delta < 0:
+            filas = filas.filter(stock_disponible__gte=-delta)
+        if filas.update(stock_disponible=F("stock_disponible") + delta):
+            cambiados.append(producto_id)
+            continue
+        disponible = Producto.objects.filter(pk=producto_id).values_list("stock_disponible", flat=True).first()
+        conflictos.append({"producto_id": producto_id, "solicitado": -delta, "disponible": disponible})
+
+    if conflictos:
+        raise StockInsuficiente(conflictos)
+    if cambiados:
+        _on_change(cambiados)
+
+
+def reservar(producto_id, cantidad):
+    """Take `cantidad` units of a product; raises `StockInsuficiente`."""
+    aplicar({producto_id: -cantidad})
+
+
+def liberar(producto_id, cantidad):
+    """Return `cantidad` units of a product to stock."""
+    aplicar({producto_id: cantidad})
+
+
+def devolver(cantidades):
+    """Return stock for `{producto_id: cantidad}` in a single UPDATE.
+
+    Returning stock cannot conflict, so unlike `aplicar` there is no per-row
+    condition and all products are updated in one statement.
+    """
+    cantidades = {pk: n for pk, n in cantidades.items() if n}
+    if not cantidades:
+        return 0
+    incremento = Case(
+        *[When(pk=pk, then=Value(n)) for pk, n in cantidades.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    filas = Producto.objects.filter(pk__in=sorted(cantidades)).update(
+        stock_disponible=F("stock_disponible") + incremento
+    )
+    _on_change(list(cantidades))
+    return filas
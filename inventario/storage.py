@@ -0,0 +1,143 @@
+"""Content-addressed store for product image binaries.
+
+Images arrive from the admin frontend as base64 data URLs. Instead of keeping
+those bytes in `PRODUCTO_IMAGEN.image`, they are decoded and written once to
+the "productos" storage (see STORAGES in settings) under a key derived from
+their SHA-256, so identical uploads share a single file and the database only
+holds a short key.
+
+Stored files are served by `ImagenOriginalView` (`/api/inventario/imagen/original/<key>`)
+whenever the storage is the local file system, so they do not depend on
+DEBUG-only static serving; other backends (S3, ...) hand out their own URLs.
+The local default writes under MEDIA_ROOT, which must be a persistent disk
+in production: an ephemeral filesystem loses every image on redeploy.
+
+Only raster formats are accepted. SVG can carry scripts and would run them
+from the API origin, so it is rejected on upload and files stored before
+that are only served as downloads.
+"""
+import base64
+import binascii
+import hashlib
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.urls import reverse
+
+STORAGE_ALIAS = "productos"
+KEY_PREFIX = "productos"
+
+_DATA_URL_RE = re.compile(r"^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?P<params>(;[^,;]+)*?);base64,", re.IGNORECASE)
+_KEY_RE = re.compile(r"(?P<key>%s/[0-9a-f]{2}/(?P<sha>[0-9a-f]{64})\.[a-z0-9]+)$" % KEY_PREFIX)
+
+# formatos aceptados (mime -> extension); todo lo demas se rechaza
+_EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/avif": "avif",
+}
+_CONTENT_TYPES = {ext: mime for mime, ext in _EXTENSIONS.items()}
+_ALIAS = {"image/jpg": "image/jpeg"}
+
+
+class InvalidImageData(ValueError):
+    """Raised when a data URL cannot be decoded."""
+
+
+def get_storage():
+    return storages[STORAGE_ALIAS]
+
+
+def is_data_url(value) -> bool:
+    return isinstance(value, str) and bool(_DATA_URL_RE.match(value))
+
+
+def decode_data_url(value: str):
+    """Return `(bytes, mime)` for a base64 data URL."""
+    match = _DATA_URL_RE.match(value)
+    if not match:
+        raise InvalidImageData("No es un data URL base64.")
+    mime = (match.group("mime") or "application/octet-stream").lower()
+    mime = _ALIAS.get(mime, mime)
+    if mime not in _EXTENSIONS:
+        raise InvalidImageData("Formato de imagen no permitido.")
+    try:
+        data = base64.b64decode(value[match.end():], validate=False)
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidImageData("Contenido base64 inválido.") from exc
+    if not data:
+        raise InvalidImageData("La imagen está vacía.")
+    return data, mime
+
+
+def build_key(digest: str, mime: str) -> str:
+    return f"{KEY_PREFIX}/{digest[:2]}/{digest}.{_EXTENSIONS[mime]}"
+
+
+def content_type(key: str):
+    """`(content type, inline)` to serve `key` with; unknown or vector formats go out as downloads."""
+    mime = _CONTENT_TYPES.get(key.rsplit(".", 1)[-1])
+    return (mime, True) if mime else ("application/octet-stream", False)
+
+
+def store_bytes(data: bytes, mime: str) -> str:
+    """Write `data` once under its content hash and return the storage key."""
+    digest = hashlib.sha256(data).hexdigest()
+    key = build_key(digest, mime)
+    storage = get_storage()
+    if not storage.exists(key):
+        saved = storage.save(key, ContentFile(data))
+        if saved != key:
+            # another writer won the race and the storage renamed our copy
+            storage.delete(saved)
+    return key
+
+
+def store_data_url(value: str) -> str:
+    data, mime = decode_data_url(value)
+    return store_bytes(data, mime)
+
+
+def is_readable(key: str) -> bool:
+    """True when `key` can be read back from the storage and its content matches its hash."""
+    try:
+        with get_storage().open(key, "rb") as archivo:
+            digest = hashlib.sha256(archivo.read()).hexdigest()
+    except OSError:
+        return False
+    return digest == digest_from_key(key)
+
+
+def key_from_value(value):
+    """Return the storage key if `value` is a key or a URL previously served for one."""
+    if not isinstance(value, str):
+        return None
+    match = _KEY_RE.search(value.split("?", 1)[0])
+    return match.group("key") if match else None
+
+
+def digest_from_key(key):
+    match = _KEY_RE.search(key or "")
+    return match.group("sha") if match else None
+
+
+def url_for_key(key: str, request=None) -> str:
+    if isinstance(get_storage(), FileSystemStorage):
+        url = reverse("producto-imagen-original", kwargs={"key": key})
+    else:
+        url = get_storage().url(key)
+    if request is not None and url.startswith("/"):
+        return request.build_absolute_uri(url)
+    return url
+
+
+def image_url(imagen, request=None):
+    """Public URL for a `ProductoImagen`, whether stored or external."""
+    if imagen is None:
+        return None
+    if imagen.archivo:
+        return url_for_key(imagen.archivo, request)
+    return imagen.image
@@ -1,3 +1,440 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from usuarios.models import Usuario
+
+from . import cache, derivatives, disponibilidad, stock, storage
+from .models import Categoria, Producto, ProductoImagen
+
+# DummyCache: every request reaches the view, so the counts measure the real queries
+SIN_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def en_paralelo(funciones):
+    """Run `funciones` at the same time, one thread each, and return their results in order.
+
+    A barrier lines the threads up so their transactions really overlap; each
+    thread closes its own database connection when done.
+    """
+    barrera = threading.Barrier(len(funciones))
+
+    def correr(funcion):
+        try:
+            barrera.wait()
+            return funcion()
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(funciones)) as pool:
+        return list(pool.map(correr, funciones))
+
+
+def crear_productos(cantidad, categoria=None, inicio=0):
+    productos = Producto.objects.bulk_create([
+        Producto(nombre=f"Producto {inicio + i:04d}", precio=1000 + i, stock_disponible=10, categoria=categoria)
+        for i in range(cantidad)
+    ])
+    ProductoImagen.objects.bulk_create([
+        ProductoImagen(producto=producto, image=f"https://cdn.example.com/{producto.pk}.jpg")
+        for producto in productos
+    ])
+    return productos
+
+
+@override_settings(CACHES=SIN_CACHE)
+class ProductoListQueryCountTests(TestCase):
+    """The product list costs a fixed number of queries whatever the number of rows."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.categoria = Categoria.objects.create(nombre="General")
+
+    def test_list(self):
+        creados = 0
+        for filas in (1, 10, 100):
+            crear_productos(filas - creados, self.categoria, inicio=creados)
+            creados = filas
+            with self.subTest(filas=filas), self.assertNumQueries(2):
+                response = self.client.get("/api/inventario/producto/")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()), filas)
+
+    def test_list_paginado(self):
+        creados = 0
+        for filas in (1, 10, 100):
+            crear_productos(filas - creados, self.categoria, inicio=creados)
+            creados = filas
+            with self.subTest(filas=filas), self.assertNumQueries(2):
+                response = self.client.get("/api/inventario/producto/", {"page_size": 100})
+                self.assertEqual(len(response.json()["results"]), filas)
+
+    def test_list_resumen(self):
+        creados = 0
+        for filas in (1, 10, 100):
+            crear_productos(filas - creados, self.categoria, inicio=creados)
+            creados = filas
+            with self.subTest(filas=filas), self.assertNumQueries(1):
+                response = self.client.get("/api/inventario/producto/", {"fields": "resumen"})
+                self.assertEqual(len(response.json()), filas)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class StockConcurrenteTests(TransactionTestCase):
+    """Many buyers on one SKU: no overselling, and every loser gets the structured conflict."""
+
+    HILOS = 20
+    STOCK = 5
+
+    def setUp(self):
+        self.producto = Producto.objects.create(nombre="Drop", precio=1000, stock_disponible=self.STOCK)
+
+    def test_aplicar_no_vende_de_mas(self):
+        def comprar():
+            try:
+                with transaction.atomic():
+                    stock.reservar(self.producto.pk, 1)
+                return None
+            except stock.StockInsuficiente as exc:
+                return exc.conflictos
+
+        resultados = en_paralelo([comprar] * self.HILOS)
+
+        ganadores = [r for r in resultados if r is None]
+        self.assertEqual(len(ganadores), self.STOCK)
+        for conflictos in resultados:
+            if conflictos is not None:
+                self.assertEqual(conflictos, [{"producto_id": self.producto.pk, "solicitado": 1, "disponible": 0}])
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock_disponible, 0)
+
+    def test_carrito_responde_conflicto_estructurado(self):
+        clientes = []
+        for i in range(self.HILOS):
+            usuario = Usuario.objects.create_user(
+                f"comprador{i}@example.com", "clave-segura-123", nombre="N", apellido_paterno="A",
+                rut=f"{20_000_000 + i}-1", telefono="912345678",
+            )
+            cliente = APIClient()
+            cliente.force_authenticate(usuario)
+            clientes.append(cliente)
+
+        def comprar(cliente):
+            return lambda: cliente.post(
+                "/api/ventas/carrito/", {"producto_id": self.producto.pk, "cantidad": 1}, format="json"
+            )
+
+        respuestas = en_paralelo([comprar(cliente) for cliente in clientes])
+
+        ok = [r for r in respuestas if r.status_code == 200]
+        rechazadas = [r for r in respuestas if r.status_code != 200]
+        self.assertEqual(len(ok), self.STOCK)
+        for respuesta in rechazadas:
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertEqual(respuesta.json()["detail"], "Stock insuficiente")
+            conflicto, = respuesta.json()["conflictos"]
+            self.assertEqual(conflicto["producto_id"], self.producto.pk)
+            self.assertEqual(conflicto["solicitado"], 1)
+            self.assertGreaterEqual(conflicto["disponible"], 0)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock_disponible, 0)
+
+
+def png_data_url(color="red"):
+    from PIL import Image
+
+    salida = io.BytesIO()
+    Image.new("RGB", (4, 4), color).save(salida, "PNG")
+    return "data:image/png;base64," + base64.b64encode(salida.getvalue()).decode()
+
+
+class AlmacenamientoTemporalMixin:
+    """Point the "productos" storage at a per-test temporary directory."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+                storage.STORAGE_ALIAS: {
+                    "BACKEND": "django.core.files.storage.FileSystemStorage",
+                    "OPTIONS": {"location": directorio.name},
+                },
+            },
+            IMAGE_DERIVATIVES_ROOT=directorio.name + "/derivados",
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+
+@override_settings(CACHES=SIN_CACHE)
+class ImagenOriginalTests(AlmacenamientoTemporalMixin, TestCase):
+    def test_sirve_el_archivo_guardado(self):
+        key = storage.store_data_url(png_data_url())
+        url = storage.url_for_key(key)
+        self.assertTrue(url.endswith(f"/imagen/original/{key}"))
+
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["X-Content-Type-Options"], "nosniff")
+        self.assertIn("sandbox", response["Content-Security-Policy"])
+        self.assertNotIn("attachment", response.get("Content-Disposition", ""))
+
+    def test_clave_inexistente(self):
+        response = APIClient().get(f"/api/inventario/imagen/original/productos/ab/{'ab' * 32}.png")
+        self.assertEqual(response.status_code, 404)
+
+    def test_svg_rechazado(self):
+        svg = "data:image/svg+xml;base64," + base64.b64encode(b"<svg onload='alert(1)'/>").decode()
+        with self.assertRaises(storage.InvalidImageData):
+            storage.store_data_url(svg)
+
+    def test_svg_antiguo_se_descarga(self):
+        digest = "cd" * 32
+        key = f"productos/cd/{digest}.svg"
+        storage.get_storage().save(key, io.BytesIO(b"<svg/>"))
+        response = APIClient().get(f"/api/inventario/imagen/original/{key}")
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        self.assertIn("attachment", response["Content-Disposition"])
+
+
+@override_settings(CACHES=SIN_CACHE, IMAGE_DERIVATIVES_EVICT_INTERVAL=60)
+class ImagenVarianteTests(AlmacenamientoTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        derivatives._last_evict = float("-inf")
+        self.executor = mock.Mock()
+        for parche in (
+            mock.patch.object(derivatives, "_get_executor", return_value=self.executor),
+            mock.patch.object(derivatives, "evict"),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def test_evict_fuera_de_la_peticion(self):
+        key = storage.store_data_url(png_data_url())
+        for size in ("thumb", "card"):
+            response = APIClient().get(f"/api/inventario/imagen/{size}/{key}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], derivatives.CONTENT_TYPE)
+            response.close()
+
+        derivatives.evict.assert_not_called()
+        # two misses within the interval: a single pass queued on the pool
+        self.executor.submit.assert_called_once_with(derivatives.evict)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ext"}})
+class ExternalizarImagenesTests(AlmacenamientoTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.producto = Producto.objects.create(nombre="Con imagen", precio=1000, stock_disponible=1)
+        self.imagen = ProductoImagen.objects.create(producto=self.producto, image=png_data_url())
+
+    def _externalizar(self, *args):
+        with mock.patch.object(derivatives, "schedule") as schedule, \
+                mock.patch.object(cache, "invalidate") as invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command("externalize_product_images", *args, stdout=io.StringIO(), stderr=io.StringIO())
+        self.imagen.refresh_from_db()
+        return schedule, invalidate
+
+    def test_conserva_el_original_por_defecto(self):
+        schedule, invalidate = self._externalizar()
+        self.assertTrue(storage.is_readable(self.imagen.archivo))
+        self.assertTrue(self.imagen.image.startswith("data:image/png"))
+        schedule.assert_called_once_with(self.imagen.archivo)
+        invalidate.assert_called_once_with()
+        self.assertIn(self.producto.pk, cache.versiones_productos([self.producto.pk]))
+
+    def test_borrar_original(self):
+        self._externalizar()
+        self._externalizar("--borrar-original")
+        self.assertIsNone(self.imagen.image)
+        self.assertTrue(storage.is_readable(self.imagen.archivo))
+
+    def test_no_borra_si_el_archivo_no_se_lee(self):
+        with mock.patch.object(storage, "is_readable", return_value=False):
+            self._externalizar("--borrar-original")
+        self.assertIsNone(self.imagen.archivo)
+        self.assertTrue(self.imagen.image.startswith("data:image/png"))
+
+
+def cursor(valores):
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip("=")
+
+
+@override_settings(CACHES=SIN_CACHE)
+class CursorTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        crear_productos(3)
+
+    def test_siguiente_pagina(self):
+        primera = self.client.get("/api/inventario/producto/", {"page_size": 2}).json()
+        segunda = self.client.get(primera["next"]).json()
+        self.assertEqual([p["nombre"] for p in segunda["results"]], ["Producto 0002"])
+        self.assertIsNone(segunda["next"])
+
+    def test_cursor_manipulado(self):
+        for valores in (["a", "zz"], ["a", None], ["a", [1]], {"a": 1}, ["a"]):
+            with self.subTest(valores=valores):
+                response = self.client.get("/api/inventario/producto/", {"cursor": cursor(valores)})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()["detail"], "Cursor inválido.")
+
+    def test_cursor_manipulado_por_precio(self):
+        response = self.client.get("/api/inventario/producto/", {"ordering": "precio", "cursor": cursor(["x", 1])})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_no_base64(self):
+        response = self.client.get("/api/inventario/producto/", {"cursor": "%%%"})
+        self.assertEqual(response.status_code, 404)
+
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "inventario-tests"}}
+
+
+@override_settings(CACHES=LOCMEM, CATALOGO_CACHE_TIMEOUT=300)
+class CatalogoCacheTests(TestCase):
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = APIClient()
+        self.producto, = crear_productos(1)
+
+    def _stock_listado(self):
+        return self.client.get("/api/inventario/producto/").json()[0]["stock_disponible"]
+
+    def test_etag_y_304(self):
+        primera = self.client.get("/api/inventario/producto/")
+        self.assertEqual(primera.status_code, 200)
+        with self.assertNumQueries(0):
+            segunda = self.client.get("/api/inventario/producto/", HTTP_IF_NONE_MATCH=primera["ETag"])
+        self.assertEqual(segunda.status_code, 304)
+        self.assertEqual(segunda["ETag"], primera["ETag"])
+        desde = self.client.get("/api/inventario/producto/", HTTP_IF_MODIFIED_SINCE=primera["Last-Modified"])
+        self.assertEqual(desde.status_code, 304)
+
+    def test_guardar_producto_invalida(self):
+        primera = self.client.get("/api/inventario/producto/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.producto.nombre = "Renombrado"
+            self.producto.save()
+        segunda = self.client.get("/api/inventario/producto/", HTTP_IF_NONE_MATCH=primera["ETag"])
+        self.assertEqual(segunda.status_code, 200)
+        self.assertEqual(segunda.json()[0]["nombre"], "Renombrado")
+
+    def test_cambio_de_stock_invalida(self):
+        self.assertEqual(self._stock_listado(), 10)
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            stock.aplicar({self.producto.pk: -4})
+        self.assertEqual(self._stock_listado(), 6)
+
+    @override_settings(CATALOGO_CACHE_TIMEOUT=None)
+    def test_desactivado_con_cache_local(self):
+        self.assertEqual(cache.timeout(), 0)
+        self.client.get("/api/inventario/producto/")
+        with self.assertNumQueries(2):
+            self.client.get("/api/inventario/producto/")
+
+    def test_activo_con_cache_compartida(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directorio}},
+            CATALOGO_CACHE_TIMEOUT=None,
+        ):
+            self.assertEqual(cache.timeout(), 300)
+
+
+@override_settings(CACHES=LOCMEM, STOCK_CACHE_TIMEOUT=60)
+class StockEndpointTests(TestCase):
+    URL = "/api/inventario/producto/stock/"
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.client = APIClient()
+        self.a, self.b = crear_productos(2)
+
+    def test_lee_una_vez_y_cachea(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.URL, {"ids": f"{self.b.pk},{self.a.pk},999999,{self.b.pk}"})
+        self.assertEqual(response.status_code, 200)
+        # request order, duplicates and unknown ids dropped
+        self.assertEqual(response.json(), [
+            {"id_producto": self.b.pk, "stock_disponible": 10},
+            {"id_producto": self.a.pk, "stock_disponible": 10},
+        ])
+        with self.assertNumQueries(0):
+            self.client.get(self.URL, {"ids": f"{self.a.pk},999999"})
+
+    def test_cambio_de_stock_invalida(self):
+        self.client.get(self.URL, {"ids": f"{self.a.pk},{self.b.pk}"})
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            stock.aplicar({self.a.pk: -3})
+        with self.assertNumQueries(1):
+            response = self.client.get(self.URL, {"ids": f"{self.a.pk},{self.b.pk}"})
+        self.assertEqual([fila["stock_disponible"] for fila in response.json()], [7, 10])
+
+    def test_ids_invalidos(self):
+        for ids in ("", "1,x", ",".join(str(i) for i in range(1, disponibilidad.MAX_IDS + 2))):
+            with self.subTest(ids=ids[:20]):
+                self.assertEqual(self.client.get(self.URL, {"ids": ids}).status_code, 400)
+
+
+@override_settings(CACHES=SIN_CACHE)
+class FacetasTests(TestCase):
+    URL = "/api/inventario/producto/facets/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.a = Categoria.objects.create(nombre="A")
+        self.b = Categoria.objects.create(nombre="B")
+        Producto.objects.bulk_create([
+            Producto(nombre="a1", precio=5000, stock_disponible=10, categoria=self.a),
+            Producto(nombre="a2", precio=30000, stock_disponible=0, categoria=self.a),
+            Producto(nombre="b1", precio=12000, stock_disponible=10, categoria=self.b),
+            Producto(nombre="sin", precio=150000, stock_disponible=10),
+        ])
+
+    def _facetas(self, **params):
+        response = self.client.get(self.URL, params)
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        categorias = {c["nombre"]: c["count"] for c in datos["categorias"]}
+        return datos["total"], categorias, [p["count"] for p in datos["precios"]], datos["en_stock"]
+
+    def test_categoria_no_se_cuenta_a_si_misma(self):
+        total, categorias, precios, en_stock = self._facetas(categoria=self.a.pk)
+        self.assertEqual(total, 2)
+        # other categories keep their counts so the shopper can widen the selection
+        self.assertEqual(categorias, {"A": 2, "B": 1, None: 1})
+        self.assertEqual(precios, [1, 0, 1, 0, 0])
+        self.assertEqual(en_stock, 1)
+
+    def test_filtros_combinados(self):
+        total, categorias, precios, en_stock = self._facetas(
+            categoria=f"{self.a.pk},{self.b.pk}", precio_max=20000, en_stock="true"
+        )
+        self.assertEqual(total, 2)
+        self.assertEqual(categorias, {"A": 1, "B": 1})
+        self.assertEqual(precios, [1, 1, 0, 0, 0])
+        self.assertEqual(en_stock, 2)
+
+    def test_una_sola_consulta(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.URL, {"categoria": self.a.pk, "precio_min": 1000})
+
+    def test_parametro_invalido(self):
+        self.assertEqual(self.client.get(self.URL, {"precio_min": "barato"}).status_code, 400)
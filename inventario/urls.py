@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductoViewSet, CategoriaViewSet # Importa la nueva vista
+from .views import ProductoViewSet, CategoriaViewSet, ImagenOriginalView, ImagenVarianteView
 
 router = DefaultRouter()
 router.register(r'producto', ProductoViewSet, basename='producto')
@@ -8,4 +8,6 @@ router.register(r'categoria', CategoriaViewSet, basename='categoria')
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('imagen/original/<path:key>', ImagenOriginalView.as_view(), name='producto-imagen-original'),
+    path('imagen/<str:size>/<path:key>', ImagenVarianteView.as_view(), name='producto-imagen-variante'),
 ]
\ No newline at end of file
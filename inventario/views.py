@@ -1,9 +1,18 @@
 from rest_framework import permissions, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
 from django.db.models.deletion import ProtectedError
+from django.http import FileResponse, Http404, HttpResponseRedirect
 
+from . import derivatives, disponibilidad, facets, storage
+from .cache import cached_response
 from .models import Categoria, Producto
-from .serializers import CategoriaSerializer, ProductoSerializer
+from .pagination import BusquedaPagination, ProductoPagination
+from .serializers import CategoriaSerializer, ProductoResumenSerializer, ProductoSerializer
 
 
 class IsStaffOrSuper(permissions.BasePermission):
@@ -20,17 +29,73 @@ class IsStaffOrSuper(permissions.BasePermission):
 class ProductoViewSet(viewsets.ModelViewSet):
     queryset = Producto.objects.all()
     serializer_class = ProductoSerializer
+    pagination_class = ProductoPagination
 
     def get_queryset(self):
-        queryset = Producto.objects.all()
-        destacado = self.request.query_params.get('destacado')
-        
-        if destacado is not None:
-            # Si en la URL viene ?destacado=true, filtramos
-            if destacado.lower() == 'true':
-                queryset = queryset.filter(destacado=True)
-        
-        return queryset
+        queryset = Producto.objects.select_related('categoria').prefetch_related('imagenes')
+        return self._filtrar(queryset)
+
+    def _filtrar(self, queryset):
+        # ?categoria=1,2&precio_min=&precio_max=&en_stock=true&destacado=true
+        filtros = facets.parse_filtros(self.request.query_params)
+        return facets.aplicar_filtros(queryset, filtros)
+
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        # ?fields=resumen (or a subset such as ?fields=id_producto,nombre,precio) returns the
+        # light values() projection instead of full ModelSerializer rows
+        fields = request.query_params.get("fields")
+        if not fields:
+            return super().list(request, *args, **kwargs)
+
+        disponibles = list(ProductoResumenSerializer().fields)
+        seleccion = disponibles if fields == "resumen" else [f.strip() for f in fields.split(",") if f.strip()]
+        invalidos = sorted(set(seleccion) - set(disponibles))
+        if invalidos:
+            raise ValidationError({"fields": f"Campos no disponibles: {', '.join(invalidos)}."})
+
+        queryset = self._filtrar(Producto.objects.resumen(con_imagen="imagen" in seleccion))
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        serializer = ProductoResumenSerializer(
+            rows, many=True, context=self.get_serializer_context(), fields=seleccion
+        )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    @cached_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    @cached_response
+    def facets(self, request):
+        """Facet counts (categories, price ranges, in stock) for the current filters."""
+        filtros = facets.parse_filtros(request.query_params)
+        return Response(facets.calcular_facetas(Producto.objects.all(), filtros))
+
+    @action(detail=False, methods=["get"])
+    def stock(self, request):
+        """Current `stock_disponible` of `?ids=1,2,3` from the short-TTL stock cache."""
+        ids = []
+        for parte in (request.query_params.get("ids") or "").split(","):
+            parte = parte.strip()
+            if not parte:
+                continue
+            if not parte.isdigit():
+                raise ValidationError({"ids": "Debe ser una lista de ids separados por coma."})
+            ids.append(int(parte))
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValidationError({"ids": "Indica al menos un id."})
+        if len(ids) > disponibilidad.MAX_IDS:
+            raise ValidationError({"ids": f"Máximo {disponibilidad.MAX_IDS} ids por consulta."})
+
+        stock = disponibilidad.leer(ids)
+        return Response([
+            {"id_producto": pk, "stock_disponible": stock[pk]} for pk in ids if pk in stock
+        ])
 
     def get_permissions(self):
         if self.action in ("create", "update", "partial_update", "destroy"):
@@ -39,6 +104,29 @@ class ProductoViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.AllowAny]
         return [perm() for perm in permission_classes]
 
+    @action(detail=False, methods=["get"], pagination_class=BusquedaPagination)
+    @cached_response
+    def search(self, request):
+        """Ranked full-text search (`?q=`) with trigram fallback for typos."""
+        termino = (request.query_params.get("q") or "").strip()[:100]
+        if len(termino) < 2:
+            return Response({"count": 0, "next": None, "previous": None, "results": []})
+
+        consulta = SearchQuery(termino, config="es_unaccent", search_type="websearch")
+        queryset = (
+            Producto.objects.annotate(
+                rank=SearchRank(F("search_vector"), consulta),
+                similitud=TrigramWordSimilarity(termino, "nombre"),
+            )
+            .filter(Q(search_vector=consulta) | Q(nombre__trigram_word_similar=termino))
+            .order_by("-rank", "-similitud", "id_producto")
+            .resumen()
+        )
+
+        page = self.paginate_queryset(queryset)
+        serializer = ProductoResumenSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         try:
@@ -58,9 +146,71 @@ class CategoriaViewSet(viewsets.ModelViewSet):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
 
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cached_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_permissions(self):
         if self.action in ("create", "update", "partial_update", "destroy"):
             permission_classes = [permissions.IsAuthenticated, IsStaffOrSuper]
         else:
             permission_classes = [permissions.AllowAny]
-        return [perm() for perm in permission_classes]
\ No newline at end of file
+        return [perm() for perm in permission_classes]
+
+
+class ImagenOriginalView(APIView):
+    """Serve a stored product image from the "productos" storage (DEBUG on or off)."""
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request, key):
+        if storage.key_from_value(key) != key:
+            raise Http404
+        try:
+            archivo = storage.get_storage().open(key, "rb")
+        except FileNotFoundError:
+            raise Http404
+        content_type, inline = storage.content_type(key)
+        response = FileResponse(archivo, content_type=content_type, as_attachment=not inline)
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        # served from the API origin: never let a stored file run as a document
+        response["X-Content-Type-Options"] = "nosniff"
+        response["Content-Security-Policy"] = "default-src 'none'; sandbox"
+        return response
+
+
+class ImagenVarianteView(APIView):
+    """Serve a resized product image from the derivative cache, building it on a miss."""
+
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request, size, key):
+        if size not in derivatives.SIZES or storage.key_from_value(key) != key:
+            raise Http404
+        if not derivatives.is_resizable(key):
+            return HttpResponseRedirect(storage.url_for_key(key, request))
+
+        path = derivatives.derivative_path(key, size)
+        if path.exists():
+            derivatives.touch(path)
+        else:
+            try:
+                path = derivatives.render(key, size)
+            except FileNotFoundError:
+                raise Http404
+            except Exception:
+                # undecodable source: hand out the original instead of failing the page
+                return HttpResponseRedirect(storage.url_for_key(key, request))
+            # the full-cache walk runs on the worker pool, not in this request
+            derivatives.schedule_evict()
+
+        response = FileResponse(open(path, "rb"), content_type=derivatives.CONTENT_TYPE)
+        # keys are content hashes, so a given URL never changes
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
@@ -0,0 +1,18 @@
+#!/usr/bin/env bash
+# Comando de inicio del backend (Render: "bash start.sh").
+# Levanta los procesos de fondo junto a gunicorn: sin send_outbox no sale ningún correo
+# (confirmaciones, cambios de estado, recuperación de contraseña) y sin run_scheduler
+# no se liberan carritos ni reservas vencidas. Si un proceso termina, se vuelve a iniciar.
+
+en_bucle() {
+  while true; do
+    "$@"
+    echo "$* terminó con código $?; reiniciando en 5 s" >&2
+    sleep 5
+  done
+}
+
+en_bucle python manage.py send_outbox &
+en_bucle python manage.py run_scheduler &
+
+exec gunicorn backend.wsgi:application --bind "0.0.0.0:${PORT:-8000}"
@@ -8,7 +8,6 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate, login
 from django.utils import timezone
 from django.conf import settings
-from django.core.mail import send_mail
 from datetime import timedelta
 import secrets
 import logging
@@ -16,7 +15,7 @@ import logging
 logger = logging.getLogger(__name__)
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
 from .serializers import (
     RegisterSerializer,
@@ -26,6 +25,7 @@ from .serializers import (
     get_tokens_for_user,
 )
 from .models import PasswordResetToken
+from core import outbox
 
 User = get_user_model()
 
@@ -129,7 +129,6 @@ class PasswordResetRequestView(APIView):
 
         token = secrets.token_urlsafe(32)
         expires_at = timezone.now() + timedelta(minutes=30)
-        PasswordResetToken.objects.create(usuario=user, token=token, expires_at=expires_at)
 
         frontend_base = getattr(settings, "FRONTEND_URL", "http://localhost:3000")
         reset_link = f"{frontend_base.rstrip('/')}/reset-password?token={token}"
@@ -141,13 +140,11 @@ class PasswordResetRequestView(APIView):
             "Si no solicitaste este cambio, ignora este mensaje."
         )
 
-        send_mail(
-            subject,
-            message,
-            getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@tsi-ecommerce.local'),
-            [user.correo],
-            fail_silently=True,
-        )
+        # The email is queued with the token; send_outbox delivers it
+        with transaction.atomic():
+            PasswordResetToken.objects.create(usuario=user, token=token, expires_at=expires_at)
+            # sensible: the link is blanked from CORREO_SALIENTE once sent
+            outbox.encolar(subject, message, [user.correo], sensible=True)
 
         return Response({"detail": "Si el correo existe, enviaremos instrucciones"}, status=status.HTTP_200_OK)
 
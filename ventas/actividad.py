@@ -0,0 +1,140 @@
+"""Write-behind buffer for `Reserva.ultima_actividad`.
+
+Viewing a cart only has to keep it alive, so instead of an UPDATE per page
+view `tocar()` records the timestamp in a per-process buffer. A daemon
+thread writes the buffer every `ACTIVIDAD_FLUSH_INTERVAL` seconds (and once
+more at exit) with a single statement for all carts:
+
+    UPDATE "RESERVA" AS r SET ultima_actividad = v.ts
+    FROM (VALUES (%s, %s), ...) AS v(id, ts)
+    WHERE r.id_reserva = v.id AND r.estado = 'CARRO' AND r.ultima_actividad < v.ts
+
+The guard keeps a late flush from moving a timestamp backwards or touching a
+cart that was checked out or deleted meanwhile. Readers stay correct by
+taking the newer of the two values: `vigente()` inside this process, and the
+expiry sweep (another process) by flushing its own buffer and allowing
+`retraso_maximo()` extra idle time for touches still buffered elsewhere.
+Cart writes (post/put/delete/lines) keep writing ultima_actividad in their own
+UPDATE; only the read path goes through the buffer.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Reserva
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = {}
+_hilo = None
+
+# filas por sentencia en cada flush
+LOTE = 1000
+
+
+def intervalo():
+    return getattr(settings, "ACTIVIDAD_FLUSH_INTERVAL", 10)
+
+
+def retraso_maximo():
+    """How long a touch can stay buffered in some process before it reaches the database."""
+    return timedelta(seconds=2 * intervalo())
+
+
+def tocar(reserva_id, cuando=None):
+    """Record activity on cart `reserva_id`; it is written by the next flush."""
+    cuando = cuando or timezone.now()
+    with _lock:
+        anterior = _buffer.get(reserva_id)
+        if anterior is None or cuando > anterior:
+            _buffer[reserva_id] = cuando
+    _iniciar()
+
+
+def pendiente(reserva_id):
+    """Buffered (not yet written) activity of `reserva_id`, or None."""
+    with _lock:
+        return _buffer.get(reserva_id)
+
+
+def vigente(reserva_id, persistida):
+    """Newer of the persisted `ultima_actividad` and the buffered touch."""
+    buffered = pendiente(reserva_id)
+    if buffered is None or (persistida is not None and persistida >= buffered):
+        return persistida
+    return buffered
+
+
+def _escribir(filas):
+    tabla = connection.ops.quote_name(Reserva._meta.db_table)
+    id_col = connection.ops.quote_name(Reserva._meta.pk.column)
+    columna = connection.ops.quote_name(Reserva._meta.get_field("ultima_actividad").column)
+    estado = connection.ops.quote_name(Reserva._meta.get_field("estado").column)
+    if connection.vendor == "postgresql":
+        valores = ", ".join(["(%s, %s::timestamptz)"] * len(filas))
+        sql = (
+            f"UPDATE {tabla} AS r SET {columna} = v.ts FROM (VALUES {valores}) AS v(id, ts) "
+            f"WHERE r.{id_col} = v.id AND r.{estado} = %s AND r.{columna} < v.ts"
+        )
+        params = [valor for fila in filas for valor in fila] + ["CARRO"]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+    # other backends (SQLite in development): same single statement expressed with CASE
+    nuevo = Case(
+        *[When(pk=pk, then=Value(ts)) for pk, ts in filas],
+        output_field=DateTimeField(),
+    )
+    return Reserva.objects.filter(pk__in=[pk for pk, _ in filas], estado="CARRO").update(
+        ultima_actividad=Greatest(F("ultima_actividad"), nuevo)
+    )
+
+
+def flush():
+    """Write every buffered touch; returns how many carts were updated."""
+    with _lock:
+        pendientes = dict(_buffer)
+    if not pendientes:
+        return 0
+    filas = sorted(pendientes.items())
+    escritas = 0
+    try:
+        for i in range(0, len(filas), LOTE):
+            escritas += _escribir(filas[i:i + LOTE])
+    except Exception:
+        # the touches stay buffered and are retried by the next flush
+        logger.exception("No se pudo escribir ultima_actividad")
+        return escritas
+    # forget what was written only now, so vigente() never misses a touch mid-flush
+    with _lock:
+        for reserva_id, cuando in filas:
+            if _buffer.get(reserva_id) == cuando:
+                del _buffer[reserva_id]
+    return escritas
+
+
+def _bucle():
+    while True:
+        time.sleep(intervalo())
+        close_old_connections()
+        flush()
+
+
+def _iniciar():
+    global _hilo
+    if _hilo is not None:
+        return
+    with _lock:
+        if _hilo is None:
+            _hilo = threading.Thread(target=_bucle, name="ventas-actividad", daemon=True)
+            _hilo.start()
+            atexit.register(flush)
@@ -0,0 +1,107 @@
+"""Per-user snapshot of the serialized cart (`GET /api/ventas/carrito/`).
+
+The header drawer polls the cart on every page, so the rendered cart is kept
+in the Django cache under a key made of:
+
+* the user's cart version, bumped (after commit) by every cart mutation:
+  `CarritoView` writes, checkout, the expiry sweeps and any model save of the
+  cart, its lines or the customer (`signals.py`);
+* the host, because image URLs are absolute.
+
+Bumping a version orphans the old snapshot instead of deleting it. Name,
+image and stock of the products in the cart change without a cart mutation,
+so the snapshot also records the ids of its products and the time it was
+read from the database; `leer()` discards it when one of those products
+(`inventario.cache.versiones_productos`) was written after that read. Writes
+to other products, and stock deltas of other carts, leave it valid.
+
+Invalidations only reach the snapshots of other workers through a shared
+backend (CACHE_URL=redis://...), so with a per-process backend (the
+local-memory default) the snapshot is off unless CARRITO_CACHE_TIMEOUT is set.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from inventario import cache as catalogo
+
+get_cache = catalogo.get_cache
+
+
+def _version_key(usuario_id):
+    return f"ventas:carrito:{usuario_id}:version"
+
+
+# a product version this close before the read still discards the snapshot: clocks of two hosts may differ
+MARGEN_RELOJ_NS = 1_000_000_000
+
+
+def timeout():
+    """Snapshot TTL in seconds; 0 disables the snapshot."""
+    valor = getattr(settings, "CARRITO_CACHE_TIMEOUT", None)
+    if valor is None:
+        return 300 if catalogo.compartida() else 0
+    return valor
+
+
+def version(usuario_id):
+    cache = get_cache()
+    key = _version_key(usuario_id)
+    valor = cache.get(key)
+    if valor is None:
+        # add() so concurrent first readers agree on a single value
+        cache.add(key, time.time_ns(), None)
+        valor = cache.get(key)
+    return valor
+
+
+def _bump(usuario_ids):
+    valor = time.time_ns()
+    get_cache().set_many({_version_key(pk): valor for pk in usuario_ids}, None)
+
+
+def invalidar(*usuario_ids):
+    """Drop the cart snapshots of `usuario_ids` once the current transaction commits."""
+    ids = {pk for pk in usuario_ids if pk is not None}
+    if ids:
+        transaction.on_commit(lambda: _bump(ids))
+
+
+def snapshot_key(request):
+    """Cache key of the requesting user's snapshot, or None when the snapshot is disabled."""
+    if not timeout():
+        return None
+    usuario_id = request.user.pk
+    host = hashlib.sha1(request.get_host().encode()).hexdigest()[:12]
+    return f"ventas:carrito:{usuario_id}:{version(usuario_id)}:{host}"
+
+
+def leer(key):
+    """Snapshot stored under `key`, or None when missing or stale.
+
+    A snapshot is `{"data", "id_reserva", "ultima_actividad", "productos",
+    "leido"}`: `productos` are the ids of its products and `leido` the
+    `time.time_ns()` taken before reading the cart from the database.
+    """
+    if key is None:
+        return None
+    entry = get_cache().get(key)
+    if entry is None:
+        return None
+    versiones = catalogo.versiones_productos(entry["productos"])
+    limite = entry["leido"] - MARGEN_RELOJ_NS
+    if len(versiones) < len(entry["productos"]) or any(v >= limite for v in versiones.values()):
+        # a product was written after the read (or its version was evicted)
+        return None
+    return entry
+
+
+def guardar(key, entry):
+    """Store the snapshot `entry` (see `leer`) under `key`; returns it."""
+    if key is not None:
+        # products never written yet get a version older than the read, so this snapshot stays valid
+        catalogo.iniciar_versiones(entry["productos"], entry["leido"] - MARGEN_RELOJ_NS - 1)
+        get_cache().set(key, entry, timeout())
+    return entry
@@ -0,0 +1,85 @@
+"""Batch edits of a cart's lines (`PATCH /api/ventas/carrito/lines/`).
+
+`aplicar_lineas()` sets the final quantity of many products at once, inside
+one transaction, with a fixed number of statements whatever the
+number of lines: lock the cart's affected lines, lock the products in pk
+order (the same order `stock.aplicar` updates them, so concurrent batches
+cannot deadlock), apply the stock deltas, one upsert for new and changed
+lines and one DELETE for removed ones (each refreshes the cart totals, see
+`DetalleReservaQuerySet`) and one UPDATE of the cart's activity.
+"""
+from django.db import transaction
+
+from inventario import stock
+from inventario.models import Producto
+
+from . import cache, reservas
+from .models import DetalleReserva
+
+
+class ProductosNoEncontrados(Exception):
+    """Raised when lines refer to products that do not exist; `ids` lists them."""
+
+    def __init__(self, ids):
+        super().__init__("Producto no encontrado")
+        self.ids = ids
+
+
+@transaction.atomic
+def aplicar_lineas(reserva, cantidades):
+    """Set `{producto_id: cantidad}` on the cart `reserva`; a cantidad of 0 removes the line.
+
+    Returns how many lines changed. Raises `ProductosNoEncontrados` or
+    `stock.StockInsuficiente`, and then nothing is applied.
+    """
+    ids = sorted(cantidades)
+    actuales = {
+        detalle.producto_id: detalle
+        for detalle in DetalleReserva.objects.select_for_update()
+        .filter(reserva=reserva, producto_id__in=ids)
+        .order_by("pk")
+    }
+    precios = dict(
+        Producto.objects.select_for_update()
+        .filter(pk__in=ids)
+        .order_by("pk")
+        .values_list("pk", "precio")
+    )
+    faltantes = [pk for pk in ids if pk not in precios and cantidades[pk] > 0]
+    if faltantes:
+        raise ProductosNoEncontrados(faltantes)
+
+    deltas = {}
+    upserts = []
+    eliminar = []
+    for producto_id in ids:
+        cantidad = cantidades[producto_id]
+        detalle = actuales.get(producto_id)
+        anterior = detalle.cantidad if detalle else 0
+        if cantidad == anterior:
+            continue
+        deltas[producto_id] = anterior - cantidad
+        if cantidad == 0:
+            eliminar.append(detalle.pk)
+        else:
+            # existing lines keep the price they were added at; only cantidad is updated
+            upserts.append(DetalleReserva(
+                reserva=reserva,
+                producto_id=producto_id,
+                cantidad=cantidad,
+                precio_unitario=detalle.precio_unitario if detalle else precios[producto_id],
+            ))
+
+    stock.aplicar(deltas)
+    if upserts:
+        DetalleReserva.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=["reserva", "producto"],
+            update_fields=["cantidad"],
+        )
+    if eliminar:
+        DetalleReserva.objects.filter(pk__in=eliminar).delete()
+    reservas.registrar_actividad([reserva.pk])
+    cache.invalidar(reserva.usuario_id)
+    return len(deltas)
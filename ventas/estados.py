@@ -0,0 +1,100 @@
+"""State machine for `Reserva.estado`.
+
+    CARRO -> PENDIENTE -> CONFIRMADA -> COMPLETADA
+      any state except CANCELADA -> CANCELADA (returns the reserved stock)
+
+`transicionar()` is the only way the API changes an estado (checkout, admin
+update, admin bulk-status). Each call locks the candidate rows in their legal
+source states (`SELECT ... FOR UPDATE`, pk order) and then moves them with a
+guarded `UPDATE ... WHERE estado IN (<sources>)`. Two admins, a checkout
+retry or the pending-cancel sweep racing on the same reserva serialize on the
+row lock; whoever comes second sees the new estado, fails the guard and gets
+a per-id rejection instead of applying the side effects a second time.
+"""
+from django.db import transaction
+
+from . import reservas
+from .models import DetalleReserva, Reserva
+
+TRANSICIONES = {
+    "CARRO": {"PENDIENTE", "CANCELADA"},
+    "PENDIENTE": {"CONFIRMADA", "CANCELADA"},
+    "CONFIRMADA": {"COMPLETADA", "CANCELADA"},
+    "COMPLETADA": {"CANCELADA"},
+    "CANCELADA": set(),
+}
+
+
+def permitida(desde, hacia):
+    return hacia in TRANSICIONES.get(desde, ())
+
+
+def origenes(hacia):
+    """Estados from which `hacia` can be reached."""
+    return sorted(desde for desde, destinos in TRANSICIONES.items() if hacia in destinos)
+
+
+def _devolver_stock(ids):
+    # lock the lines as well so the quantities we return cannot change under us
+    list(DetalleReserva.objects.select_for_update().filter(reserva_id__in=ids).values_list("pk", flat=True))
+    reservas.restaurar_stock(ids)
+
+
+# Efectos secundarios al entrar en un estado; reciben los ids que efectivamente cambiaron
+EFECTOS = {
+    "CANCELADA": _devolver_stock,
+}
+
+
+def _motivo(actual, hacia):
+    if actual is None:
+        return "Reserva no encontrada"
+    if actual == hacia:
+        return "La reserva ya está en ese estado"
+    return f"Transición no permitida: {actual} → {hacia}"
+
+
+@transaction.atomic
+def transicionar(reserva_ids, hacia, campos=None, queryset=None):
+    """Move the reservas of `reserva_ids` to `hacia` where the transition is legal.
+
+    `campos` are extra columns written by the same UPDATE (e.g. checkout
+    timestamps); `queryset` restricts which reservas can be addressed (the
+    admin excludes carts). Returns `(resultados, anteriores)`: one result
+    dict per requested id, in request order, and `{pk: estado anterior}` for
+    the rows that changed.
+    """
+    queryset = Reserva.objects.all() if queryset is None else queryset
+    fuentes = origenes(hacia)
+    ids = list(dict.fromkeys(reserva_ids))
+
+    anteriores = dict(
+        queryset.filter(pk__in=ids, estado__in=fuentes)
+        .select_for_update()
+        .order_by("pk")
+        .values_list("pk", "estado")
+    )
+    if anteriores:
+        # guarded on the source states; the rows are locked, so every one of them moves
+        queryset.filter(pk__in=list(anteriores), estado__in=fuentes).update(estado=hacia, **(campos or {}))
+        efecto = EFECTOS.get(hacia)
+        if efecto:
+            efecto(sorted(anteriores))
+
+    rechazadas = [pk for pk in ids if pk not in anteriores]
+    actuales = dict(queryset.filter(pk__in=rechazadas).values_list("pk", "estado")) if rechazadas else {}
+
+    resultados = []
+    for pk in ids:
+        if pk in anteriores:
+            resultados.append({"id_reserva": pk, "estado_anterior": anteriores[pk], "estado": hacia, "ok": True})
+        else:
+            actual = actuales.get(pk)
+            resultados.append({
+                "id_reserva": pk,
+                "estado_anterior": actual,
+                "estado": actual,
+                "ok": False,
+                "detail": _motivo(actual, hacia),
+            })
+    return resultados, anteriores
@@ -0,0 +1,83 @@
+"""Streaming export of reservas and their lines (CSV or NDJSON).
+
+One row per `DetalleReserva`, with the columns of its reserva repeated, read
+through a LEFT JOIN so a reserva without lines still yields one row. The rows
+come from `values_list().iterator(chunk_size=...)`, which on PostgreSQL is a
+server-side cursor: Django fetches `chunk_size` rows at a time and the
+generator encodes them as they arrive, so memory does not grow with the size
+of the export and no model instances are built.
+"""
+import csv
+import json
+
+from django.conf import settings
+
+# (columna del archivo, lookup en Reserva)
+COLUMNAS = (
+    ("id_reserva", "id_reserva"),
+    ("estado", "estado"),
+    ("fecha_creacion", "fecha_creacion"),
+    ("fecha_reserva", "fecha_reserva"),
+    ("total", "total"),
+    ("items_count", "items_count"),
+    ("correo", "usuario__correo"),
+    ("region", "usuario__direccion__region"),
+    ("comuna", "usuario__direccion__comuna"),
+    ("id_detalle", "detalles__id"),
+    ("id_producto", "detalles__producto_id"),
+    ("producto", "detalles__producto__nombre"),
+    ("cantidad", "detalles__cantidad"),
+    ("precio_unitario", "detalles__precio_unitario"),
+)
+ENCABEZADOS = [nombre for nombre, _ in COLUMNAS]
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def filas(queryset, chunk_size=None):
+    """Tuples in `COLUMNAS` order for every line of the reservas in `queryset`."""
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    return (
+        queryset.order_by("id_reserva", "detalles__id")
+        .values_list(*(lookup for _, lookup in COLUMNAS))
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+class _Eco:
+    """File-like object whose write() returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+# a cell starting with these runs as a formula in Excel / LibreOffice (CSV injection)
+_FORMULA = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, str) and valor.startswith(_FORMULA):
+        # names and emails are user input: the quote makes the spreadsheet show them as text
+        return "'" + valor
+    return valor
+
+
+def csv_stream(rows):
+    writer = csv.writer(_Eco())
+    yield writer.writerow(ENCABEZADOS)
+    for row in rows:
+        yield writer.writerow([_texto(valor) for valor in row])
+
+
+def ndjson_stream(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(ENCABEZADOS, row)), default=str, ensure_ascii=False) + "\n"
+
+
+def stream(formato, rows):
+    return csv_stream(rows) if formato == "csv" else ndjson_stream(rows)
@@ -0,0 +1,121 @@
+"""Query-string filters for the admin reserva list and export.
+
+Every filter becomes a plain WHERE clause on RESERVA (or an EXISTS on
+DETALLE_RESERVA for `producto`), so combining them with keyset pagination
+never duplicates rows or loads the detalles.
+"""
+from django.db.models import Exists, OuterRef, Q
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import DetalleReserva, Reserva
+
+ESTADOS_ADMIN = [estado for estado, _ in Reserva.ESTADO_OPCIONES if estado != "CARRO"]
+
+# ?ordering= acepta estos campos, con "-" para orden descendente
+ORDENABLES = ("fecha_reserva", "total", "items_count", "id_reserva")
+ORDEN_POR_DEFECTO = ("-fecha_reserva", "-id_reserva")
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "Debe ser un número entero."})
+
+
+def _date_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        fecha = parse_date(value)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ValidationError({name: "Debe ser una fecha AAAA-MM-DD."})
+    return fecha
+
+
+def _estados(params):
+    estados = []
+    for raw in params.getlist("estado"):
+        for part in raw.split(","):
+            part = part.strip().upper()
+            if not part:
+                continue
+            if part not in ESTADOS_ADMIN:
+                raise ValidationError({"estado": f"Debe ser uno de: {', '.join(ESTADOS_ADMIN)}."})
+            estados.append(part)
+    return estados
+
+
+def filtrar_reservas(queryset, params):
+    """Apply `estado`, `fecha_desde`, `fecha_hasta`, `correo`, `producto`, `region`, `comuna`,
+    `q`, `total_min` and `total_max` from the query params."""
+    estados = _estados(params)
+    if estados:
+        queryset = queryset.filter(estado__in=estados)
+
+    fecha_desde = _date_param(params, "fecha_desde")
+    fecha_hasta = _date_param(params, "fecha_hasta")
+    if fecha_desde:
+        queryset = queryset.filter(fecha_reserva__gte=fecha_desde)
+    if fecha_hasta:
+        queryset = queryset.filter(fecha_reserva__lte=fecha_hasta)
+
+    total_min = _int_param(params, "total_min")
+    total_max = _int_param(params, "total_max")
+    if total_min is not None:
+        queryset = queryset.filter(total__gte=total_min)
+    if total_max is not None:
+        queryset = queryset.filter(total__lte=total_max)
+
+    correo = (params.get("correo") or "").strip()
+    if correo:
+        queryset = queryset.filter(usuario__correo__icontains=correo)
+
+    producto = _int_param(params, "producto")
+    if producto is not None:
+        queryset = queryset.filter(
+            Exists(DetalleReserva.objects.filter(reserva_id=OuterRef("pk"), producto_id=producto))
+        )
+
+    region = (params.get("region") or "").strip()
+    if region:
+        queryset = queryset.filter(usuario__direccion__region__iexact=region)
+    comuna = (params.get("comuna") or "").strip()
+    if comuna:
+        queryset = queryset.filter(usuario__direccion__comuna__iexact=comuna)
+
+    # Búsqueda libre del panel: id exacto, nombre o correo del cliente
+    q = (params.get("q") or "").strip()
+    if q:
+        condicion = (
+            Q(usuario__correo__icontains=q)
+            | Q(usuario__nombre__icontains=q)
+            | Q(usuario__apellido_paterno__icontains=q)
+        )
+        if q.isdigit():
+            condicion |= Q(pk=int(q))
+        queryset = queryset.filter(condicion)
+
+    return queryset
+
+
+def ordenamiento(params):
+    """Validated `?ordering=` as a unique ordering (always ends in id_reserva)."""
+    ordering = (params.get("ordering") or "").strip()
+    if not ordering:
+        return ORDEN_POR_DEFECTO
+    campo = ordering.lstrip("-")
+    if campo not in ORDENABLES:
+        raise ValidationError({"ordering": f"Debe ser uno de: {', '.join(ORDENABLES)}."})
+    if campo == "id_reserva":
+        return (ordering,)
+    # id_reserva breaks ties so equal values keep a stable order across pages
+    desc = "-" if ordering.startswith("-") else ""
+    return (ordering, f"{desc}id_reserva")
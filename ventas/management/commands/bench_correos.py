@@ -0,0 +1,70 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.utils import timezone
+
+from usuarios.models import Usuario
+from ventas import notificaciones
+from ventas.models import Reserva
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de render de los correos de checkout y de cambio de estado, con las plantillas "
+        "compiladas en caché y sin ella. No usa la base de datos ni envía correos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iteraciones", type=int, default=1000, help="Correos renderizados por caso")
+        parser.add_argument("--lineas", type=int, default=5, help="Líneas del pedido de ejemplo")
+
+    def handle(self, *args, **options):
+        iteraciones = max(1, options["iteraciones"])
+        reserva, resumen = self._pedido(max(1, options["lineas"]))
+
+        casos = [
+            ("checkout", lambda: notificaciones.mensajes_checkout(reserva, resumen)),
+            ("cambio_estado", lambda: notificaciones.mensaje_cambio_estado(reserva, "PENDIENTE", resumen)),
+        ]
+        self.stdout.write(f"{'caso':<28}{'ms/correo':>12}{'correos/s':>12}")
+        for nombre, render in casos:
+            self._medir(nombre, render, iteraciones, en_cache=True)
+            self._medir(f"{nombre} (sin caché)", render, iteraciones, en_cache=False)
+
+    def _pedido(self, lineas):
+        # unsaved instances: the templates only read these attributes
+        usuario = Usuario(correo="cliente@example.com", nombre="Cliente")
+        reserva = Reserva(
+            id_reserva=1, usuario=usuario, estado="CONFIRMADA",
+            fecha_reserva=timezone.localdate(), fecha_pendiente=timezone.now(),
+        )
+        detalle = [
+            {"nombre": f"Producto {i}", "cantidad": 2, "precio_unitario": Decimal("9990"), "subtotal": Decimal("19980")}
+            for i in range(lineas)
+        ]
+        resumen = {
+            "lineas": detalle,
+            "total": sum(linea["subtotal"] for linea in detalle),
+            "unidades": sum(linea["cantidad"] for linea in detalle),
+        }
+        return reserva, resumen
+
+    def _vaciar_cache(self):
+        # both levels: our compiled Template objects and the engine's cached loader
+        notificaciones._plantilla.cache_clear()
+        for loader in engines["django"].engine.template_loaders:
+            if hasattr(loader, "reset"):
+                loader.reset()
+
+    def _medir(self, nombre, render, iteraciones, en_cache):
+        notificaciones._plantilla.cache_clear()
+        render()  # warm-up: loads and compiles the templates once
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            if not en_cache:
+                self._vaciar_cache()
+            render()
+        total = time.perf_counter() - inicio
+        self.stdout.write(f"{nombre:<28}{total / iteraciones * 1000:>12.3f}{iteraciones / total:>12.0f}")
@@ -0,0 +1,113 @@
+import re
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ventas.management.commands import cancel_pending_reservas, expire_carts
+from ventas.models import Reserva
+
+# states that neither sweep touches, so they only add volume to RESERVA
+_OTROS_ESTADOS = ("CONFIRMADA", "COMPLETADA", "CANCELADA")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide expire_carts y cancel_pending_reservas sobre una tabla RESERVA de --filas filas, con "
+        "--vencidas filas por barrido: filas/s y plan de la consulta de cada lote. Todo se hace en una "
+        "transacción que se revierte al terminar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=200_000, help="Filas de RESERVA generadas")
+        parser.add_argument("--vencidas", type=int, default=10_000, help="Filas vencidas por barrido")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Reservas por lote, como en los barridos")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Filas por INSERT al generar la tabla")
+
+    def handle(self, *args, **options):
+        vencidas = max(1, options["vencidas"])
+        filas = max(options["filas"], 2 * vencidas)
+        chunk_size = max(1, options["chunk_size"])
+
+        barridos = [
+            ("expire_carts", expire_carts.Command()),
+            ("cancel_pending_reservas", cancel_pending_reservas.Command()),
+        ]
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            self._generar(filas, vencidas, options["batch_size"])
+            self.stdout.write(f"RESERVA: {filas} filas generadas en {time.perf_counter() - inicio:.1f}s")
+            if connection.vendor == "postgresql":
+                # fresh statistics, otherwise the planner still sees the table as it was before the inserts
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(Reserva._meta.db_table)}")
+
+            self.stdout.write(f"{'barrido':<26}{'filas':>8}{'lotes':>7}{'seg':>9}{'filas/s':>10}  plan")
+            for nombre, comando in barridos:
+                cutoff = comando.get_cutoff()
+                plan = self._plan(comando, cutoff, chunk_size)
+                procesadas, lotes, segundos = self._barrer(comando, cutoff, chunk_size)
+                self.stdout.write(
+                    f"{nombre:<26}{procesadas:>8}{lotes:>7}{segundos:>9.2f}{procesadas / segundos:>10.0f}  {plan}"
+                )
+            # a benchmark must not leave its rows behind
+            transaction.set_rollback(True)
+
+    def _generar(self, filas, vencidas, batch_size):
+        ahora = timezone.now()
+        vencido = ahora - timedelta(days=2)
+        hoy = ahora.date()
+
+        def reservas():
+            for i in range(filas):
+                if i < vencidas:
+                    yield Reserva(estado="CARRO", fecha_reserva=hoy, ultima_actividad=vencido)
+                elif i < 2 * vencidas:
+                    yield Reserva(
+                        estado="PENDIENTE", fecha_reserva=hoy, ultima_actividad=vencido, fecha_pendiente=vencido
+                    )
+                elif i % 10 == 0:
+                    # live carts and pending orders: inside the partial indexes but newer than the cutoff
+                    yield Reserva(estado="CARRO", fecha_reserva=hoy, ultima_actividad=ahora)
+                elif i % 10 == 1:
+                    yield Reserva(estado="PENDIENTE", fecha_reserva=hoy, fecha_pendiente=ahora)
+                else:
+                    yield Reserva(estado=_OTROS_ESTADOS[i % 3], fecha_reserva=hoy, fecha_pendiente=vencido)
+
+        lote = []
+        for reserva in reservas():
+            lote.append(reserva)
+            if len(lote) >= batch_size:
+                Reserva.objects.bulk_create(lote)
+                lote = []
+        if lote:
+            Reserva.objects.bulk_create(lote)
+
+    def _plan(self, comando, cutoff, chunk_size):
+        """First access path of the chunk query, e.g. `Index Scan using reserva_carro_actividad_idx`."""
+        lote = (
+            comando.pendientes(cutoff)
+            .select_for_update(skip_locked=True)
+            .order_by(*comando.orden)
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        plan = lote.explain()
+        acceso = re.search(r"(Index Only Scan|Index Scan|Bitmap Index Scan|Seq Scan)[^(\n]*", plan)
+        return acceso.group(0).strip() if acceso else plan.splitlines()[0].strip()
+
+    def _barrer(self, comando, cutoff, chunk_size):
+        """Run the sweep's chunks until nothing is left; returns `(filas, lotes, segundos)`."""
+        procesadas = 0
+        lotes = 0
+        inicio = time.perf_counter()
+        while True:
+            reservas, _unidades = comando.procesar_lote(cutoff, chunk_size)
+            if not reservas:
+                break
+            procesadas += reservas
+            lotes += 1
+            if reservas < chunk_size:
+                break
+        return procesadas, lotes, max(time.perf_counter() - inicio, 1e-9)
@@ -1,35 +1,21 @@
 from datetime import timedelta
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils import timezone
 
-from ventas.models import Reserva
+from ventas.management.sweep import SweepCommand
+from ventas.reservas import ORDEN_PENDIENTES, cancelar_pendientes_vencidas, pendientes_vencidas
 
 
-class Command(BaseCommand):
+class Command(SweepCommand):
     help = "Cancela reservas en estado PENDIENTE con más de 24 horas de antigüedad"
+    orden = ORDEN_PENDIENTES
+    etiqueta = "Reservas canceladas"
 
-    def handle(self, *args, **options):
-        cutoff = timezone.now() - timedelta(hours=24)
-        qs = (
-            Reserva.objects.filter(estado="PENDIENTE", fecha_reserva__lt=cutoff)
-            .prefetch_related("detalles__producto")
-        )
+    def get_cutoff(self):
+        return timezone.now() - timedelta(hours=24)
 
-        cancelled = 0
+    def pendientes(self, cutoff):
+        return pendientes_vencidas(cutoff)
 
-        with transaction.atomic():
-            for reserva in qs:
-                for det in reserva.detalles.all():
-                    producto = det.producto
-                    if not producto:
-                        continue
-                    producto.stock_disponible += det.cantidad
-                    producto.save(update_fields=["stock_disponible"])
-
-                reserva.estado = "CANCELADA"
-                reserva.save(update_fields=["estado"])
-                cancelled += 1
-
-        self.stdout.write(self.style.SUCCESS(f"Reservas canceladas: {cancelled}"))
+    def procesar_lote(self, cutoff, limite):
+        return cancelar_pendientes_vencidas(cutoff, limite)
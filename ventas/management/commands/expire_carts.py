@@ -1,31 +1,25 @@
 from datetime import timedelta
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils import timezone
 
-from ventas.models import Reserva
+from ventas import actividad
+from ventas.management.sweep import SweepCommand
+from ventas.reservas import ORDEN_CARRITOS, carritos_vencidos, eliminar_carritos_vencidos
 
 
-class Command(BaseCommand):
+class Command(SweepCommand):
     help = "Elimina carritos inactivos por más de 1 hora y restaura stock"
+    orden = ORDEN_CARRITOS
+    etiqueta = "Carritos eliminados"
 
-    def handle(self, *args, **options):
-        cutoff = timezone.now() - timedelta(hours=1)
-        qs = (
-            Reserva.objects.filter(estado="CARRO", ultima_actividad__lt=cutoff)
-            .prefetch_related("detalles__producto")
-        )
+    def get_cutoff(self):
+        # write this process's buffered touches and leave room for those still buffered in the
+        # web workers, so a cart only expires when the newer of both values is over an hour old
+        actividad.flush()
+        return timezone.now() - timedelta(hours=1) - actividad.retraso_maximo()
 
-        removed = 0
-        with transaction.atomic():
-            for reserva in qs:
-                for det in reserva.detalles.all():
-                    producto = det.producto
-                    if producto:
-                        producto.stock_disponible += det.cantidad
-                        producto.save(update_fields=["stock_disponible"])
-                reserva.delete()
-                removed += 1
+    def pendientes(self, cutoff):
+        return carritos_vencidos(cutoff)
 
-        self.stdout.write(self.style.SUCCESS(f"Carritos eliminados: {removed}"))
+    def procesar_lote(self, cutoff, limite):
+        return eliminar_carritos_vencidos(cutoff, limite)
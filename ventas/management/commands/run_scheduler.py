@@ -0,0 +1,157 @@
+import logging
+import random
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock(classid, objid): arbitrary, fixed pair shared by every scheduler instance
+LOCK_CLASSID = 7301
+LOCK_OBJID = 1
+
+
+class Tarea:
+    def __init__(self, nombre, comando, intervalo, opciones):
+        self.nombre = nombre
+        self.comando = comando
+        self.intervalo = intervalo
+        self.opciones = opciones
+        self.fallos = 0
+        self.proxima = 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta periódicamente expire_carts y cancel_pending_reservas. Varias instancias pueden "
+        "correr a la vez: solo la que obtiene el advisory lock de Postgres (líder) ejecuta las tareas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--expire-interval",
+            type=float,
+            default=getattr(settings, "SCHEDULER_EXPIRE_CARTS_INTERVAL", 60),
+            help="Segundos entre ejecuciones de expire_carts",
+        )
+        parser.add_argument(
+            "--cancel-interval",
+            type=float,
+            default=getattr(settings, "SCHEDULER_CANCEL_PENDING_INTERVAL", 300),
+            help="Segundos entre ejecuciones de cancel_pending_reservas",
+        )
+        parser.add_argument("--jitter", type=float, default=0.1, help="Fracción aleatoria sumada a cada intervalo")
+        parser.add_argument("--max-backoff", type=float, default=900, help="Espera máxima tras fallos consecutivos")
+        parser.add_argument("--chunk-size", type=int, default=500)
+        parser.add_argument("--once", action="store_true", help="Ejecuta cada tarea una vez y termina")
+
+    def handle(self, *args, **options):
+        self.detener = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self.detener.set())
+
+        self.jitter = max(0.0, options["jitter"])
+        self.max_backoff = options["max_backoff"]
+        self.es_lider = False
+        tareas = [
+            Tarea("expire_carts", "expire_carts", options["expire_interval"], {"chunk_size": options["chunk_size"]}),
+            Tarea(
+                "cancel_pending_reservas",
+                "cancel_pending_reservas",
+                options["cancel_interval"],
+                {"chunk_size": options["chunk_size"]},
+            ),
+        ]
+        for tarea in tareas:
+            # a sweep should never run longer than its own interval
+            tarea.opciones["max_runtime"] = tarea.intervalo
+
+        self.stdout.write(f"Scheduler iniciado ({', '.join(f'{t.nombre} cada {t.intervalo:g}s' for t in tareas)})")
+
+        while not self.detener.is_set():
+            if not self.liderazgo():
+                if options["once"]:
+                    # --once runs the sweeps at most once; the leader is already running them
+                    logger.info("Otra instancia tiene el advisory lock; --once termina sin ejecutar tareas")
+                    self.stdout.write("Otra instancia es el líder; nada que ejecutar con --once")
+                    return
+                # another instance is leader; check again in a while
+                self.detener.wait(self.con_jitter(min(t.intervalo for t in tareas)))
+                continue
+
+            ahora = time.monotonic()
+            for tarea in tareas:
+                if self.detener.is_set():
+                    break
+                if tarea.proxima <= ahora:
+                    self.ejecutar(tarea)
+
+            if options["once"]:
+                break
+            espera = max(0.0, min(t.proxima for t in tareas) - time.monotonic())
+            self.detener.wait(espera)
+
+        self.liberar()
+        self.stdout.write("Scheduler detenido")
+
+    def con_jitter(self, segundos):
+        return segundos * (1 + random.uniform(0, self.jitter))
+
+    def ejecutar(self, tarea):
+        inicio = time.monotonic()
+        try:
+            call_command(tarea.comando, stdout=self.stdout, stderr=self.stderr, **tarea.opciones)
+        except Exception:
+            tarea.fallos += 1
+            espera = min(tarea.intervalo * (2 ** tarea.fallos), self.max_backoff)
+            logger.exception("Fallo %s (intento %s); reintento en %.0fs", tarea.nombre, tarea.fallos, espera)
+            self.stderr.write(f"{tarea.nombre} falló ({tarea.fallos} seguidos); reintento en {espera:.0f}s")
+            # drop a possibly broken connection; leadership is re-acquired on the next tick
+            connection.close()
+            self.es_lider = False
+        else:
+            tarea.fallos = 0
+            espera = self.con_jitter(tarea.intervalo)
+            self.stdout.write(f"{tarea.nombre} completado en {time.monotonic() - inicio:.2f}s")
+        tarea.proxima = time.monotonic() + espera
+
+    def liderazgo(self):
+        """Acquire or confirm the session-level advisory lock that makes this process leader."""
+        if connection.vendor != "postgresql":
+            return True
+        try:
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                if self.es_lider:
+                    # the lock dies with the session; confirm we still hold it
+                    cursor.execute(
+                        "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+                        "AND classid = %s AND objid = %s AND objsubid = 2 AND pid = pg_backend_pid() AND granted)",
+                        [LOCK_CLASSID, LOCK_OBJID],
+                    )
+                else:
+                    cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [LOCK_CLASSID, LOCK_OBJID])
+                lider = bool(cursor.fetchone()[0])
+        except Exception:
+            logger.exception("No se pudo verificar el liderazgo del scheduler")
+            connection.close()
+            lider = False
+
+        if lider != self.es_lider:
+            self.stdout.write("Este proceso es el líder" if lider else "Liderazgo perdido; en espera")
+        self.es_lider = lider
+        return lider
+
+    def liberar(self):
+        if connection.vendor != "postgresql" or not self.es_lider:
+            return
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [LOCK_CLASSID, LOCK_OBJID])
+        except Exception:
+            pass
@@ -0,0 +1,105 @@
+"""Base class for the chunked reserva sweeps (`expire_carts`, `cancel_pending_reservas`).
+
+Each chunk is its own transaction: up to `--chunk-size` rows are selected with
+`FOR UPDATE SKIP LOCKED`, processed and committed before the next chunk, so
+locks on hot PRODUCTO rows are held for one chunk only and rows that a
+shopper or another sweep is touching are simply left for the next run. An
+interrupted run loses at most the chunk in flight; re-running picks up the
+rest because processed rows no longer match the filter.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from ventas.models import DetalleReserva
+
+
+class SweepCommand(BaseCommand):
+    #: label used in the output, e.g. "Carritos eliminados"
+    etiqueta = ""
+    #: ordering of each chunk; should match the partial index of the swept state
+    orden = ("pk",)
+
+    def get_cutoff(self):
+        raise NotImplementedError
+
+    def pendientes(self, cutoff):
+        """Queryset of reservas that the sweep would process."""
+        raise NotImplementedError
+
+    def procesar_lote(self, cutoff, limite):
+        """Process one chunk in its own transaction; returns `(reservas, unidades)`."""
+        raise NotImplementedError
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Reservas por transacción")
+        parser.add_argument(
+            "--max-runtime",
+            type=float,
+            default=0,
+            help="Segundos máximos de ejecución (0 = sin límite); no se inicia un lote nuevo pasado el límite",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Solo informa qué se procesaría")
+        parser.add_argument(
+            "--explain",
+            action="store_true",
+            help="Muestra el plan de la consulta que selecciona cada lote y termina (debe usar el índice parcial)",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = self.get_cutoff()
+        chunk_size = max(1, options["chunk_size"])
+        max_runtime = options["max_runtime"]
+        verbosity = options["verbosity"]
+
+        if options["explain"]:
+            with transaction.atomic():
+                lote = (
+                    self.pendientes(cutoff)
+                    .select_for_update(skip_locked=True)
+                    .order_by(*self.orden)
+                    .values_list("pk", flat=True)[:chunk_size]
+                )
+                self.stdout.write(lote.explain())
+            return
+
+        if options["dry_run"]:
+            qs = self.pendientes(cutoff)
+            reservas = qs.count()
+            unidades = DetalleReserva.objects.filter(reserva__in=qs).aggregate(total=Sum("cantidad"))["total"] or 0
+            self.stdout.write(f"[dry-run] {self.etiqueta}: {reservas} ({unidades} unidades a restaurar)")
+            return
+
+        inicio = time.monotonic()
+        total_reservas = 0
+        total_unidades = 0
+        lotes = 0
+
+        while True:
+            if max_runtime and time.monotonic() - inicio >= max_runtime:
+                self.stdout.write(self.style.WARNING("Tiempo máximo alcanzado; el resto queda para la próxima ejecución"))
+                break
+
+            t0 = time.monotonic()
+            reservas, unidades = self.procesar_lote(cutoff, chunk_size)
+            if not reservas:
+                break
+
+            lotes += 1
+            total_reservas += reservas
+            total_unidades += unidades
+            if verbosity >= 2:
+                self.stdout.write(f"Lote {lotes}: {reservas} reservas, {unidades} unidades en {time.monotonic() - t0:.3f}s")
+            if reservas < chunk_size:
+                break
+
+        elapsed = time.monotonic() - inicio
+        rate = total_reservas / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{self.etiqueta}: {total_reservas} ({total_unidades} unidades, {lotes} lotes) "
+                f"en {elapsed:.2f}s ({rate:.1f}/s)"
+            )
+        )
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:45
+
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+
+def backfill_fecha_pendiente(apps, schema_editor):
+    # Existing orders only have the day they were placed; use its midnight (UTC) in one UPDATE
+    Reserva = apps.get_model('ventas', 'Reserva')
+    Reserva.objects.exclude(estado='CARRO').filter(fecha_pendiente__isnull=True).update(
+        fecha_pendiente=Cast('fecha_reserva', models.DateTimeField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_reserva_ultima_actividad'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='fecha_pendiente',
+            field=models.DateTimeField(blank=True, help_text='Momento exacto en que el carrito pasó a PENDIENTE (checkout)', null=True),
+        ),
+        migrations.RunPython(backfill_fecha_pendiente, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'CARRO')), fields=['ultima_actividad', 'id_reserva'], name='reserva_carro_actividad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'PENDIENTE')), fields=['fecha_pendiente', 'id_reserva'], name='reserva_pendiente_fecha_idx'),
+        ),
+    ]
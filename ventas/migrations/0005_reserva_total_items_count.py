@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:53
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_totales(apps, schema_editor):
+    # One UPDATE with correlated subqueries, same as ventas.reservas.recalcular_totales
+    Reserva = apps.get_model('ventas', 'Reserva')
+    DetalleReserva = apps.get_model('ventas', 'DetalleReserva')
+    lineas = DetalleReserva.objects.filter(reserva_id=OuterRef('pk')).order_by().values('reserva_id')
+    Reserva.objects.update(
+        total=Coalesce(
+            Subquery(lineas.annotate(t=Sum(F('cantidad') * F('precio_unitario'))).values('t')),
+            0,
+            output_field=models.IntegerField(),
+        ),
+        items_count=Coalesce(
+            Subquery(lineas.annotate(n=Count('pk')).values('n')),
+            0,
+            output_field=models.IntegerField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0004_reserva_fecha_pendiente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reserva',
+            name='items_count',
+            field=models.IntegerField(default=0, help_text='Cantidad de líneas (productos distintos) de la reserva'),
+        ),
+        migrations.AddField(
+            model_name='reserva',
+            name='total',
+            field=models.IntegerField(default=0, help_text='Suma de cantidad * precio_unitario de los detalles, en pesos'),
+        ),
+        migrations.RunPython(backfill_totales, migrations.RunPython.noop),
+    ]
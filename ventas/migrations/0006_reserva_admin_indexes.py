@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_passwordresettoken'),
+        ('ventas', '0005_reserva_total_items_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'CARRO'), _negated=True), fields=['fecha_reserva', 'id_reserva'], name='reserva_admin_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'CARRO'), _negated=True), fields=['total', 'id_reserva'], name='reserva_admin_total_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['estado', 'fecha_reserva', 'id_reserva'], name='reserva_estado_fecha_idx'),
+        ),
+    ]
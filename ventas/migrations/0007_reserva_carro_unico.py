@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fusionar_carritos_duplicados(apps, schema_editor):
+    # Keep the most recently active cart of each user and move the other carts' lines into it.
+    # Their units were taken from stock when they were added, so the stock does not change.
+    Reserva = apps.get_model('ventas', 'Reserva')
+    DetalleReserva = apps.get_model('ventas', 'DetalleReserva')
+    usuarios = list(
+        Reserva.objects.filter(estado='CARRO', usuario__isnull=False)
+        .order_by()
+        .values('usuario_id')
+        .annotate(n=Count('pk'))
+        .filter(n__gt=1)
+        .values_list('usuario_id', flat=True)
+    )
+    destinos = []
+    for usuario_id in usuarios:
+        carritos = Reserva.objects.filter(estado='CARRO', usuario_id=usuario_id)
+        destino = carritos.order_by('-ultima_actividad', '-pk').first()
+        otros = list(carritos.exclude(pk=destino.pk).values_list('pk', flat=True))
+        lineas = {d.producto_id: d for d in DetalleReserva.objects.filter(reserva=destino)}
+        for detalle in DetalleReserva.objects.filter(reserva_id__in=otros).order_by('pk'):
+            existente = lineas.get(detalle.producto_id)
+            if existente:
+                existente.cantidad += detalle.cantidad
+                existente.save(update_fields=['cantidad'])
+            else:
+                detalle.reserva_id = destino.pk
+                detalle.save(update_fields=['reserva'])
+                lineas[detalle.producto_id] = detalle
+        ultima = carritos.aggregate(m=Max('ultima_actividad'))['m']
+        # the lines that were merged into an existing one go away with their cart
+        Reserva.objects.filter(pk__in=otros).delete()
+        Reserva.objects.filter(pk=destino.pk).update(ultima_actividad=ultima)
+        destinos.append(destino.pk)
+
+    # Same UPDATE as ventas.reservas.recalcular_totales
+    lineas = DetalleReserva.objects.filter(reserva_id=OuterRef('pk')).order_by().values('reserva_id')
+    Reserva.objects.filter(pk__in=destinos).update(
+        total=Coalesce(
+            Subquery(lineas.annotate(t=Sum(F('cantidad') * F('precio_unitario'))).values('t')),
+            0,
+            output_field=models.IntegerField(),
+        ),
+        items_count=Coalesce(
+            Subquery(lineas.annotate(n=Count('pk')).values('n')),
+            0,
+            output_field=models.IntegerField(),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_passwordresettoken'),
+        ('ventas', '0006_reserva_admin_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionar_carritos_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'CARRO')), fields=('usuario',), name='reserva_carro_unico'),
+        ),
+    ]
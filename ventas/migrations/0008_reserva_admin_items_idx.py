@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_passwordresettoken'),
+        ('ventas', '0007_reserva_carro_unico'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(condition=models.Q(('estado', 'CARRO'), _negated=True), fields=['items_count', 'id_reserva'], name='reserva_admin_items_idx'),
+        ),
+    ]
@@ -28,6 +28,21 @@ class Reserva(models.Model):
     fecha_creacion = models.DateField(auto_now_add=True)
     fecha_reserva = models.DateField()
     ultima_actividad = models.DateTimeField(default=timezone.now)
+    fecha_pendiente = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Momento exacto en que el carrito pasó a PENDIENTE (checkout)"
+    )
+
+    # Mantenidos por ventas.reservas.recalcular_totales, que DetalleReserva llama en cada escritura
+    total = models.IntegerField(
+        default=0,
+        help_text="Suma de cantidad * precio_unitario de los detalles, en pesos"
+    )
+    items_count = models.IntegerField(
+        default=0,
+        help_text="Cantidad de líneas (productos distintos) de la reserva"
+    )
 
     ESTADO_OPCIONES = [
         ('CARRO', 'Carro'),
@@ -45,12 +60,92 @@ class Reserva(models.Model):
     class Meta:
         db_table = 'RESERVA'
         ordering = ['-fecha_reserva'] #Ordenar de las mas nuevas a las mas antiguas
+        constraints = [ #Un solo carrito activo por usuario; tambien es el indice de CarritoView.get_carrito
+            models.UniqueConstraint(
+                fields=['usuario'],
+                condition=models.Q(estado='CARRO'),
+                name='reserva_carro_unico',
+            ),
+        ]
+        indexes = [ #Indices parciales para los barridos de carritos y reservas pendientes vencidas
+            models.Index(
+                fields=['ultima_actividad', 'id_reserva'],
+                name='reserva_carro_actividad_idx',
+                condition=models.Q(estado='CARRO'),
+            ),
+            models.Index(
+                fields=['fecha_pendiente', 'id_reserva'],
+                name='reserva_pendiente_fecha_idx',
+                condition=models.Q(estado='PENDIENTE'),
+            ),
+            # Orden del listado admin (ventas.filtros.ORDENABLES); excluye carritos como el listado
+            models.Index(
+                fields=['fecha_reserva', 'id_reserva'],
+                name='reserva_admin_fecha_idx',
+                condition=~models.Q(estado='CARRO'),
+            ),
+            models.Index(
+                fields=['total', 'id_reserva'],
+                name='reserva_admin_total_idx',
+                condition=~models.Q(estado='CARRO'),
+            ),
+            models.Index(
+                fields=['items_count', 'id_reserva'],
+                name='reserva_admin_items_idx',
+                condition=~models.Q(estado='CARRO'),
+            ),
+            models.Index(
+                fields=['estado', 'fecha_reserva', 'id_reserva'],
+                name='reserva_estado_fecha_idx',
+            ),
+        ]
 
     def __str__(self):
         correo = getattr(self.usuario, 'correo', None) or getattr(self.usuario, 'email', None) or 'Sin usuario'
         return f"Reserva {self.id_reserva} - {correo}"
 
 
+def _recalcular(reserva_ids):
+    from . import reservas  # reservas imports this module
+
+    ids = sorted({pk for pk in reserva_ids if pk is not None})
+    if ids:
+        reservas.recalcular_totales(ids)
+
+
+class DetalleReservaQuerySet(models.QuerySet):
+    """Every write to the lines refreshes `total` / `items_count` of their reservas.
+
+    Covers `bulk_create` (also with `update_conflicts`), `update`,
+    `bulk_update` (which goes through `update`) and `delete`; single rows
+    are covered by `DetalleReserva.save()` / `delete()`.
+    """
+
+    def _reserva_ids(self):
+        return set(self.order_by().values_list("reserva_id", flat=True).distinct())
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        _recalcular(obj.reserva_id for obj in objs)
+        return objs
+
+    def update(self, **kwargs):
+        ids = self._reserva_ids()
+        filas = super().update(**kwargs)
+        # lines moved to another reserva change its totals too
+        destino = kwargs.get("reserva_id", getattr(kwargs.get("reserva"), "pk", kwargs.get("reserva")))
+        _recalcular(ids | {destino})
+        return filas
+
+    def delete(self):
+        ids = self._reserva_ids()
+        resultado = super().delete()
+        _recalcular(ids)
+        return resultado
+
+    delete.queryset_only = True
+
+
 class DetalleReserva(models.Model):
     reserva = models.ForeignKey(
         Reserva,
@@ -68,9 +163,20 @@ class DetalleReserva(models.Model):
         help_text="Precio unitario en pesos al momento de la reserva"
     )
 
+    objects = DetalleReservaQuerySet.as_manager()
+
     class Meta:
         db_table = 'DETALLE_RESERVA'
         unique_together = ('reserva', 'producto')
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _recalcular([self.reserva_id])
+
+    def delete(self, *args, **kwargs):
+        resultado = super().delete(*args, **kwargs)
+        _recalcular([self.reserva_id])
+        return resultado
+
     def __str__(self):
         return f"Detalle de Reserva {self.reserva.id_reserva}"
\ No newline at end of file
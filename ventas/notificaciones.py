@@ -0,0 +1,120 @@
+"""Order emails rendered from templates and queued in the outbox.
+
+`resumen_pedido()` builds the order summary (lines, total, units) in a single
+pass over `reserva.detalles.all()`; callers prefetch `detalles__producto` so
+no line triggers a query. Every email is a text + HTML pair under
+`ventas/templates/ventas/correos/`. The compiled `Template` objects are kept
+per process (`_plantilla`), so rendering a batch of emails costs template
+rendering only, with no loader or parser work.
+"""
+import functools
+
+from django.template.loader import get_template
+from django.utils import timezone
+
+from core import outbox
+
+# Recibe el aviso de cada reserva nueva
+CORREO_TIENDA = 'tsiprueba75@gmail.com'
+
+
+@functools.lru_cache(maxsize=None)
+def _plantilla(nombre):
+    return get_template(nombre)
+
+
+def render(nombre, contexto):
+    """Render `ventas/correos/<nombre>.txt` and `.html`; returns `(texto, html)`."""
+    texto = _plantilla(f"ventas/correos/{nombre}.txt").render(contexto)
+    html = _plantilla(f"ventas/correos/{nombre}.html").render(contexto)
+    return texto.strip() + "\n", html
+
+
+def resumen_pedido(reserva):
+    """Lines, total and units of `reserva` in one pass over its (prefetched) detalles."""
+    lineas = []
+    total = 0
+    unidades = 0
+    for detalle in reserva.detalles.all():
+        subtotal = detalle.cantidad * detalle.precio_unitario
+        lineas.append({
+            "nombre": detalle.producto.nombre,
+            "cantidad": detalle.cantidad,
+            "precio_unitario": detalle.precio_unitario,
+            "subtotal": subtotal,
+        })
+        total += subtotal
+        unidades += detalle.cantidad
+    return {"lineas": lineas, "total": total, "unidades": unidades}
+
+
+def correo_usuario(reserva):
+    user = getattr(reserva, 'usuario', None)
+    # Prefer 'correo' if available, fallback to 'email'
+    return getattr(user, 'correo', None) or getattr(user, 'email', None)
+
+
+def _mensaje(nombre, asunto, destinatario, contexto):
+    """Rendered email as keyword arguments for `outbox.encolar()`."""
+    texto, html = render(nombre, contexto)
+    return {"asunto": asunto, "cuerpo": texto, "html": html, "destinatarios": [destinatario]}
+
+
+def mensajes_checkout(reserva, resumen=None):
+    """Confirmation for the customer (when they have an email) plus the notice for the store."""
+    resumen = resumen or resumen_pedido(reserva)
+    email = correo_usuario(reserva)
+    contexto = {
+        "reserva": reserva,
+        "resumen": resumen,
+        "fecha": reserva.fecha_pendiente or reserva.fecha_reserva,
+        "correo_usuario": email,
+    }
+    mensajes = []
+    if email:
+        mensajes.append(_mensaje("confirmacion", f"Reserva #{reserva.id_reserva} confirmada", email, contexto))
+    mensajes.append(
+        _mensaje("nuevo_pedido", f"Nueva reserva creada #{reserva.id_reserva}", CORREO_TIENDA, contexto)
+    )
+    return mensajes
+
+
+def mensaje_cambio_estado(reserva, estado_anterior, resumen=None, fecha=None):
+    """Status-change email for the customer, or None when they have no email."""
+    email = correo_usuario(reserva)
+    if not email:
+        return None
+    contexto = {
+        "reserva": reserva,
+        "resumen": resumen or resumen_pedido(reserva),
+        "estado_anterior": estado_anterior,
+        "fecha": fecha or timezone.now(),
+    }
+    return _mensaje(
+        "cambio_estado", f"Actualización de estado - Reserva #{reserva.id_reserva}", email, contexto
+    )
+
+
+def encolar_checkout(reserva):
+    outbox.encolar_varios(mensajes_checkout(reserva))
+
+
+def encolar_cambio_estado(reserva, estado_anterior):
+    mensaje = mensaje_cambio_estado(reserva, estado_anterior)
+    if mensaje:
+        outbox.encolar(**mensaje)
+
+
+def encolar_cambios_estado(reservas, anteriores):
+    """Queue the status-change emails of many reservas with one INSERT.
+
+    `reservas` should come with `usuario` and `detalles__producto` loaded;
+    `anteriores` maps each pk to its previous estado.
+    """
+    fecha = timezone.now()
+    mensajes = []
+    for reserva in reservas:
+        mensaje = mensaje_cambio_estado(reserva, anteriores[reserva.pk], fecha=fecha)
+        if mensaje:
+            mensajes.append(mensaje)
+    return outbox.encolar_varios(mensajes)
@@ -0,0 +1,16 @@
+from inventario.pagination import KeysetPagination
+
+from . import filtros
+
+
+class ReservaAdminPagination(KeysetPagination):
+    """Keyset pages over the admin reserva list, always on and in the `?ordering=` of the request."""
+
+    default_page_size = 25
+    max_page_size = 200
+
+    def is_requested(self, request):
+        return True
+
+    def get_ordering(self, request, queryset, view):
+        return filtros.ordenamiento(request.query_params)
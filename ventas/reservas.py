@@ -0,0 +1,171 @@
+"""Bulk operations over reservas that move stock back to inventory.
+
+Used by the cart expiry and pending-cancel sweeps, by `CarritoView` when it
+finds an expired cart, by `ReservaAdminViewSet.destroy` and by the
+CANCELADA side effect of `estados.transicionar`. Regardless of
+how many reservas or lines are involved, each operation is a fixed handful of
+statements: row locks, one grouped SUM per product, one stock UPDATE and one
+DELETE/UPDATE of the reservas.
+"""
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from inventario import stock
+
+from . import cache
+from .models import DetalleReserva, Reserva
+
+
+def cantidades_por_producto(reserva_ids):
+    """`{producto_id: total cantidad}` over the lines of `reserva_ids` (one grouped query)."""
+    filas = (
+        DetalleReserva.objects.filter(reserva_id__in=reserva_ids)
+        .order_by()
+        .values("producto_id")
+        .annotate(total=Sum("cantidad"))
+        .values_list("producto_id", "total")
+    )
+    return dict(filas)
+
+
+def recalcular_totales(reserva_ids, **campos):
+    """Refresh the denormalized `total` / `items_count` of `reserva_ids` in one UPDATE.
+
+    `DetalleReserva` (model and queryset) calls it after every write to the
+    lines, so callers never have to; `campos` (e.g. `ultima_actividad`) are
+    written by the same statement.
+    """
+    lineas = DetalleReserva.objects.filter(reserva_id=OuterRef("pk")).order_by().values("reserva_id")
+    return Reserva.objects.filter(pk__in=reserva_ids).update(
+        total=Coalesce(
+            Subquery(lineas.annotate(t=Sum(F("cantidad") * F("precio_unitario"))).values("t")),
+            0,
+            output_field=IntegerField(),
+        ),
+        items_count=Coalesce(Subquery(lineas.annotate(n=Count("pk")).values("n")), 0, output_field=IntegerField()),
+        **campos,
+    )
+
+
+def registrar_actividad(reserva_ids):
+    """Mark `reserva_ids` as active now (cart writes; cart reads go through ventas.actividad)."""
+    Reserva.objects.filter(pk__in=reserva_ids).update(ultima_actividad=timezone.now())
+
+
+def crear_carrito(usuario):
+    """Make sure `usuario` has an active cart, without ever creating a second one.
+
+    `INSERT ... ON CONFLICT DO NOTHING` against the `reserva_carro_unico`
+    partial unique index: when concurrent first requests race, one insert
+    wins and the others are no-ops, so every caller then reads the same row.
+    """
+    ahora = timezone.now()
+    Reserva.objects.bulk_create(
+        [Reserva(usuario=usuario, estado="CARRO", fecha_reserva=timezone.localdate(ahora), ultima_actividad=ahora)],
+        ignore_conflicts=True,
+    )
+    # bulk_create skips post_save, which is what normally drops the cached cart snapshot
+    cache.invalidar(usuario.pk)
+
+
+def _bloquear(qs, limite=None, skip_locked=False, orden=("pk",)):
+    """Lock the reservas of `qs` (and their lines); return their ids.
+
+    With `skip_locked`, rows held by another transaction (a shopper editing
+    their cart, an admin, a concurrent sweep) are skipped instead of waited on.
+    """
+    qs = qs.select_for_update(skip_locked=skip_locked).order_by(*orden).values_list("pk", flat=True)
+    ids = list(qs[:limite] if limite else qs)
+    if ids:
+        # lock the lines too so a concurrent cart edit cannot change the quantities we restore
+        list(DetalleReserva.objects.select_for_update().filter(reserva_id__in=ids).values_list("pk", flat=True))
+    return ids
+
+
+def restaurar_stock(reserva_ids):
+    """Return to stock every unit held by `reserva_ids`; returns the units restored.
+
+    Must run inside a transaction.
+    """
+    cantidades = cantidades_por_producto(reserva_ids)
+    stock.devolver(cantidades)
+    return sum(cantidades.values())
+
+
+def _eliminar(ids, con_stock=None):
+    # con_stock: the ids whose lines still hold stock (default: all of them)
+    unidades = restaurar_stock(ids if con_stock is None else con_stock)
+    Reserva.objects.filter(pk__in=ids).delete()
+    return len(ids), unidades
+
+
+def _eliminar_carritos(ids):
+    # the owners' cached cart snapshots would still show the deleted lines
+    cache.invalidar(*Reserva.objects.filter(pk__in=ids).values_list("usuario_id", flat=True))
+    return _eliminar(ids)
+
+
+def _cancelar(ids, desde="PENDIENTE"):
+    unidades = restaurar_stock(ids)
+    # guarded on the previous state, like every transition in estados.py
+    Reserva.objects.filter(pk__in=ids, estado=desde).update(estado="CANCELADA")
+    return len(ids), unidades
+
+
+@transaction.atomic
+def eliminar_carritos(reserva_ids):
+    """Delete carts that are still in CARRO and restore their stock; returns how many."""
+    ids = _bloquear(Reserva.objects.filter(pk__in=reserva_ids, estado="CARRO"))
+    return _eliminar_carritos(ids)[0] if ids else 0
+
+
+@transaction.atomic
+def cancelar_reservas(reserva_ids, estado="PENDIENTE"):
+    """Mark reservas still in `estado` as CANCELADA and restore their stock; returns how many."""
+    ids = _bloquear(Reserva.objects.filter(pk__in=reserva_ids, estado=estado))
+    return _cancelar(ids, estado)[0] if ids else 0
+
+
+@transaction.atomic
+def eliminar_reservas(reserva_ids):
+    """Delete reservas in any state, restoring their stock (admin destroy).
+
+    CANCELADA reservas already returned their stock when they were cancelled,
+    so only the others give it back.
+    """
+    ids = _bloquear(Reserva.objects.filter(pk__in=reserva_ids))
+    if not ids:
+        return 0
+    con_stock = list(Reserva.objects.filter(pk__in=ids).exclude(estado="CANCELADA").values_list("pk", flat=True))
+    return _eliminar(ids, con_stock)[0]
+
+
+# Oldest first, matching the partial indexes reserva_carro_actividad_idx / reserva_pendiente_fecha_idx,
+# so each chunk is a bounded index range scan with no sort.
+ORDEN_CARRITOS = ("ultima_actividad", "id_reserva")
+ORDEN_PENDIENTES = ("fecha_pendiente", "id_reserva")
+
+
+def carritos_vencidos(cutoff):
+    return Reserva.objects.filter(estado="CARRO", ultima_actividad__lt=cutoff)
+
+
+def pendientes_vencidas(cutoff):
+    return Reserva.objects.filter(estado="PENDIENTE", fecha_pendiente__lt=cutoff)
+
+
+@transaction.atomic
+def eliminar_carritos_vencidos(cutoff, limite):
+    """Delete up to `limite` unlocked carts idle since `cutoff`; returns `(carritos, unidades)`."""
+    ids = _bloquear(carritos_vencidos(cutoff), limite, skip_locked=True, orden=ORDEN_CARRITOS)
+    return _eliminar_carritos(ids) if ids else (0, 0)
+
+
+@transaction.atomic
+def cancelar_pendientes_vencidas(cutoff, limite):
+    """Cancel up to `limite` unlocked PENDIENTE reservas older than `cutoff`; returns `(reservas, unidades)`."""
+    ids = _bloquear(pendientes_vencidas(cutoff), limite, skip_locked=True, orden=ORDEN_PENDIENTES)
+    return _cancelar(ids) if ids else (0, 0)
+
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Reserva, DetalleReserva
 from inventario.models import Producto
+from inventario import derivatives
 
 class DetalleReservaSerializer(serializers.ModelSerializer):
     nombre_producto = serializers.CharField(source="producto.nombre", read_only=True)
@@ -20,12 +21,15 @@ class DetalleReservaSerializer(serializers.ModelSerializer):
         ]
 
     def get_imagen(self, obj):
-        """Return the first associated product image (text/URL) if present."""
+        """Return the thumbnail URL of the first associated product image if present."""
         producto = getattr(obj, "producto", None)
         if not producto:
             return None
-        imagen = producto.imagenes.first() if hasattr(producto, "imagenes") else None
-        return getattr(imagen, "image", None)
+        # .all() (not .first()) so a prefetched `detalles__producto__imagenes` is reused
+        imagenes = list(producto.imagenes.all()) if hasattr(producto, "imagenes") else []
+        imagen = imagenes[0] if imagenes else None
+        variantes = derivatives.variant_urls(imagen, self.context.get("request"))
+        return variantes["thumb"] if variantes else None
 
 
 class ReservaSerializer(serializers.ModelSerializer):
@@ -41,11 +45,16 @@ class ReservaSerializer(serializers.ModelSerializer):
             'fecha_creacion',
             'fecha_reserva',
             'estado',
+            'total',
+            'items_count',
             'correo_usuario',
             'cliente',
             'direccion',
             'detalles',
         ]
+        # estado changes only through ventas.estados (checkout, admin update, bulk-status);
+        # total / items_count follow every write to DetalleReserva (ventas.reservas.recalcular_totales)
+        read_only_fields = ['estado', 'total', 'items_count']
 
     def get_correo_usuario(self, obj):
         usuario = getattr(obj, "usuario", None)
@@ -77,3 +86,39 @@ class ReservaSerializer(serializers.ModelSerializer):
             "region": getattr(direccion, "region", ""),
             "depto_oficina": getattr(direccion, "depto_oficina", None),
         }
+
+
+class ReservaListaSerializer(ReservaSerializer):
+    """Admin list row: the order, its customer and the stored totals, without detalles."""
+    detalles = None
+
+    class Meta(ReservaSerializer.Meta):
+        fields = [campo for campo in ReservaSerializer.Meta.fields if campo != 'detalles']
+
+
+class EstadoMasivoSerializer(serializers.Serializer):
+    """Body of `POST reservas-admin/bulk-status/`."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000,
+    )
+    estado = serializers.ChoiceField(
+        choices=[opcion for opcion in Reserva.ESTADO_OPCIONES if opcion[0] != 'CARRO']
+    )
+
+
+class LineaCarritoSerializer(serializers.Serializer):
+    producto_id = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=0)
+
+
+class LineasCarritoSerializer(serializers.Serializer):
+    """Body of `PATCH carrito/lines/`: final quantity per product, 0 removes it."""
+    lineas = serializers.ListField(child=LineaCarritoSerializer(), allow_empty=False, max_length=200)
+
+    def validate_lineas(self, lineas):
+        ids = [linea['producto_id'] for linea in lineas]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Cada producto puede aparecer una sola vez.")
+        return lineas
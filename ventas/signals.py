@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from usuarios.models import Direccion, Usuario
+
+from . import cache
+from .models import Reserva
+
+# Lines and bulk updates (queryset.update / delete) skip these signals; the cart views and
+# ventas.reservas call cache.invalidar() themselves. No post_delete receivers on purpose:
+# they would make Django load every row of the bulk cart deletes.
+
+
+@receiver(post_save, sender=Reserva)
+def invalidar_carrito(sender, instance, **kwargs):
+    cache.invalidar(instance.usuario_id)
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_carrito_usuario(sender, instance, **kwargs):
+    # the cart shows the customer's contact data and address
+    cache.invalidar(instance.pk)
+
+
+@receiver(post_save, sender=Direccion)
+def invalidar_carrito_direccion(sender, instance, **kwargs):
+    cache.invalidar(*Usuario.objects.filter(direccion=instance).values_list("pk", flat=True))
@@ -1,3 +1,672 @@
-from django.test import TestCase
+import csv
+import io
+import itertools
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import CorreoSaliente
+from inventario import stock
+from inventario.models import Producto
+from inventario.tests import SIN_CACHE, crear_productos, cursor, en_paralelo
+from usuarios.models import Direccion, Usuario
+
+from . import actividad, cache, estados, exportar, notificaciones, reservas
+from .management.commands import run_scheduler
+from .models import DetalleReserva, Reserva
+from .views import CarritoView
+
+FILAS = (1, 10, 100)
+# the tests create hundreds of users; the real hasher would dominate their runtime
+HASHER_RAPIDO = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+_ruts = itertools.count(10_000_000)
+
+
+def crear_usuario(correo, **extra):
+    direccion = Direccion.objects.create(calle="Calle", numero="123", comuna="Santiago", region="RM")
+    return Usuario.objects.create_user(
+        correo, "clave-segura-123", nombre="Nombre", apellido_paterno="Apellido",
+        rut=f"{next(_ruts)}-1", telefono="912345678", direccion=direccion, **extra
+    )
+
+
+def crear_reserva(usuario, productos, estado="PENDIENTE"):
+    reserva = Reserva.objects.create(usuario=usuario, estado=estado, fecha_reserva=timezone.localdate())
+    DetalleReserva.objects.bulk_create([
+        DetalleReserva(reserva=reserva, producto=producto, cantidad=1, precio_unitario=producto.precio)
+        for producto in productos
+    ])
+    return reserva
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class QueryCountTests(TestCase):
+    """Pin the queries of the cart / orders / admin reads at 1, 10 and 100 rows to catch N+1 regressions."""
+
+    def setUp(self):
+        self.usuario = crear_usuario("cliente@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_carrito_get(self):
+        carrito = crear_reserva(self.usuario, [], estado="CARRO")
+        creadas = 0
+        for filas in FILAS:
+            productos = crear_productos(filas - creadas, inicio=creadas)
+            DetalleReserva.objects.bulk_create([
+                DetalleReserva(reserva=carrito, producto=p, cantidad=1, precio_unitario=p.precio) for p in productos
+            ])
+            creadas = filas
+            with self.subTest(filas=filas), self.assertNumQueries(4):
+                response = self.client.get("/api/ventas/carrito/")
+                self.assertEqual(len(response.json()["detalles"]), filas)
+
+    def test_pedidos_usuario(self):
+        productos = crear_productos(2)
+        creadas = 0
+        for filas in FILAS:
+            for _ in range(filas - creadas):
+                crear_reserva(self.usuario, productos)
+            creadas = filas
+            with self.subTest(filas=filas), self.assertNumQueries(4):
+                response = self.client.get("/api/ventas/pedidos/")
+                self.assertEqual(len(response.json()), filas)
+
+    def test_reservas_admin_list(self):
+        admin = crear_usuario("admin@example.com", is_staff=True)
+        self.client.force_authenticate(admin)
+        productos = crear_productos(2)
+        creadas = 0
+        for filas in FILAS:
+            for i in range(creadas, filas):
+                crear_reserva(crear_usuario(f"cliente{i}@example.com"), productos)
+            creadas = filas
+            with self.subTest(filas=filas), self.assertNumQueries(1):
+                response = self.client.get("/api/ventas/reservas-admin/", {"page_size": 100})
+                self.assertEqual(len(response.json()["results"]), filas)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.usuario = crear_usuario("cliente@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.carrito = crear_reserva(self.usuario, crear_productos(2), estado="CARRO")
+
+    def test_checkout(self):
+        response = self.client.patch("/api/ventas/carrito/")
+        self.assertEqual(response.status_code, 200)
+        self.carrito.refresh_from_db()
+        self.assertEqual(self.carrito.estado, "PENDIENTE")
+
+    def test_checkout_revertido_no_responde_confirmada(self):
+        with mock.patch.object(notificaciones, "encolar_checkout", side_effect=DatabaseError("sin conexión")):
+            response = self.client.patch("/api/ventas/carrito/")
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["detail"], "No se pudo confirmar la reserva")
+        self.carrito.refresh_from_db()
+        self.assertEqual(self.carrito.estado, "CARRO")
+
+
+class BenchCorreosTests(SimpleTestCase):
+    def test_mide_ambos_correos(self):
+        salida = io.StringIO()
+        call_command("bench_correos", iteraciones=2, stdout=salida)
+        for caso in ("checkout", "checkout (sin caché)", "cambio_estado", "cambio_estado (sin caché)"):
+            self.assertIn(caso, salida.getvalue())
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class EliminarReservaTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario("admin@example.com", is_staff=True))
+        self.producto, = crear_productos(1)
+        self.reserva = crear_reserva(crear_usuario("cliente@example.com"), [self.producto])
+
+    def _stock(self):
+        self.producto.refresh_from_db()
+        return self.producto.stock_disponible
+
+    def test_eliminar_devuelve_stock(self):
+        antes = self._stock()
+        response = self.client.delete(f"/api/ventas/reservas-admin/{self.reserva.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self._stock(), antes + 1)
+
+    def test_eliminar_cancelada_no_devuelve_stock_dos_veces(self):
+        estados.transicionar([self.reserva.pk], "CANCELADA")
+        cancelada = self._stock()
+        response = self.client.delete(f"/api/ventas/reservas-admin/{self.reserva.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Reserva.objects.filter(pk=self.reserva.pk).exists())
+        self.assertEqual(self._stock(), cancelada)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class TransicionConcurrenteTests(TransactionTestCase):
+    """Whoever reaches a reserva second is rejected, so its side effects run once."""
+
+    RONDAS = 5
+
+    def setUp(self):
+        self.usuario = crear_usuario("cliente@example.com")
+        self.producto, = crear_productos(1)
+
+    def _pendiente_vencida(self):
+        reserva = crear_reserva(self.usuario, [self.producto])
+        Reserva.objects.filter(pk=reserva.pk).update(fecha_pendiente=timezone.now() - timedelta(days=2))
+        return reserva
+
+    def _stock(self):
+        self.producto.refresh_from_db()
+        return self.producto.stock_disponible
+
+    def _transicion(self, reserva, hacia):
+        return lambda: estados.transicionar([reserva.pk], hacia)[0][0]["ok"]
+
+    def test_dos_cancelaciones(self):
+        for ronda in range(self.RONDAS):
+            with self.subTest(ronda=ronda):
+                reserva = self._pendiente_vencida()
+                antes = self._stock()
+                cancelar = self._transicion(reserva, "CANCELADA")
+
+                resultados = en_paralelo([cancelar, cancelar])
+
+                self.assertEqual(sorted(resultados), [False, True])
+                self.assertEqual(self._stock(), antes + 1)
+
+    def test_cancelacion_y_barrido(self):
+        for ronda in range(self.RONDAS):
+            with self.subTest(ronda=ronda):
+                reserva = self._pendiente_vencida()
+                antes = self._stock()
+
+                resultados = en_paralelo([
+                    self._transicion(reserva, "CANCELADA"),
+                    lambda: reservas.cancelar_pendientes_vencidas(timezone.now(), 10)[0] == 1,
+                ])
+
+                # exactly one of them cancelled it
+                self.assertEqual(sorted(resultados), [False, True])
+                reserva.refresh_from_db()
+                self.assertEqual(reserva.estado, "CANCELADA")
+                self.assertEqual(self._stock(), antes + 1)
+
+    def test_confirmacion_y_barrido(self):
+        for ronda in range(self.RONDAS):
+            with self.subTest(ronda=ronda):
+                reserva = self._pendiente_vencida()
+                antes = self._stock()
+
+                confirmada, _ = en_paralelo([
+                    self._transicion(reserva, "CONFIRMADA"),
+                    lambda: call_command("cancel_pending_reservas", stdout=io.StringIO()),
+                ])
+
+                reserva.refresh_from_db()
+                if confirmada:
+                    self.assertEqual(reserva.estado, "CONFIRMADA")
+                    self.assertEqual(self._stock(), antes)
+                else:
+                    self.assertEqual(reserva.estado, "CANCELADA")
+                    self.assertEqual(self._stock(), antes + 1)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class CsvFormulaTests(SimpleTestCase):
+    def test_celdas_con_formula_quedan_como_texto(self):
+        fila = (1, "CONFIRMADA", None, None, -500, 1, "@sum(a1)@example.com", "=cmd|' /c calc'!A1",
+                "+56", 1, 2, "-Producto", 1, 9990)
+        _encabezado, linea = exportar.csv_stream([fila])
+        celdas = next(csv.reader([linea]))
+        self.assertEqual(celdas[6], "'@sum(a1)@example.com")
+        self.assertEqual(celdas[7], "'=cmd|' /c calc'!A1")
+        self.assertEqual(celdas[8], "'+56")
+        self.assertEqual(celdas[11], "'-Producto")
+        # numbers are not user text: a negative total stays a number
+        self.assertEqual(celdas[4], "-500")
+
+
+class BenchExportTests(TestCase):
+    def test_cuenta_las_filas_de_la_base(self):
+        crear_reserva(crear_usuario("cliente@example.com"), crear_productos(3))
+        salida = io.StringIO()
+        call_command("bench_export", filas=10, db=True, stdout=salida)
+        lineas = salida.getvalue().splitlines()[1:]
+        self.assertEqual([linea.split()[:2] for linea in lineas], [["csv", "3"], ["ndjson", "3"]])
+
+
+class BenchSweepTests(TestCase):
+    def test_barre_las_vencidas_y_revierte(self):
+        salida = io.StringIO()
+        call_command("bench_sweep", filas=50, vencidas=7, chunk_size=3, stdout=salida)
+        lineas = salida.getvalue().splitlines()[2:]
+        self.assertEqual(
+            [linea.split()[:3] for linea in lineas],
+            [["expire_carts", "7", "3"], ["cancel_pending_reservas", "7", "3"]],
+        )
+        self.assertTrue(all("Scan" in linea for linea in lineas))
+        self.assertFalse(Reserva.objects.exists())
+
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ventas-tests"}}
+
+
+@override_settings(CACHES=LOCMEM, CARRITO_CACHE_TIMEOUT=300, PASSWORD_HASHERS=HASHER_RAPIDO)
+class CarritoSnapshotTests(TestCase):
+    """The cart snapshot is only discarded by writes to the cart or to its own products."""
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.usuario = crear_usuario("cliente@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.producto, self.otro = crear_productos(2)
+        crear_reserva(self.usuario, [self.producto], estado="CARRO")
+        self.client.get("/api/ventas/carrito/")
+
+    def _stock(self, producto, delta):
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            stock.aplicar({producto.pk: delta})
+
+    def test_hit(self):
+        with self.assertNumQueries(0):
+            self.client.get("/api/ventas/carrito/")
+
+    def test_stock_de_otro_producto_no_invalida(self):
+        self._stock(self.otro, -1)
+        with self.assertNumQueries(0):
+            self.client.get("/api/ventas/carrito/")
+
+    def test_stock_de_un_producto_del_carrito_invalida(self):
+        self._stock(self.producto, -3)
+        response = self.client.get("/api/ventas/carrito/")
+        detalle, = response.json()["detalles"]
+        self.assertEqual(detalle["stock_disponible"], 7)
+
+    @override_settings(CARRITO_CACHE_TIMEOUT=None)
+    def test_desactivado_con_cache_local(self):
+        self.assertEqual(cache.timeout(), 0)
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get("/api/ventas/carrito/")
+        self.assertTrue(consultas.captured_queries)
+
+    def test_activo_con_cache_compartida(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directorio}},
+            CARRITO_CACHE_TIMEOUT=None,
+        ):
+            self.assertEqual(cache.timeout(), 300)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO, ACTIVIDAD_FLUSH_INTERVAL=10)
+class CarritoCaducidadTests(TestCase):
+    def setUp(self):
+        self.usuario = crear_usuario("cliente@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.producto, = crear_productos(1)
+        self.carrito = crear_reserva(self.usuario, [self.producto], estado="CARRO")
+
+    def _inactivo(self, delta):
+        Reserva.objects.filter(pk=self.carrito.pk).update(ultima_actividad=timezone.now() - delta)
+
+    def test_carrito_tocado_en_otro_proceso_no_caduca(self):
+        # persisted value just past the hour; the newer touch sits in another worker's buffer
+        self._inactivo(CarritoView.caducidad + timedelta(seconds=5))
+        response = self.client.get("/api/ventas/carrito/")
+        self.assertEqual(response.json()["id_reserva"], self.carrito.pk)
+        self.assertEqual(len(response.json()["detalles"]), 1)
+
+    def test_carrito_caducado_se_elimina(self):
+        self._inactivo(CarritoView.caducidad + actividad.retraso_maximo() + timedelta(seconds=5))
+        antes = self.producto.stock_disponible
+        response = self.client.get("/api/ventas/carrito/")
+        self.assertNotEqual(response.json()["id_reserva"], self.carrito.pk)
+        self.assertFalse(Reserva.objects.filter(pk=self.carrito.pk).exists())
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock_disponible, antes + 1)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class ReservaAdminCursorTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario("admin@example.com", is_staff=True))
+        crear_reserva(crear_usuario("cliente@example.com"), crear_productos(1))
+
+    def test_cursor_manipulado(self):
+        casos = [
+            ({}, ["no-es-fecha", 1]),
+            ({}, ["2026-13-45", 1]),
+            ({"ordering": "total"}, ["mucho", 1]),
+            ({"ordering": "-items_count"}, [1, "x"]),
+        ]
+        for params, valores in casos:
+            with self.subTest(params=params, valores=valores):
+                response = self.client.get("/api/ventas/reservas-admin/", {**params, "cursor": cursor(valores)})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()["detail"], "Cursor inválido.")
+
+    def test_cursor_valido(self):
+        response = self.client.get("/api/ventas/reservas-admin/", {"cursor": cursor(["2000-01-01", 1])})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [])
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class TotalesTests(TestCase):
+    """total / items_count follow every write path of DetalleReserva."""
+
+    def setUp(self):
+        self.usuario = crear_usuario("cliente@example.com")
+        self.a, self.b = crear_productos(2)  # precios 1000 y 1001
+        self.reserva = Reserva.objects.create(usuario=self.usuario, estado="PENDIENTE", fecha_reserva=timezone.localdate())
+
+    def assertTotales(self, total, items_count):
+        self.reserva.refresh_from_db()
+        self.assertEqual((self.reserva.total, self.reserva.items_count), (total, items_count))
+
+    def test_create_save_delete(self):
+        detalle = DetalleReserva.objects.create(reserva=self.reserva, producto=self.a, cantidad=2, precio_unitario=1000)
+        self.assertTotales(2000, 1)
+        detalle.cantidad = 3
+        detalle.save()
+        self.assertTotales(3000, 1)
+        detalle.delete()
+        self.assertTotales(0, 0)
+
+    def test_bulk_create(self):
+        crear_reserva(self.usuario, [self.a, self.b])
+        otra = Reserva.objects.latest("pk")
+        self.assertEqual((otra.total, otra.items_count), (2001, 2))
+
+    def test_bulk_create_update_conflicts(self):
+        DetalleReserva.objects.create(reserva=self.reserva, producto=self.a, cantidad=1, precio_unitario=1000)
+        DetalleReserva.objects.bulk_create(
+            [DetalleReserva(reserva=self.reserva, producto=self.a, cantidad=5, precio_unitario=1000)],
+            update_conflicts=True, unique_fields=["reserva", "producto"], update_fields=["cantidad"],
+        )
+        self.assertTotales(5000, 1)
+
+    def test_update_bulk_update_y_delete_de_queryset(self):
+        crear_reserva(self.usuario, [self.a, self.b])
+        self.reserva = Reserva.objects.latest("pk")
+        DetalleReserva.objects.filter(reserva=self.reserva).update(cantidad=2)
+        self.assertTotales(4002, 2)
+        detalles = list(self.reserva.detalles.all())
+        for detalle in detalles:
+            detalle.precio_unitario = 10
+        DetalleReserva.objects.bulk_update(detalles, ["precio_unitario"])
+        self.assertTotales(40, 2)
+        DetalleReserva.objects.filter(reserva=self.reserva, producto=self.a).delete()
+        self.assertTotales(20, 1)
+
+    def test_mover_lineas(self):
+        detalle = DetalleReserva.objects.create(reserva=self.reserva, producto=self.a, cantidad=1, precio_unitario=1000)
+        otra = crear_reserva(self.usuario, [])
+        DetalleReserva.objects.filter(pk=detalle.pk).update(reserva=otra)
+        self.assertTotales(0, 0)
+        otra.refresh_from_db()
+        self.assertEqual((otra.total, otra.items_count), (1000, 1))
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class CarritoLineasTests(TestCase):
+    URL = "/api/ventas/carrito/lines/"
+
+    def setUp(self):
+        self.usuario = crear_usuario("cliente@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.a, self.b, self.c = crear_productos(3)  # stock 10 cada uno
+        self.carrito = crear_reserva(self.usuario, [self.a, self.c], estado="CARRO")
+        # crear_reserva does not hold stock: take the unit each cart line holds
+        Producto.objects.filter(pk__in=[self.a.pk, self.c.pk]).update(stock_disponible=9)
+
+    def _stock(self):
+        return dict(
+            Producto.objects.filter(pk__in=[self.a.pk, self.b.pk, self.c.pk]).values_list("pk", "stock_disponible")
+        )
+
+    def _lineas(self):
+        return dict(self.carrito.detalles.values_list("producto_id", "cantidad"))
+
+    def test_upsert_y_eliminacion(self):
+        Producto.objects.filter(pk=self.a.pk).update(precio=5000)
+        response = self.client.patch(self.URL, [
+            {"producto_id": self.a.pk, "cantidad": 3},
+            {"producto_id": self.b.pk, "cantidad": 2},
+            {"producto_id": self.c.pk, "cantidad": 0},
+        ], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._lineas(), {self.a.pk: 3, self.b.pk: 2})
+        self.assertEqual(self._stock(), {self.a.pk: 7, self.b.pk: 8, self.c.pk: 10})
+
+        datos = response.json()
+        self.assertEqual(datos["id_reserva"], self.carrito.pk)
+        precios = {d["producto"]: d["precio_unitario"] for d in datos["detalles"]}
+        # the existing line keeps the price it was added at; the new one takes the current price
+        self.assertEqual(precios, {self.a.pk: self.a.precio, self.b.pk: self.b.precio})
+        self.assertEqual((datos["total"], datos["items_count"]), (3 * self.a.precio + 2 * self.b.precio, 2))
+
+    def test_conflicto_parcial_no_aplica_nada(self):
+        antes = self._stock()
+        response = self.client.patch(self.URL, {"lineas": [
+            {"producto_id": self.a.pk, "cantidad": 2},
+            {"producto_id": self.b.pk, "cantidad": 50},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["conflictos"],
+            [{"producto_id": self.b.pk, "solicitado": 50, "disponible": 10}],
+        )
+        self.assertEqual(self._stock(), antes)
+        self.assertEqual(self._lineas(), {self.a.pk: 1, self.c.pk: 1})
+
+    def test_producto_inexistente(self):
+        antes = self._stock()
+        response = self.client.patch(self.URL, [
+            {"producto_id": self.a.pk, "cantidad": 2},
+            {"producto_id": 999999, "cantidad": 1},
+        ], format="json")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["productos"], [999999])
+        self.assertEqual(self._stock(), antes)
+        self.assertEqual(self._lineas(), {self.a.pk: 1, self.c.pk: 1})
+
+    def test_producto_repetido(self):
+        response = self.client.patch(self.URL, [
+            {"producto_id": self.a.pk, "cantidad": 2},
+            {"producto_id": self.a.pk, "cantidad": 3},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class EstadoMasivoTests(TestCase):
+    URL = "/api/ventas/reservas-admin/bulk-status/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario("admin@example.com", is_staff=True))
+        self.producto, = crear_productos(1)
+        cliente = crear_usuario("cliente@example.com")
+        self.pendiente = crear_reserva(cliente, [self.producto])
+        self.confirmada = crear_reserva(cliente, [self.producto], estado="CONFIRMADA")
+        self.cancelada = crear_reserva(cliente, [self.producto], estado="CANCELADA")
+        self.carrito = crear_reserva(crear_usuario("otro@example.com"), [self.producto], estado="CARRO")
+
+    def test_cancela_las_permitidas(self):
+        antes = self.producto.stock_disponible
+        ids = [self.pendiente.pk, self.confirmada.pk, self.cancelada.pk, self.carrito.pk, 999999]
+        response = self.client.post(self.URL, {"ids": ids, "estado": "CANCELADA"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        datos = response.json()
+        self.assertEqual(datos["actualizadas"], 2)
+        self.assertEqual([r["id_reserva"] for r in datos["resultados"]], ids)
+        self.assertEqual([r["ok"] for r in datos["resultados"]], [True, True, False, False, False])
+        self.assertEqual(datos["resultados"][0]["estado_anterior"], "PENDIENTE")
+        # carts are not addressable from the admin
+        self.assertIsNone(datos["resultados"][3]["estado"])
+
+        estados_finales = dict(Reserva.objects.values_list("pk", "estado"))
+        self.assertEqual(estados_finales[self.pendiente.pk], "CANCELADA")
+        self.assertEqual(estados_finales[self.carrito.pk], "CARRO")
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock_disponible, antes + 2)
+        self.assertEqual(CorreoSaliente.objects.count(), 2)
+
+    def test_estado_invalido(self):
+        for estado in ("CARRO", "ENVIADA"):
+            with self.subTest(estado=estado):
+                response = self.client.post(self.URL, {"ids": [self.pendiente.pk], "estado": estado}, format="json")
+                self.assertEqual(response.status_code, 400)
+        self.pendiente.refresh_from_db()
+        self.assertEqual(self.pendiente.estado, "PENDIENTE")
+
+    def test_solo_staff(self):
+        self.client.force_authenticate(crear_usuario("cliente2@example.com"))
+        response = self.client.post(self.URL, {"ids": [self.pendiente.pk], "estado": "CANCELADA"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class ExportarTests(TestCase):
+    URL = "/api/ventas/reservas-admin/export/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(crear_usuario("admin@example.com", is_staff=True))
+        cliente = crear_usuario("cliente@example.com")
+        self.reserva = crear_reserva(cliente, crear_productos(2))
+        self.vacia = crear_reserva(cliente, [], estado="CONFIRMADA")
+        crear_reserva(cliente, crear_productos(1, inicio=2), estado="CARRO")
+
+    def _contenido(self, response):
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_csv(self):
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn('.csv"', response["Content-Disposition"])
+        filas = list(csv.reader(io.StringIO(self._contenido(response))))
+        self.assertEqual(filas[0], exportar.ENCABEZADOS)
+        # one row per line, plus one for the reserva without lines; carts are left out
+        self.assertEqual([int(fila[0]) for fila in filas[1:]], [self.reserva.pk] * 2 + [self.vacia.pk])
+        self.assertEqual(filas[3][exportar.ENCABEZADOS.index("id_detalle")], "")
+
+    def test_ndjson_con_filtro(self):
+        response = self.client.get(self.URL, {"formato": "ndjson", "estado": "PENDIENTE"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        filas = [json.loads(linea) for linea in self._contenido(response).splitlines()]
+        self.assertEqual(len(filas), 2)
+        self.assertEqual({fila["id_reserva"] for fila in filas}, {self.reserva.pk})
+        self.assertEqual(filas[0]["correo"], "cliente@example.com")
+
+    def test_formato_invalido(self):
+        response = self.client.get(self.URL, {"formato": "xlsx"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO, ACTIVIDAD_FLUSH_INTERVAL=10)
+class ActividadFlushTests(TestCase):
+    def setUp(self):
+        # no background thread: the test drives flush() itself
+        parche = mock.patch.object(actividad, "_iniciar")
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(actividad._buffer.clear)
+        usuario = crear_usuario("cliente@example.com")
+        self.hace_una_hora = timezone.now() - timedelta(hours=1)
+        self.carrito = crear_reserva(usuario, [], estado="CARRO")
+        self.pendiente = crear_reserva(usuario, [])
+        Reserva.objects.update(ultima_actividad=self.hace_una_hora)
+
+    def _actividad(self, reserva):
+        reserva.refresh_from_db()
+        return reserva.ultima_actividad
+
+    def test_flush_escribe_y_vacia_el_buffer(self):
+        ahora = timezone.now()
+        actividad.tocar(self.carrito.pk, ahora - timedelta(seconds=5))
+        actividad.tocar(self.carrito.pk, ahora)
+        self.assertEqual(actividad.vigente(self.carrito.pk, self.hace_una_hora), ahora)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(actividad.flush(), 1)
+        self.assertEqual(self._actividad(self.carrito), ahora)
+        self.assertIsNone(actividad.pendiente(self.carrito.pk))
+
+    def test_no_retrocede_ni_toca_otros_estados(self):
+        actividad.tocar(self.carrito.pk, self.hace_una_hora - timedelta(minutes=5))
+        actividad.tocar(self.pendiente.pk, timezone.now())
+        self.assertEqual(actividad.flush(), 0)
+        self.assertEqual(self._actividad(self.carrito), self.hace_una_hora)
+        self.assertEqual(self._actividad(self.pendiente), self.hace_una_hora)
+
+    def test_error_conserva_el_buffer(self):
+        ahora = timezone.now()
+        actividad.tocar(self.carrito.pk, ahora)
+        with mock.patch.object(actividad, "_escribir", side_effect=DatabaseError("sin conexión")), \
+                self.assertLogs("ventas.actividad", "ERROR"):
+            self.assertEqual(actividad.flush(), 0)
+        self.assertEqual(actividad.pendiente(self.carrito.pk), ahora)
+
+
+@override_settings(CACHES=SIN_CACHE, PASSWORD_HASHERS=HASHER_RAPIDO)
+class CrearCarritoConcurrenteTests(TransactionTestCase):
+    def test_primeras_peticiones_simultaneas(self):
+        usuario = crear_usuario("cliente@example.com")
+        vista = CarritoView()
+        for ronda in range(3):
+            with self.subTest(ronda=ronda):
+                Reserva.objects.filter(usuario=usuario).delete()
+                carritos = en_paralelo([lambda: vista.get_carrito(usuario).pk] * 6)
+                self.assertEqual(len(set(carritos)), 1)
+                self.assertEqual(Reserva.objects.filter(usuario=usuario, estado="CARRO").count(), 1)
+
+
+class SchedulerLiderTests(TestCase):
+    def _ejecutar(self):
+        salida = io.StringIO()
+        with mock.patch("ventas.management.commands.run_scheduler.call_command") as comando:
+            call_command("run_scheduler", "--once", stdout=salida, stderr=io.StringIO())
+        return [c.args[0] for c in comando.call_args_list], salida.getvalue()
+
+    def test_lider_ejecuta_las_tareas_y_libera_el_lock(self):
+        tareas, salida = self._ejecutar()
+        self.assertEqual(tareas, ["expire_carts", "cancel_pending_reservas"])
+        self.assertIn("Este proceso es el líder", salida)
+        self.assertFalse(self._lock_tomado())
+
+    def test_sin_lock_no_ejecuta_nada(self):
+        otra = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(otra.close)
+        with otra.cursor() as c:
+            c.execute("SELECT pg_advisory_lock(%s, %s)", [run_scheduler.LOCK_CLASSID, run_scheduler.LOCK_OBJID])
+
+        tareas, salida = self._ejecutar()
+        self.assertEqual(tareas, [])
+        self.assertIn("Otra instancia es el líder", salida)
+
+    def _lock_tomado(self):
+        with connection.cursor() as c:
+            c.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND classid = %s AND objid = %s)",
+                [run_scheduler.LOCK_CLASSID, run_scheduler.LOCK_OBJID],
+            )
+            return c.fetchone()[0]
@@ -2,124 +2,169 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status, viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from .models import Reserva, DetalleReserva
 from inventario.models import Producto
-from .serializers import ReservaSerializer
-from django.utils import timezone 
-from django.core.mail import send_mail
+from inventario import stock
+from .serializers import EstadoMasivoSerializer, LineasCarritoSerializer, ReservaListaSerializer, ReservaSerializer
+from .pagination import ReservaAdminPagination
+from . import actividad, cache, carrito, estados, exportar, filtros, notificaciones, reservas
+from django.http import StreamingHttpResponse
 from django.conf import settings
-from django.db import transaction
+from django.utils import timezone 
+from django.db import DatabaseError, transaction
+from django.db.models import F
 from datetime import timedelta
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Everything ReservaSerializer touches per line, so serializing N lines costs a fixed number of queries
+DETALLES_PREFETCH = ('detalles__producto', 'detalles__producto__imagenes')
 
 class CarritoView(APIView):
     permission_classes = [IsAuthenticated]
-
-    def _restore_stock(self, reserva: Reserva):
-        for det in reserva.detalles.select_related("producto").all():
-            prod = det.producto
-            if prod:
-                prod.stock_disponible += det.cantidad
-                prod.save(update_fields=["stock_disponible"])
+    # idle time after which a cart is dropped and its stock restored
+    caducidad = timedelta(hours=1)
 
     def get_carrito(self, user):
-        stale_cutoff = timezone.now() - timedelta(hours=1)
-        reserva = (
+        # other workers may still hold a newer touch in their buffers: allow for it, like expire_carts
+        stale_cutoff = timezone.now() - self.caducidad - actividad.retraso_maximo()
+        # a single probe of the reserva_carro_unico partial unique index
+        carrito_activo = (
             Reserva.objects.filter(usuario=user, estado='CARRO')
-            .prefetch_related('detalles__producto')
-            .first()
+            .order_by()
+            .select_related('usuario__direccion')
+            .prefetch_related(*DETALLES_PREFETCH)
         )
+        reserva = carrito_activo.first()
 
-        if reserva and reserva.ultima_actividad and reserva.ultima_actividad < stale_cutoff:
+        # a touch still in the write-behind buffer counts as activity
+        ultima = actividad.vigente(reserva.pk, reserva.ultima_actividad) if reserva else None
+        if ultima and ultima < stale_cutoff:
             # cart expired: restore stock and drop it
-            with transaction.atomic():
-                self._restore_stock(reserva)
-                reserva.delete()
+            reservas.eliminar_carritos([reserva.pk])
             reserva = None
 
         if not reserva:
-            reserva = Reserva.objects.create(
-                usuario=user,
-                estado='CARRO',
-                fecha_reserva=timezone.now(),
-                ultima_actividad=timezone.now(),
-            )
+            # INSERT ... ON CONFLICT DO NOTHING: concurrent first requests end up with the same cart
+            reservas.crear_carrito(user)
+            reserva = carrito_activo.first()
 
         return reserva
 
     # Obtener carrito actual
     def get(self, request):
-        reserva = self.get_carrito(request.user)
-        # keep cart alive on view
-        reserva.ultima_actividad = timezone.now()
-        reserva.save(update_fields=["ultima_actividad"])
-        serializer = ReservaSerializer(reserva)
-        return Response(serializer.data)
+        key = cache.snapshot_key(request)
+        entry = cache.leer(key)
+        ahora = timezone.now()
+        if entry is None or entry["ultima_actividad"] < ahora - self.caducidad:
+            # miss (or a snapshot old enough that the cart may have expired): build it from the database;
+            # `leido` is taken first so a product write committed during the read discards the snapshot
+            leido = time.time_ns()
+            reserva = self.get_carrito(request.user)
+            entry = cache.guardar(key, {
+                "data": ReservaSerializer(reserva, context={"request": request}).data,
+                "id_reserva": reserva.pk,
+                "ultima_actividad": actividad.vigente(reserva.pk, reserva.ultima_actividad),
+                "productos": [detalle.producto_id for detalle in reserva.detalles.all()],
+                "leido": leido,
+            })
+
+        # keep cart alive on view: buffered touch (see ventas.actividad), refreshed in the
+        # snapshot at most once per CARRITO_TOUCH_INTERVAL
+        intervalo = timedelta(seconds=getattr(settings, "CARRITO_TOUCH_INTERVAL", 60))
+        if ahora - entry["ultima_actividad"] >= intervalo:
+            actividad.tocar(entry["id_reserva"], ahora)
+            entry = cache.guardar(key, {**entry, "ultima_actividad": ahora})
+        return Response(entry["data"])
+
+    def _parse_cantidad(self, value, default=None):
+        try:
+            return int(value if value not in (None, "") else default)
+        except (TypeError, ValueError):
+            return None
+
+    def _stock_conflict(self, exc):
+        return Response(
+            {"detail": "Stock insuficiente", "conflictos": exc.conflictos},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     # Agregar producto / actualizar cantidad
     def post(self, request):
         producto_id = request.data.get("producto_id")
-        cantidad = int(request.data.get("cantidad", 1) or 1)
-
-        reserva = self.get_carrito(request.user)
-        producto = Producto.objects.get(id_producto=producto_id)
-
-        if producto.stock_disponible < cantidad:
-            return Response({"detail": "Stock insuficiente"}, status=status.HTTP_400_BAD_REQUEST)
-
-        detalle, created = DetalleReserva.objects.get_or_create(
-            reserva=reserva,
-            producto=producto,
-            defaults={
-                "cantidad": cantidad,
-                "precio_unitario": producto.precio
-            }
-        )
+        cantidad = self._parse_cantidad(request.data.get("cantidad"), default=1)
+        if not cantidad or cantidad < 0:
+            return Response({"detail": "Cantidad inválida"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not created:
-            detalle.cantidad += cantidad
-            detalle.save()
+        try:
+            with transaction.atomic():
+                reserva = self.get_carrito(request.user)
+                producto = Producto.objects.only("id_producto", "precio").get(id_producto=producto_id)
+
+                # Descontar stock del producto (UPDATE condicional, sin sobreventa)
+                stock.reservar(producto.id_producto, cantidad)
+
+                detalle, created = DetalleReserva.objects.get_or_create(
+                    reserva=reserva,
+                    producto=producto,
+                    defaults={
+                        "cantidad": cantidad,
+                        "precio_unitario": producto.precio
+                    }
+                )
 
-        # Descontar stock del producto
-        producto.stock_disponible -= cantidad
-        producto.save(update_fields=["stock_disponible"])
+                if not created:
+                    DetalleReserva.objects.filter(pk=detalle.pk).update(cantidad=F("cantidad") + cantidad)
 
-        reserva.ultima_actividad = timezone.now()
-        reserva.save(update_fields=["ultima_actividad"])
+                # total / items_count follow the lines on their own (DetalleReserva)
+                reservas.registrar_actividad([reserva.pk])
+                cache.invalidar(request.user.pk)
+        except (Producto.DoesNotExist, ValueError):
+            return Response({"detail": "Producto no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        except stock.StockInsuficiente as exc:
+            return self._stock_conflict(exc)
 
         return Response({"message": "Producto agregado"}, status=200)
 
     # Editar cantidad
     def put(self, request):
         producto_id = request.data.get("producto_id")
-        cantidad = request.data.get("cantidad")
-
-        reserva = self.get_carrito(request.user)
-        detalle = DetalleReserva.objects.get(reserva=reserva, producto_id=producto_id)
-
-        # Calcular diferencia para ajustar stock
-        diferencia = cantidad - detalle.cantidad
+        cantidad = self._parse_cantidad(request.data.get("cantidad"))
+        if cantidad is None:
+            return Response({"detail": "Cantidad inválida"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if cantidad <= 0:
-            # devolver todo el stock al producto
-            producto = detalle.producto
-            producto.stock_disponible += detalle.cantidad
-            producto.save(update_fields=["stock_disponible"])
-            detalle.delete()
-            return Response({"message": "Producto eliminado"})
-
-        # Si aumenta cantidad, verificar stock
-        producto = detalle.producto
-        if diferencia > 0 and producto.stock_disponible < diferencia:
-            return Response({"detail": "Stock insuficiente"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Actualizar detalle y stock
-        detalle.cantidad = cantidad
-        detalle.save()
-        producto.stock_disponible -= diferencia
-        producto.save(update_fields=["stock_disponible"])
-
-        reserva.ultima_actividad = timezone.now()
-        reserva.save(update_fields=["ultima_actividad"])
+        try:
+            with transaction.atomic():
+                reserva = self.get_carrito(request.user)
+                # lock the line so concurrent edits compute the difference from the same value
+                detalle = DetalleReserva.objects.select_for_update().get(reserva=reserva, producto_id=producto_id)
+
+                if cantidad <= 0:
+                    # devolver todo el stock al producto
+                    stock.liberar(detalle.producto_id, detalle.cantidad)
+                    detalle.delete()
+                    reservas.registrar_actividad([reserva.pk])
+                    cache.invalidar(request.user.pk)
+                    return Response({"message": "Producto eliminado"})
+
+                # Calcular diferencia para ajustar stock (si aumenta, se valida en el UPDATE)
+                diferencia = cantidad - detalle.cantidad
+                stock.aplicar({detalle.producto_id: -diferencia})
+
+                detalle.cantidad = cantidad
+                detalle.save(update_fields=["cantidad"])
+
+                # total / items_count follow the lines on their own (DetalleReserva)
+                reservas.registrar_actividad([reserva.pk])
+                cache.invalidar(request.user.pk)
+        except (DetalleReserva.DoesNotExist, ValueError):
+            return Response({"detail": "El producto no está en el carrito"}, status=status.HTTP_404_NOT_FOUND)
+        except stock.StockInsuficiente as exc:
+            return self._stock_conflict(exc)
 
         return Response({"message": "Cantidad actualizada"})
 
@@ -127,131 +172,104 @@ class CarritoView(APIView):
     def delete(self, request):
         producto_id = request.data.get("producto_id")
 
-        reserva = self.get_carrito(request.user)
-        detalle = DetalleReserva.objects.get(reserva=reserva, producto_id=producto_id)
-
-        # Devolver stock al producto al eliminar del carrito
-        producto = detalle.producto
-        producto.stock_disponible += detalle.cantidad
-        producto.save(update_fields=["stock_disponible"])
+        try:
+            with transaction.atomic():
+                reserva = self.get_carrito(request.user)
+                detalle = DetalleReserva.objects.select_for_update().get(reserva=reserva, producto_id=producto_id)
 
-        detalle.delete()
+                # Devolver stock al producto al eliminar del carrito
+                stock.liberar(detalle.producto_id, detalle.cantidad)
+                detalle.delete()
 
-        reserva.ultima_actividad = timezone.now()
-        reserva.save(update_fields=["ultima_actividad"])
+                # total / items_count follow the lines on their own (DetalleReserva)
+                reservas.registrar_actividad([reserva.pk])
+                cache.invalidar(request.user.pk)
+        except (DetalleReserva.DoesNotExist, ValueError):
+            return Response({"detail": "El producto no está en el carrito"}, status=status.HTTP_404_NOT_FOUND)
 
         return Response({"message": "Producto eliminado"})
 
     def patch(self, request):
+        reserva = (
+            Reserva.objects.filter(usuario=request.user, estado='CARRO')
+            .select_related('usuario__direccion')
+            .prefetch_related(*DETALLES_PREFETCH)
+            .first()
+        )
+        if not reserva:
+            return Response({"detail": "No hay un carrito activo."}, status=status.HTTP_404_NOT_FOUND)
+
+        if not reserva.detalles.exists():
+            return Response({"detail": "El carrito está vacío."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ahora = timezone.now()
+        campos = {'fecha_reserva': timezone.localdate(ahora), 'fecha_pendiente': ahora}
         try:
-            reserva = Reserva.objects.filter(usuario=request.user, estado='CARRO').first()
-            if not reserva:
-                return Response({"detail": "No hay un carrito activo."}, status=status.HTTP_404_NOT_FOUND)
-
-            if not reserva.detalles.exists():
-                return Response({"detail": "El carrito está vacío."}, status=status.HTTP_400_BAD_REQUEST)
-
-            reserva.estado = 'PENDIENTE'
-            reserva.fecha_reserva = timezone.now()
-            reserva.save(update_fields=['estado', 'fecha_reserva'])
-
-            # Serialize response
-            serializer = ReservaSerializer(reserva)
-
-            # Try to send confirmation email
-            try:
-                user = getattr(reserva, 'usuario', None)
-                # Prefer 'correo' if available, fallback to 'email'
-                email = getattr(user, 'correo', None) or getattr(user, 'email', None)
-                if email:
-                    subject = f"Reserva #{reserva.id_reserva} confirmada"
-                    total = sum(d.cantidad * d.precio_unitario for d in reserva.detalles.all())
-                    lines = [
-                        "Gracias por tu compra!",
-                        f"Tu reserva #{reserva.id_reserva} ha sido confirmada.",
-                        f"Fecha: {reserva.fecha_reserva.strftime('%Y-%m-%d %H:%M')}",
-                        f"Estado: {reserva.estado}",
-                        "",
-                        "Detalles:",
-                    ]
-                    for d in reserva.detalles.all():
-                        lines.append(f"- {getattr(d.producto, 'nombre', d.producto_id)} x{d.cantidad} — CLP {d.precio_unitario}")
-                    lines.extend([
-                        "",
-                        f"Total: CLP {int(total)}",
-                        "",
-                        "Datos de pago (transferencia):",
-                        "Titular: TSI E-Commerce SpA",
-                        "Banco: Banco de Chile",
-                        "Cuenta: 12-345-67890-1",
-                        "RUT: 76.123.456-7",
-                        "Correo de confirmación: pagos@tsi-ecommerce.example",
-                        "",
-                        "Contacto:",
-                        "WhatsApp: +56 9 8765 4321",
-                        "Soporte: soporte@tsi-ecommerce.example",
-                        "",
-                        "Envía el comprobante de pago una vez realizada la transferencia al correo indicado anteriormente.",
-                    ])
-                    message = "\n".join(lines)
-
-                    send_mail(
-                        subject,
-                        message,
-                        getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@tsi-ecommerce.local'),
-                        [email],
-                        fail_silently=True,
-                    )
-            except Exception:
-                # Do not block checkout if email fails
-                pass
-
-            # Notify store owner about new order
-            try:
-                owner_email = 'tsiprueba75@gmail.com'
-                subject_owner = f"Nueva reserva creada #{reserva.id_reserva}"
-                total_owner = sum(d.cantidad * d.precio_unitario for d in reserva.detalles.all())
-                user = getattr(reserva, 'usuario', None)
-                user_email = getattr(user, 'correo', None) or getattr(user, 'email', None) or 'correo no disponible'
-                lines_owner = [
-                    "Se creó una nueva reserva.",
-                    f"ID: {reserva.id_reserva}",
-                    f"Estado: {reserva.estado}",
-                    f"Fecha: {reserva.fecha_reserva.strftime('%Y-%m-%d %H:%M')}",
-                    f"Usuario: {user_email}",
-                    "",
-                    "Detalles:",
-                ]
-                for d in reserva.detalles.all():
-                    lines_owner.append(f"- {getattr(d.producto, 'nombre', d.producto_id)} x{d.cantidad} — CLP {d.precio_unitario}")
-                lines_owner.extend([
-                    "",
-                    f"Total: CLP {int(total_owner)}",
-                ])
-
-                send_mail(
-                    subject_owner,
-                    "\n".join(lines_owner),
-                    getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@tsi-ecommerce.local'),
-                    [owner_email],
-                    fail_silently=True,
-                )
-            except Exception:
-                # Do not block checkout if owner notification fails
-                pass
+            with transaction.atomic():
+                # guarded CARRO -> PENDIENTE: a repeated or concurrent checkout cannot confirm twice
+                _, anteriores = estados.transicionar([reserva.pk], 'PENDIENTE', campos=campos)
+                if not anteriores:
+                    return Response({"detail": "No hay un carrito activo."}, status=status.HTTP_404_NOT_FOUND)
+                reserva.estado = 'PENDIENTE'
+                cache.invalidar(request.user.pk)
+                for campo, valor in campos.items():
+                    setattr(reserva, campo, valor)
+
+                # Queue confirmation + owner emails in the same transaction; send_outbox delivers them
+                notificaciones.encolar_checkout(reserva)
+        except DatabaseError as exc:
+            # the transaction rolled back: the cart is still a cart, nothing was confirmed
+            logger.exception("No se pudo confirmar la reserva %s", reserva.pk)
+            return Response(
+                {"detail": "No se pudo confirmar la reserva", "error": str(exc)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
+        # Serialize response; the reserva is already committed, so a failure here still reports success
+        try:
+            serializer = ReservaSerializer(reserva, context={"request": request})
             return Response(serializer.data, status=status.HTTP_200_OK)
-        except Exception as exc:  # keep checkout from failing silently
+        except (AttributeError, TypeError, ValueError) as exc:
             return Response(
                 {
                     "detail": "Reserva confirmada, pero no se pudo serializar la respuesta",
-                    "id_reserva": reserva.id_reserva if 'reserva' in locals() and reserva else None,
+                    "id_reserva": reserva.id_reserva,
                     "error": str(exc),
                 },
                 status=status.HTTP_200_OK,
             )
 
 
+class CarritoLineasView(CarritoView):
+    """PATCH many cart lines at once: `{"lineas": [{"producto_id", "cantidad"}, ...]}` or a bare list."""
+    http_method_names = ['patch', 'options']
+
+    def patch(self, request):
+        datos = {"lineas": request.data} if isinstance(request.data, list) else request.data
+        entrada = LineasCarritoSerializer(data=datos)
+        entrada.is_valid(raise_exception=True)
+        cantidades = {linea['producto_id']: linea['cantidad'] for linea in entrada.validated_data['lineas']}
+
+        try:
+            with transaction.atomic():
+                reserva = self.get_carrito(request.user)
+                carrito.aplicar_lineas(reserva, cantidades)
+        except carrito.ProductosNoEncontrados as exc:
+            return Response(
+                {"detail": "Producto no encontrado", "productos": exc.ids},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        except stock.StockInsuficiente as exc:
+            return self._stock_conflict(exc)
+
+        reserva = (
+            Reserva.objects.select_related('usuario__direccion')
+            .prefetch_related(*DETALLES_PREFETCH)
+            .get(pk=reserva.pk)
+        )
+        return Response(ReservaSerializer(reserva, context={"request": request}).data)
+
+
 class PedidosUsuarioView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -273,9 +291,9 @@ class PedidosUsuarioView(APIView):
             usuario=request.user,
             usuario__isnull=False,
             estado__in=estados_filtrados
-        ).select_related('usuario').prefetch_related('detalles__producto').order_by('-fecha_reserva', '-id_reserva')
+        ).select_related('usuario__direccion').prefetch_related(*DETALLES_PREFETCH).order_by('-fecha_reserva', '-id_reserva')
 
-        serializer = ReservaSerializer(pedidos, many=True)
+        serializer = ReservaSerializer(pedidos, many=True, context={"request": request})
         return Response(serializer.data)
 
 
@@ -294,87 +312,101 @@ class ReservaAdminViewSet(viewsets.ModelViewSet):
     queryset = (
         Reserva.objects.exclude(estado='CARRO')
         .select_related('usuario__direccion')
-        .prefetch_related('detalles__producto')
+        .prefetch_related(*DETALLES_PREFETCH)
         .order_by("-fecha_reserva", "-id_reserva")
     )
     serializer_class = ReservaSerializer
+    pagination_class = ReservaAdminPagination
 
-    def _restore_stock(self, reserva: Reserva):
-        """Return product stock for all items in a reserva."""
-        for det in reserva.detalles.select_related('producto').all():
-            producto = det.producto
-            if not producto:
-                continue
-            producto.stock_disponible += det.cantidad
-            producto.save(update_fields=["stock_disponible"])
-
-    def _send_status_email(self, reserva, previous_estado):
-        """Notify user when order status changes."""
-        try:
-            user = getattr(reserva, 'usuario', None)
-            email = getattr(user, 'correo', None) or getattr(user, 'email', None)
-            if not email:
-                return
-
-            total = sum(d.cantidad * d.precio_unitario for d in reserva.detalles.all())
-            subject = f"Actualización de estado - Reserva #{reserva.id_reserva}"
-            lines = [
-                "Actualizamos el estado de tu pedido:",
-                f"Reserva: #{reserva.id_reserva}",
-                f"Estado anterior: {previous_estado}",
-                f"Nuevo estado: {reserva.estado}",
-                f"Fecha: {timezone.now().strftime('%Y-%m-%d %H:%M')}",
-                "",
-                "Detalles:",
-            ]
-            for d in reserva.detalles.all():
-                lines.append(f"- {getattr(d.producto, 'nombre', d.producto_id)} x{d.cantidad} — CLP {d.precio_unitario}")
-            lines.extend([
-                "",
-                f"Total: CLP {int(total)}",
-                "",
-                "Contacto:",
-                "WhatsApp: +56 9 8765 4321",
-                "Soporte: soporte@tsi-ecommerce.example",
-                "",
-                "Si tienes alguna pregunta sobre este cambio, contáctanos de inmediato.",
-            ])
-
-            send_mail(
-                subject,
-                "\n".join(lines),
-                getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@tsi-ecommerce.local'),
-                [email],
-                fail_silently=True,
-            )
-        except Exception:
-            # never block admin updates on email issues
-            pass
+    def get_queryset(self):
+        if self.action != 'list':
+            return super().get_queryset()
+        # light list: no detalles (the admin loads them with retrieve when an order is expanded)
+        queryset = Reserva.objects.exclude(estado='CARRO').select_related('usuario__direccion')
+        return filtros.filtrar_reservas(queryset, self.request.query_params)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ReservaListaSerializer
+        return super().get_serializer_class()
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         previous_estado = getattr(instance, 'estado', None)
 
-        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        # estado only changes through the state machine; the serializer handles the other fields
+        nuevo_estado = request.data.get('estado')
+        datos = {campo: valor for campo, valor in request.data.items() if campo != 'estado'}
+        if nuevo_estado is not None and nuevo_estado not in dict(Reserva.ESTADO_OPCIONES):
+            raise ValidationError({"estado": f'"{nuevo_estado}" no es una elección válida.'})
+
+        serializer = self.get_serializer(instance, data=datos, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
+        with transaction.atomic():
+            if serializer.validated_data:
+                self.perform_update(serializer)
 
-        updated = serializer.instance
-        if getattr(updated, 'estado', previous_estado) != previous_estado:
-            self._send_status_email(updated, previous_estado)
+            if nuevo_estado and nuevo_estado != previous_estado:
+                resultados, anteriores = estados.transicionar(
+                    [instance.pk], nuevo_estado, queryset=self.get_queryset()
+                )
+                if not anteriores:
+                    # rolls back the other fields too
+                    raise ValidationError({"estado": resultados[0]["detail"]})
+                instance.estado = nuevo_estado
+                notificaciones.encolar_cambio_estado(instance, previous_estado)
 
-        return Response(serializer.data)
+        return Response(self.get_serializer(instance).data)
 
     def partial_update(self, request, *args, **kwargs):
         kwargs['partial'] = True
         return self.update(request, *args, **kwargs)
 
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """Move many reservas to one estado: a single UPDATE, bulk stock restore and bulk emails."""
+        entrada = EstadoMasivoSerializer(data=request.data)
+        entrada.is_valid(raise_exception=True)
+        estado = entrada.validated_data['estado']
+
+        with transaction.atomic():
+            resultados, anteriores = estados.transicionar(
+                entrada.validated_data['ids'], estado, queryset=Reserva.objects.exclude(estado='CARRO')
+            )
+            if anteriores:
+                cambiadas = (
+                    Reserva.objects.filter(pk__in=anteriores)
+                    .select_related('usuario')
+                    .prefetch_related('detalles__producto')
+                )
+                notificaciones.encolar_cambios_estado(cambiadas, anteriores)
+
+        return Response({
+            "estado": estado,
+            "actualizadas": len(anteriores),
+            "resultados": resultados,
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream reservas and their lines as CSV or NDJSON (`?formato=`), with the list filters."""
+        formato = (request.query_params.get('formato') or 'csv').lower()
+        if formato not in exportar.FORMATOS:
+            raise ValidationError({"formato": f"Debe ser uno de: {', '.join(exportar.FORMATOS)}."})
+        queryset = filtros.filtrar_reservas(Reserva.objects.exclude(estado='CARRO'), request.query_params)
+
+        response = StreamingHttpResponse(
+            exportar.stream(formato, exportar.filas(queryset)),
+            content_type=exportar.FORMATOS[formato],
+        )
+        fecha = timezone.localdate().isoformat()
+        response['Content-Disposition'] = f'attachment; filename="reservas-{fecha}.{formato}"'
+        return response
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        with transaction.atomic():
-            self._restore_stock(instance)
-            self.perform_destroy(instance)
+        reservas.eliminar_reservas([instance.pk])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def get_permissions(self):